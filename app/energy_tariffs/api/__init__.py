@@ -4,29 +4,28 @@ from dataclasses import dataclass
 import json
 import logging
 
+import logs
 from api.method import ApiMethod
-from api.methods import (
-    IndexingSettingApiMethod,
-    IndexingSettingsApiMethod,
-    EndPriceApiMethod,
-    EndPricesApiMethod,
-    ListApiMethod,
-    GridCostApiMethod,
-    ExciseApiMethod,
-)
+from api.result import BadRequest
+from api.schema import RequestError
+from api import methods
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# The methods are referenced by name, so only the module of the requested method is imported
 METHOD_MAP = {
-    ("indexingsetting", "POST"): IndexingSettingApiMethod,
-    ("indexingsettings", "POST"): IndexingSettingsApiMethod,
-    ("endprice", "POST"): EndPriceApiMethod,
-    ("endprices", "POST"): EndPricesApiMethod,
-    ("list", "GET"): ListApiMethod,
-    ("gridcost", "POST"): GridCostApiMethod,
-    ("excise", "POST"): ExciseApiMethod,
+    ("indexingsetting", "POST"): "IndexingSettingApiMethod",
+    ("indexingsettings", "POST"): "IndexingSettingsApiMethod",
+    ("endprice", "POST"): "EndPriceApiMethod",
+    ("endprice/backtest", "POST"): "EndPriceBacktestApiMethod",
+    ("endprices", "POST"): "EndPricesApiMethod",
+    ("list", "GET"): "ListApiMethod",
+    ("gridcost", "POST"): "GridCostApiMethod",
+    ("gridcost/all", "POST"): "GridCostAllApiMethod",
+    ("gridcosts/batch", "POST"): "GridCostsBatchApiMethod",
+    ("excise", "POST"): "ExciseApiMethod",
 }
 
 
@@ -37,13 +36,56 @@ class Api:
     base_path: str
     db_table: object  # Unfortunately not easy typing for boto3
 
-    def parse(self, event: dict) -> ApiMethod:
-        """Parse the incoming event through lambda from API Gateway"""
+    def build(self, event: dict) -> ApiMethod:
+        """Build the method for the incoming event, None when no method matches, raises a RequestError for an invalid body"""
         path = str(event.get("path", "")).removeprefix(self.base_path).strip("/")
         method = str(event.get("httpMethod", ""))
-        call_method = METHOD_MAP.get((path, method))
-        if call_method is not None:
-            return call_method.from_body(self.db_table, json.loads(event.get("body", r"{}")))
+        method_name = METHOD_MAP.get((path, method))
+        if method_name is None:
+            logger.warning("Unable to parse event")
+            return None
+        call_method = getattr(methods, method_name)
+
+        try:
+            body = json.loads(event.get("body") or r"{}")
+        except ValueError:
+            raise RequestError.of("", "the body must be valid JSON")
+        return call_method.parse_body(self.db_table, body)
+
+    def parse(self, event: dict) -> ApiMethod:
+        """Parse the incoming event through lambda from API Gateway"""
+        try:
+            return self.build(event)
+        except RequestError as exc:
+            logger.warning(f"Failed to parse the body: {exc}")
+            return None
+
+    def handle(self, event: dict) -> dict:
+        """Answer the incoming event with the response for API Gateway"""
+        try:
+            method = self.build(event)
+        except RequestError as exc:
+            logs.warning(logger, "Returning Bad Request for an invalid body", errors=exc.errors)
+            return BadRequest("Invalid request", errors=exc.errors).to_api()
+
+        if method is not None:
+            # Process the messages when we could parse it
+            response = method.process().to_api(if_none_match=Api.header(event, "If-None-Match"))  # Serialise the body only once
+            logs.log(
+                logger,
+                logging.WARNING if response["statusCode"] >= 400 else logging.INFO,
+                "Returning response",
+                method=method.__class__.__name__,
+                status=response["statusCode"],
+                body=logs.Payload(response["body"], raw=True),
+            )
+            return response
+
+        logger.warning("Returning Bad Request as we were not able to find a suitable processing method")
+        return BadRequest("No method found for processing").to_api()
 
-        logger.warning("Unable to parse event")
-        return None
+    @staticmethod
+    def header(event: dict, name: str) -> str:
+        """Get a (case-insensitive) request header from the incoming event"""
+        headers = event.get("headers") or {}
+        return next((value for key, value in headers.items() if key.lower() == name.lower()), None)
@@ -1,10 +1,54 @@
 """Module for an interface for API Methods"""
+from __future__ import annotations
+import logging
+
+import logs
 from api.result import ApiResult
+from api.schema import RequestError, Schema
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 
 class ApiMethod:
     """Class for processing a method"""
 
+    SCHEMA = Schema({})  # The schema of the request body
+
     def process(self) -> ApiResult:
         """Process the method"""
         raise NotImplementedError("This method is not implemented")
+
+    @classmethod
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the values of a request body that was parsed with the schema"""
+        raise NotImplementedError("This method is not implemented")
+
+    @classmethod
+    def parse_body(cls, db_table, body) -> ApiMethod:
+        """Create the object from a HTTP request body, raises a RequestError with every problem of the body"""
+        return cls.from_values(db_table, cls.SCHEMA.parse(body))
+
+    @classmethod
+    def from_body(cls, db_table, body):
+        """Create the object from a HTTP request body, None when the body is not valid"""
+        logs.info(logger, "Creating the method", method=cls.__name__, body=logs.Payload(body))
+        try:
+            return cls.parse_body(db_table, body)
+        except RequestError as exc:
+            logs.warning(logger, "Failed to parse the body", method=cls.__name__, errors=exc.errors, body=logs.Payload(body))
+            return None
+
+
+def process_unique(methods: dict[str, ApiMethod]) -> dict[str, ApiResult]:
+    """Process every distinct method only once and fan the result out to all keys that requested it"""
+    processed: list[tuple[ApiMethod, ApiResult]] = []
+    results = {}
+    for key, method in methods.items():
+        result = next((result for other, result in processed if other == method), None)
+        if result is None:
+            result = method.process()
+            processed.append((method, result))
+        results[key] = result
+    return results
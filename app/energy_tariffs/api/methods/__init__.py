@@ -1,18 +1,24 @@
-"""Init module for methods package"""
-from api.methods.indexing_setting import IndexingSettingApiMethod
-from api.methods.indexing_settings import IndexingSettingsApiMethod
-from api.methods.end_price import EndPriceApiMethod
-from api.methods.end_prices import EndPricesApiMethod
-from api.methods.list import ListApiMethod
-from api.methods.grid_cost import GridCostApiMethod
-from api.methods.excise import ExciseApiMethod
+"""Init module for methods package, a method module is only imported when its method is used (to keep cold starts short)"""
+from importlib import import_module
 
-__all__ = [
-    "IndexingSettingApiMethod",
-    "IndexingSettingsApiMethod",
-    "EndPriceApiMethod",
-    "EndPricesApiMethod",
-    "ListApiMethod",
-    "GridCostApiMethod",
-    "ExciseApiMethod",
-]
+METHOD_MODULES = {
+    "IndexingSettingApiMethod": "api.methods.indexing_setting",
+    "IndexingSettingsApiMethod": "api.methods.indexing_settings",
+    "EndPriceApiMethod": "api.methods.end_price",
+    "EndPriceBacktestApiMethod": "api.methods.end_price_backtest",
+    "EndPricesApiMethod": "api.methods.end_prices",
+    "ListApiMethod": "api.methods.list",
+    "GridCostApiMethod": "api.methods.grid_cost",
+    "GridCostAllApiMethod": "api.methods.grid_cost_all",
+    "GridCostsBatchApiMethod": "api.methods.grid_costs_batch",
+    "ExciseApiMethod": "api.methods.excise",
+}
+
+__all__ = list(METHOD_MODULES)
+
+
+def __getattr__(name: str):
+    """Import the module of a method on first use"""
+    if name in METHOD_MODULES:
+        return getattr(import_module(METHOD_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,48 @@
 """Module for the end price method"""
 from dataclasses import dataclass
 import logging
-import json
 
 from api.method import ApiMethod
+from api.schema import Field, number
 from api.methods.indexing_setting import IndexingSettingApiMethod
 from api.methods.grid_cost import GridCostApiMethod
 from api.methods.excise import ExciseApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.result import ApiResult, Success, BadRequest, IMMUTABLE, earliest_expiry, expires_in
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
+# The fields of the price formula, with the optional grid costs and excises
+PRICE_FIELDS = {
+    "INTERCEPT": Field(number),
+    "SLOPE": Field(number),
+    "TAXES": Field(number),
+    "GRID": Field(GridCostApiMethod.SCHEMA, required=False),
+    "EXCISE": Field(ExciseApiMethod.SCHEMA, required=False),
+}
+
+
+def calculate_end_price(value: float, intercept: float, slope: float, taxes: float, grid_cost: dict, excise: dict) -> float:
+    """Calculate the end price ((a + bX) + g + e) * t for the value X of the index"""
+    # Using linear regression Y = a + bX
+    # a: the intercept, which the base cost of the unit
+    # b: the slope of the line, which is the factor to be multiplied with the indexing setting value
+    end_price = intercept + slope * value
+    # Grid costs
+    end_price += grid_cost["grid_cost"] / grid_cost["energy"]
+    # Excises
+    end_price += excise["excise_cost"] / excise["energy"]
+    # Taxes
+    end_price *= taxes
+    return end_price
 
 
 @dataclass
 class EndPriceApiMethod(ApiMethod):
     """Method for /endprice"""
 
+    SCHEMA = IndexingSettingApiMethod.SCHEMA.extend(PRICE_FIELDS)
+
     index: IndexingSettingApiMethod
     intercept: float
     slope: float
@@ -26,65 +51,38 @@ class EndPriceApiMethod(ApiMethod):
     excises: ExciseApiMethod = None
 
     def process(self) -> ApiResult:
-        index_result = self.index.process()
-        grid_cost_result = self.grid_costs.process() if self.grid_costs is not None else Success({"grid_cost": 0, "energy": 1})
-        excise_result = self.excises.process() if self.excises is not None else Success({"excise_cost": 0, "energy": 1})
+        return self.combine(
+            self.index.process(),
+            self.grid_costs.process() if self.grid_costs is not None else None,
+            self.excises.process() if self.excises is not None else None,
+        )
 
-        if index_result.status_code == 200 and grid_cost_result.status_code == 200 and excise_result.status_code == 200:
-            # Using linear regression Y = a + bX
-            # a: the intercept, which the base cost of the unit
-            # b: the slope of the line, which is the factor to be multiplied with the indexing setting value
-            end_price = self.intercept + self.slope * index_result.body["value"]
-            # Grid costs
-            end_price += grid_cost_result.body["grid_cost"] / grid_cost_result.body["energy"]
-            # Excises
-            end_price += excise_result.body["excise_cost"] / excise_result.body["energy"]
-            # Taxes
-            end_price *= self.taxes
+    def combine(self, index_result: ApiResult, grid_cost_result: ApiResult = None, excise_result: ApiResult = None) -> ApiResult:
+        """Calculate the end price from the results of the index, grid costs and excises"""
+        no_cost_expires = expires_in(IMMUTABLE)
+        if grid_cost_result is None:
+            grid_cost_result = Success({"grid_cost": 0, "energy": 1}, expires=no_cost_expires)
+        if excise_result is None:
+            excise_result = Success({"excise_cost": 0, "energy": 1}, expires=no_cost_expires)
 
+        if index_result.status_code == 200 and grid_cost_result.status_code == 200 and excise_result.status_code == 200:
             result = {
                 **index_result.body,
-                "end_price": end_price,
+                "end_price": calculate_end_price(index_result.body["value"], self.intercept, self.slope, self.taxes, grid_cost_result.body, excise_result.body),
                 "grid": grid_cost_result.body,
                 "excise": excise_result.body,
             }
-            return Success(result)
+            return Success(result, expires=earliest_expiry([index_result, grid_cost_result, excise_result]))
         return BadRequest("No result found for requested index")
 
     @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}")
-        if any(key not in body for key in ["INTERCEPT", "SLOPE", "TAXES"]):
-            return None
-        index = IndexingSettingApiMethod.from_body(db_table=db_table, body=body)
-        if index is None:
-            return None
-
-        # Grid costs
-        if "GRID" in body:
-            grid_costs = GridCostApiMethod.from_body(db_table=db_table, body=body["GRID"])
-            if grid_costs is None:
-                return None
-        else:
-            grid_costs = None
-
-        # Excises
-        if "EXCISE" in body:
-            excises = ExciseApiMethod.from_body(db_table=db_table, body=body["EXCISE"])
-            if excises is None:
-                return None
-        else:
-            excises = None
-
-        intercept = body["INTERCEPT"]
-        slope = body["SLOPE"]
-        taxes = body["TAXES"]
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
         return cls(
-            index=index,
-            intercept=intercept,
-            slope=slope,
-            taxes=taxes,
-            grid_costs=grid_costs,
-            excises=excises,
+            index=IndexingSettingApiMethod.from_values(db_table, values),
+            intercept=values["INTERCEPT"],
+            slope=values["SLOPE"],
+            taxes=values["TAXES"],
+            grid_costs=GridCostApiMethod.from_values(db_table, values["GRID"]) if values["GRID"] is not None else None,
+            excises=ExciseApiMethod.from_values(db_table, values["EXCISE"]) if values["EXCISE"] is not None else None,
         )
@@ -0,0 +1,143 @@
+"""Module for the end price backtest method - The end price for every period of the index within a date range"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+import statistics
+
+from pytz import utc
+
+from api.method import ApiMethod
+from api.schema import Schema, Field, RequestError, date, get_timezone
+from api.methods.end_price import PRICE_FIELDS, calculate_end_price
+from api.methods.grid_cost import GridCostApiMethod
+from api.methods.excise import ExciseApiMethod
+from api.methods.indexing_setting import INDEX_FIELDS, DATE_FORMAT
+from api.result import ApiResult, Success, BadRequest, IMMUTABLE, REFERENCE_DATA, earliest_expiry, expires_in
+from dao.indexingsetting import IndexingSettingTimeframe, IndexingSettingOrigin
+from dao.series import IndexingSettingSeries
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+MAX_PERIODS = 8784  # The hourly values of a leap year, well within the payload and time limits of the API
+
+
+def summarize(values: list[float]) -> dict:
+    """Get the summary statistics of the series, the volatility is the (population) standard deviation"""
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values),
+        "min": min(values),
+        "max": max(values),
+        "volatility": statistics.pstdev(values),
+    }
+
+
+@dataclass
+class EndPriceBacktestApiMethod(ApiMethod):
+    """Method for /endprice/backtest"""
+
+    SCHEMA = Schema({**INDEX_FIELDS, "START": Field(date(DATE_FORMAT)), "END": Field(date(DATE_FORMAT)), **PRICE_FIELDS})
+
+    db_table: object  # Unfortunately not easy typing for boto3
+    name: str
+    source: str
+    timeframe: IndexingSettingTimeframe
+    origin: IndexingSettingOrigin
+    start: datetime  # Inclusive start of the range
+    end: datetime  # Inclusive end of the range
+    intercept: float
+    slope: float
+    taxes: float
+    grid_costs: GridCostApiMethod = None
+    excises: ExciseApiMethod = None
+    closed: bool = False  # Whether the range ended before the previous period, so its values do not change anymore
+
+    def process(self) -> ApiResult:
+        # The whole series in a single (paginated) query instead of a request per period, without an object per period
+        series = IndexingSettingSeries.query(
+            db_table=self.db_table,
+            source=self.source,
+            name=self.name,
+            origin=self.origin,
+            timeframe=self.timeframe,
+            start=self.start,
+            end=self.end,
+        )
+        no_cost_expires = expires_in(IMMUTABLE)
+        grid_cost_result = self.grid_costs.process() if self.grid_costs is not None else Success({"grid_cost": 0, "energy": 1}, expires=no_cost_expires)
+        excise_result = self.excises.process() if self.excises is not None else Success({"excise_cost": 0, "energy": 1}, expires=no_cost_expires)
+
+        if len(series) > 0 and grid_cost_result.status_code == 200 and excise_result.status_code == 200:
+            # The same formula as for /endprice, the grid costs and excises are the same for every period
+            grid_cost, excise = grid_cost_result.body, excise_result.body
+            end_prices = [calculate_end_price(value, self.intercept, self.slope, self.taxes, grid_cost, excise) for value in series.values]
+
+            result = {
+                "name": self.name,
+                "source": self.source,
+                "timeframe": self.timeframe.name,
+                "origin": self.origin.name,
+                "series": [{"date": date, "value": value, "end_price": end_price} for (date, value), end_price in zip(series.items(), end_prices)],
+                "statistics": summarize(end_prices),
+                "grid": grid_cost_result.body,
+                "excise": excise_result.body,
+            }
+            # New values might still be published or derived within a range that is not closed yet
+            series_expires = expires_in(IMMUTABLE if self.closed else REFERENCE_DATA)
+            return Success(result, expires=earliest_expiry([Success(None, expires=series_expires), grid_cost_result, excise_result]))
+        return BadRequest("No result found for requested index")
+
+    @staticmethod
+    def count_periods(timeframe: IndexingSettingTimeframe, start: datetime, end: datetime) -> int:
+        """Get the number of periods of the timeframe in the inclusive range"""
+        if timeframe == IndexingSettingTimeframe.MONTHLY:
+            return (end.year - start.year) * 12 + end.month - start.month + 1
+        if timeframe == IndexingSettingTimeframe.DAILY:
+            return (end - start).days + 1
+        return int((end - start).total_seconds() // 3600) + 1
+
+    @staticmethod
+    def parse_range(timeframe: IndexingSettingTimeframe, start: datetime, end: datetime, tz: str) -> tuple[datetime, datetime]:
+        """Localize the (naive) date range in the timezone, the range is limited to MAX_PERIODS periods"""
+        if end < start:
+            raise RequestError.of("END", f"must not be before START {start:{DATE_FORMAT}}")
+        if EndPriceBacktestApiMethod.count_periods(timeframe, start, end) > MAX_PERIODS:
+            raise RequestError.of("END", f"must be within {MAX_PERIODS} {timeframe.name.lower()} periods of START {start:{DATE_FORMAT}}")
+        tz_date = get_timezone(tz)
+        return tz_date.localize(start), tz_date.localize(end)
+
+    @staticmethod
+    def closed_before(timeframe: IndexingSettingTimeframe, tz: str) -> datetime:
+        """Get the start of the previous period, the values before it were published or derived and do not change anymore"""
+        tz_date = get_timezone(tz)
+        now = datetime.now(tz_date)
+        if timeframe == IndexingSettingTimeframe.MONTHLY:
+            last_month = now.replace(day=1) - timedelta(days=1)
+            return tz_date.localize(datetime(last_month.year, last_month.month, 1))
+        if timeframe == IndexingSettingTimeframe.DAILY:
+            yesterday = now.date() - timedelta(days=1)
+            return tz_date.localize(datetime(yesterday.year, yesterday.month, yesterday.day))
+        return now.astimezone(utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+
+    @classmethod
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
+        timeframe = values["TIMEFRAME"]
+        req_start, req_end = EndPriceBacktestApiMethod.parse_range(timeframe, values["START"], values["END"], values["TZ"])
+        return cls(
+            db_table=db_table,
+            name=values["INDEX"],
+            source=values["SOURCE"],
+            timeframe=timeframe,
+            origin=values["ORIGIN"],
+            start=req_start,
+            end=req_end,
+            intercept=values["INTERCEPT"],
+            slope=values["SLOPE"],
+            taxes=values["TAXES"],
+            grid_costs=GridCostApiMethod.from_values(db_table, values["GRID"]) if values["GRID"] is not None else None,
+            excises=ExciseApiMethod.from_values(db_table, values["EXCISE"]) if values["EXCISE"] is not None else None,
+            closed=req_end < EndPriceBacktestApiMethod.closed_before(timeframe, values["TZ"]),
+        )
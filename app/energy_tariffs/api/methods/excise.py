@@ -1,11 +1,11 @@
 """Module for the indexing setting method"""
 from dataclasses import dataclass
 import logging
-import json
 
 
 from api.method import ApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.schema import Schema, Field, string, number
+from api.result import ApiResult, Success, BadRequest, REFERENCE_DATA, expires_in
 from dao.excise import EnergyExcise
 
 
@@ -17,6 +17,8 @@ logger.setLevel(logging.INFO)
 class ExciseApiMethod(ApiMethod):
     """Method for /excise"""
 
+    SCHEMA = Schema({"COUNTRY": Field(string), "ENERGY": Field(number)})
+
     db_table: object  # Unfortunately not easy typing for boto3
     country: str
     energy_usage: float  # in kWh
@@ -31,20 +33,15 @@ class ExciseApiMethod(ApiMethod):
                     "energy": self.energy_usage,
                     "excise_cost": excise.calculate(total_energy_usage=self.energy_usage),
                 },
+                expires=expires_in(REFERENCE_DATA),
             )
         return BadRequest("No result found for country")
 
     @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}")
-        if any([key not in body for key in ["COUNTRY", "ENERGY"]]):
-            return None
-        req_country = body["COUNTRY"]
-        req_energy = body["ENERGY"]
-
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
         return cls(
             db_table=db_table,
-            country=req_country,
-            energy_usage=req_energy,
+            country=values["COUNTRY"],
+            energy_usage=values["ENERGY"],
         )
@@ -1,11 +1,11 @@
 """Module for the indexing setting method"""
 from dataclasses import dataclass
 import logging
-import json
 
 
 from api.method import ApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.schema import Schema, Field, string, number, boolean
+from api.result import ApiResult, Success, BadRequest, REFERENCE_DATA, expires_in
 from dao.gridcost import EnergyGridCost
 
 
@@ -17,6 +17,8 @@ logger.setLevel(logging.INFO)
 class GridCostApiMethod(ApiMethod):
     """Method for /gridcost"""
 
+    SCHEMA = Schema({"COUNTRY": Field(string), "PROVIDER": Field(string), "POWER": Field(number), "ENERGY": Field(number), "DYNAMIC": Field(boolean)})
+
     db_table: object  # Unfortunately not easy typing for boto3
     country: str
     provider: str
@@ -39,26 +41,18 @@ class GridCostApiMethod(ApiMethod):
                         peak_power_usage=self.power_usage, total_energy_usage=self.energy_usage, dynamic_data_management=self.dynamic
                     ),
                 },
+                expires=expires_in(REFERENCE_DATA),
             )
         return BadRequest("No result found for grid provider")
 
     @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}")
-        if any([key not in body for key in ["COUNTRY", "PROVIDER", "POWER", "ENERGY", "DYNAMIC"]]):
-            return None
-        req_country = body["COUNTRY"]
-        req_provider = body["PROVIDER"]
-        req_power = body["POWER"]
-        req_energy = body["ENERGY"]
-        req_dynamic = body["DYNAMIC"]
-
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
         return cls(
             db_table=db_table,
-            country=req_country,
-            provider=req_provider,
-            power_usage=req_power,
-            energy_usage=req_energy,
-            dynamic=req_dynamic,
+            country=values["COUNTRY"],
+            provider=values["PROVIDER"],
+            power_usage=values["POWER"],
+            energy_usage=values["ENERGY"],
+            dynamic=values["DYNAMIC"],
         )
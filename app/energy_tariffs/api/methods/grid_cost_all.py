@@ -0,0 +1,57 @@
+"""Module for the grid cost method for all providers of a country"""
+from dataclasses import dataclass
+import logging
+
+from api.method import ApiMethod
+from api.schema import Schema, Field, string, number, boolean
+from api.result import ApiResult, Success, BadRequest, REFERENCE_DATA, expires_in
+from dao.gridcost import EnergyGridCost
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@dataclass
+class GridCostAllApiMethod(ApiMethod):
+    """Method for /gridcost/all"""
+
+    SCHEMA = Schema({"COUNTRY": Field(string), "POWER": Field(number), "ENERGY": Field(number), "DYNAMIC": Field(boolean)})
+
+    db_table: object  # Unfortunately not easy typing for boto3
+    country: str
+    power_usage: float  # in kW for the last year
+    energy_usage: float  # in kWh for the last year
+    dynamic: bool  # whether you have an hourly (True) or monthly/yearly measuring contract (False)
+
+    def process(self) -> ApiResult:
+        grid_costs = EnergyGridCost.query_country(db_table=self.db_table, country=self.country)
+
+        if len(grid_costs) > 0:
+            return Success(
+                {
+                    "country": self.country,
+                    "power": self.power_usage,
+                    "energy": self.energy_usage,
+                    "dynamic": self.dynamic,
+                    "grid_costs": {
+                        grid_cost.grid_provider: grid_cost.calculate(
+                            peak_power_usage=self.power_usage, total_energy_usage=self.energy_usage, dynamic_data_management=self.dynamic
+                        )
+                        for grid_cost in sorted(grid_costs, key=lambda grid_cost: grid_cost.grid_provider)
+                    },
+                },
+                expires=expires_in(REFERENCE_DATA),
+            )
+        return BadRequest("No result found for country")
+
+    @classmethod
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
+        return cls(
+            db_table=db_table,
+            country=values["COUNTRY"],
+            power_usage=values["POWER"],
+            energy_usage=values["ENERGY"],
+            dynamic=values["DYNAMIC"],
+        )
@@ -0,0 +1,97 @@
+"""Module for the batch grid costs method - The same as grid cost but for many consumption profiles at once"""
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+
+from api.method import ApiMethod
+from api.schema import Schema, Batch, Field, RequestError, string, number, boolean, scalar_or_list, build_each
+from api.result import ApiResult, Success, BadRequest, REFERENCE_DATA, expires_in
+from dao.gridcost import EnergyGridCost
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def broadcast(values: dict[str, object]) -> dict[str, list]:
+    """Broadcast scalar values to the length of the list values, returns None when the list lengths differ"""
+    lengths = {len(value) for value in values.values() if isinstance(value, list)}
+    if len(lengths) > 1:
+        return None
+    length = lengths.pop() if len(lengths) == 1 else 1
+    return {key: value if isinstance(value, list) else [value] * length for key, value in values.items()}
+
+
+@dataclass
+class GridCostProfiles:
+    """Consumption profiles for a single grid provider"""
+
+    country: str
+    provider: str
+    power_usages: list[float]  # in kW for the last year
+    energy_usages: list[float]  # in kWh for the last year
+    dynamic: list[bool]  # whether you have an hourly (True) or monthly/yearly measuring contract (False)
+
+
+@dataclass
+class GridCostsBatchApiMethod(ApiMethod):
+    """Method for /gridcosts/batch"""
+
+    SCHEMA = Batch(
+        Schema(
+            {
+                "COUNTRY": Field(string),
+                "PROVIDER": Field(string),
+                "POWER": Field(scalar_or_list(number)),
+                "ENERGY": Field(scalar_or_list(number)),
+                "DYNAMIC": Field(scalar_or_list(boolean)),
+            }
+        )
+    )
+
+    db_table: object  # Unfortunately not easy typing for boto3
+    profiles: dict[str, GridCostProfiles]
+
+    def process(self) -> ApiResult:
+        # Load every grid provider only once
+        grid_costs = {}
+        for profiles in self.profiles.values():
+            provider_key = (profiles.country, profiles.provider)
+            if provider_key not in grid_costs:
+                grid_costs[provider_key] = EnergyGridCost.load(db_table=self.db_table, country=profiles.country, provider=profiles.provider)
+
+        if any(grid_cost is None for grid_cost in grid_costs.values()):
+            return BadRequest("No result found for one of the grid providers")
+
+        return Success(
+            {
+                key: {
+                    "country": profiles.country,
+                    "provider": profiles.provider,
+                    "grid_cost": grid_costs[(profiles.country, profiles.provider)].calculate_many(
+                        peak_power_usages=profiles.power_usages, total_energy_usages=profiles.energy_usages, dynamic_data_managements=profiles.dynamic
+                    ),
+                }
+                for key, profiles in self.profiles.items()
+            },
+            expires=expires_in(REFERENCE_DATA),
+        )
+
+    @staticmethod
+    def profiles_from_values(values: dict) -> GridCostProfiles:
+        """Create the consumption profiles from the parsed request"""
+        broadcasted = broadcast({"POWER": values["POWER"], "ENERGY": values["ENERGY"], "DYNAMIC": values["DYNAMIC"]})
+        if broadcasted is None:
+            raise RequestError.of("", "the lists of POWER, ENERGY and DYNAMIC must have the same length")
+        return GridCostProfiles(
+            country=values["COUNTRY"],
+            provider=values["PROVIDER"],
+            power_usages=broadcasted["POWER"],
+            energy_usages=broadcasted["ENERGY"],
+            dynamic=broadcasted["DYNAMIC"],
+        )
+
+    @classmethod
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
+        return cls(db_table=db_table, profiles=build_each(values, GridCostsBatchApiMethod.profiles_from_values))
@@ -1,31 +1,43 @@
 """Module for the indexing setting method"""
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
-import json
 
-from pytz import utc, timezone
-from pytz.exceptions import UnknownTimeZoneError
+from pytz import utc
 
 from api.method import ApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.schema import Schema, Field, RequestError, string, one_of, timezone_name, date, get_timezone
+from api.result import ApiResult, Success, BadRequest, IMMUTABLE, expires_in
 from dao.indexingsetting import IndexingSetting, IndexingSettingTimeframe, IndexingSettingOrigin
+from serializer import to_dict
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
+# The fields that identify an index, shared by all methods on an index
+INDEX_FIELDS = {
+    "INDEX": Field(string),
+    "SOURCE": Field(string),
+    "TIMEFRAME": Field(one_of(IndexingSettingTimeframe), required=False, default=IndexingSettingTimeframe.MONTHLY),
+    "ORIGIN": Field(one_of(IndexingSettingOrigin), required=False, default=IndexingSettingOrigin.ORIGINAL),
+    "TZ": Field(timezone_name, required=False, default="UTC"),
+}
+DATE_FORMAT = "%Y-%m-%d %H:%M"
 
 
 @dataclass
 class IndexingSettingApiMethod(ApiMethod):
     """Method for /indexingsetting"""
 
+    SCHEMA = Schema({**INDEX_FIELDS, "DATE": Field(date(DATE_FORMAT), required=False)})
+
     db_table: object  # Unfortunately not easy typing for boto3
     name: str
     source: str
     date: datetime
     timeframe: IndexingSettingTimeframe
     origin: IndexingSettingOrigin
+    current_until: datetime = None  # Until when the requested value is the current one, None when a fixed date was requested
 
     def __post_init__(self):
         """Post initialization"""
@@ -44,26 +56,20 @@ class IndexingSettingApiMethod(ApiMethod):
         )
 
         if indexing_setting is not None:
-
-            def translate_index(index: IndexingSetting) -> dict:
-                """Translate the index to output"""
-                # Translate enums to their string name
-                return {**asdict(index), "timeframe": index.timeframe.name, "origin": index.origin.name}
-
-            return Success(translate_index(indexing_setting))
+            # A published value for a fixed date does not change anymore
+            expires = self.current_until if self.current_until is not None else expires_in(IMMUTABLE)
+            # Translates the enums to their string name
+            return Success(to_dict(indexing_setting), expires=expires)
         return BadRequest("No result found for requested index")
 
     @staticmethod
-    def parse_date(timeframe: IndexingSettingTimeframe, date_str: str, tz: str) -> datetime:
-        """Parse the date from the body"""
-        tz_date = timezone(tz)
-        if date_str is None:
+    def parse_date(timeframe: IndexingSettingTimeframe, requested: datetime, tz: str) -> datetime:
+        """Get the date of the value for the (naive) requested date in the timezone, or for now when nothing was requested"""
+        tz_date = get_timezone(tz)
+        if requested is None:
             requested = datetime.now(tz_date)
         else:
-            try:
-                requested = tz_date.localize(datetime.strptime(date_str, "%Y-%m-%d %H:%M"))
-            except ValueError:
-                raise ValueError(f"Could not parse date {date_str}")
+            requested = tz_date.localize(requested)
 
         if timeframe == IndexingSettingTimeframe.MONTHLY:
             # The indices are calculated for last month so for current month we return last months value
@@ -75,37 +81,30 @@ class IndexingSettingApiMethod(ApiMethod):
 
         raise ValueError("Requested timeframe is not supported yet")
 
-    @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}")
-        if "INDEX" not in body or "SOURCE" not in body:
-            return None
-        req_index = body["INDEX"]
-        req_source = body["SOURCE"]
-
-        try:
-            req_timeframe = IndexingSettingTimeframe[body.get("TIMEFRAME", "MONTHLY")]
-            req_origin = IndexingSettingOrigin[body.get("ORIGIN", "ORIGINAL")]
-        except KeyError as exc:
-            # Timeframe or Origin are not valid enum values
-            logger.warning(f"Failed to parse the body {exc.args[0]}")
-            return None
+    @staticmethod
+    def current_period_end(timeframe: IndexingSettingTimeframe, tz: str) -> datetime:
+        """Get until when the value for the current date stays the current value"""
+        tz_date = get_timezone(tz)
+        now = datetime.now(tz_date)
+        if timeframe == IndexingSettingTimeframe.MONTHLY:
+            next_month = now.replace(day=28) + timedelta(days=4)
+            return tz_date.localize(datetime(next_month.year, next_month.month, 1))
+        return now.astimezone(utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
+    @classmethod
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
+        timeframe = values["TIMEFRAME"]
         try:
-            req_tz = body.get("TZ", "UTC")
-            req_date = IndexingSettingApiMethod.parse_date(req_timeframe, body.get("DATE", None), req_tz)
+            req_date = IndexingSettingApiMethod.parse_date(timeframe, values["DATE"], values["TZ"])
         except ValueError as exc:
-            logger.warning(f"Failed to parse the body: {exc.args[0]}")
-            return None
-        except UnknownTimeZoneError:
-            logger.warning("Failed to parse the body: Unknown timezone")
-            return None
+            raise RequestError.of("TIMEFRAME", exc.args[0])
         return cls(
             db_table=db_table,
-            name=req_index,
-            source=req_source,
+            name=values["INDEX"],
+            source=values["SOURCE"],
             date=req_date,
-            timeframe=req_timeframe,
-            origin=req_origin,
+            timeframe=timeframe,
+            origin=values["ORIGIN"],
+            current_until=IndexingSettingApiMethod.current_period_end(timeframe, values["TZ"]) if values["DATE"] is None else None,
         )
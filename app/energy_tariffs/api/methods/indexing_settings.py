@@ -2,11 +2,12 @@
 from dataclasses import dataclass
 from itertools import islice
 import logging
-import json
 
-from api.method import ApiMethod
+from api.method import ApiMethod, process_unique
+from api.schema import Batch, build_each
 from api.methods.indexing_setting import IndexingSettingApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.result import ApiResult, Success, BadRequest, earliest_expiry
+from dao.storage import CoalescingBackend, as_backend
 
 
 logger = logging.getLogger(__name__)
@@ -17,27 +18,22 @@ logger.setLevel(logging.INFO)
 class IndexingSettingsApiMethod(ApiMethod):
     """Method for /indexingsettings"""
 
+    SCHEMA = Batch(IndexingSettingApiMethod.SCHEMA)
+
     indexes: dict[str, IndexingSettingApiMethod]
 
     def process(self) -> ApiResult:
-        results = {key: request.process() for key, request in self.indexes.items()}
+        results = process_unique(self.indexes)
 
         if any(result.status_code != 200 for result in results.values()):
             return BadRequest("No result found for one of the requested indices")
 
-        return Success({key: result.body for key, result in results.items()})
+        return Success({key: result.body for key, result in results.items()}, expires=earliest_expiry(list(results.values())))
 
     @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}")
-        if len(body) == 0:
-            return None
-
-        index_requests = {key: IndexingSettingApiMethod.from_body(db_table, index_request) for key, index_request in body.items()}
-
-        if any(request is None for request in index_requests.values()):
-            logger.info("One of the requests was not falid")
-            return None
-
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body"""
+        # All requests share the reads of the same keys
+        db_table = CoalescingBackend(as_backend(db_table))
+        index_requests = build_each(values, lambda index_request: IndexingSettingApiMethod.from_values(db_table, index_request))
         return cls(indexes=dict(islice(index_requests.items(), 5)))  # Limit to 5 requests for performance reasons
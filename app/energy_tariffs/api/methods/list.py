@@ -1,11 +1,11 @@
 """Module for the end price method"""
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import logging
-import json
 
 from api.method import ApiMethod
-from api.result import ApiResult, Success
+from api.result import ApiResult, Success, REFERENCE_DATA, expires_in
 from dao.indexingsetting import IndexingSettingDocumentation
+from serializer import to_dict
 
 
 logger = logging.getLogger(__name__)
@@ -20,11 +20,10 @@ class ListApiMethod(ApiMethod):
 
     def process(self) -> ApiResult:
         docs = IndexingSettingDocumentation.query(self.db_table)
-        docs_list = [{**asdict(doc), "timeframe": doc.timeframe.name, "origin": doc.origin.name} for doc in docs]
-        return Success(docs_list)
+        docs_list = [to_dict(doc) for doc in docs]
+        return Success(docs_list, expires=expires_in(REFERENCE_DATA))
 
     @classmethod
-    def from_body(cls, db_table, body: dict):
-        """Create the object from a HTTP request body"""
-        logger.info(f"Creating the {cls.__name__} method for body {json.dumps(body)}, although body is not needed")
+    def from_values(cls, db_table, values: dict):
+        """Create the object from the parsed request body, although body is not needed"""
         return cls(db_table)
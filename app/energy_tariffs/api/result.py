@@ -1,6 +1,36 @@
 """Module for representing a result to API Gateway"""
+from __future__ import annotations
 from dataclasses import dataclass, field
-import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import hashlib
+
+from pytz import utc
+
+from serializer import dumps
+
+
+IMMUTABLE = timedelta(days=365)  # Lifetime for data that will never change anymore, e.g. a published index of a past month
+REFERENCE_DATA = timedelta(hours=1)  # Lifetime for reference data that is updated from time to time, e.g. grid costs
+
+
+def expires_in(lifetime: timedelta) -> datetime:
+    """Get the expiry date for a result that stays valid for the given lifetime"""
+    return datetime.now(utc) + lifetime
+
+
+def earliest_expiry(results: list[ApiResult]) -> datetime:
+    """Get the expiry date of a combination of results, which is None if one of them is not cacheable"""
+    expiries = [result.expires for result in results]
+    if len(expiries) == 0 or any(expires is None for expires in expiries):
+        return None
+    return min(expiries)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check whether the If-None-Match header of the request matches the ETag"""
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
 @dataclass
@@ -9,21 +39,45 @@ class ApiResult:
 
     status_code: int
     body: dict = field(default_factory=lambda: {})
+    expires: datetime = None  # Until when the result may be cached, None when it may not be cached
+
+    def cache_headers(self, body: str) -> dict:
+        """Get the HTTP caching headers for the serialised body"""
+        now = datetime.now(utc)
+        if self.status_code != 200 or self.expires is None or self.expires <= now:
+            return {"Cache-Control": "no-store"}
+
+        max_age = int((self.expires - now).total_seconds())
+        cache_control = f"public, max-age={max_age}"
+        if max_age >= IMMUTABLE.total_seconds() - 60:
+            cache_control += ", immutable"
+        return {
+            "ETag": f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"',
+            "Cache-Control": cache_control,
+            "Expires": format_datetime(self.expires.astimezone(timezone.utc), usegmt=True),
+        }
 
-    def to_api(self) -> dict:
-        """Transform to output for the API"""
-        return {"statusCode": self.status_code, "body": json.dumps(self.body, default=str)}
+    def to_api(self, if_none_match: str = None) -> dict:
+        """Transform to output for the API, answering with 304 when the client already has the same result"""
+        body = dumps(self.body)
+        headers = self.cache_headers(body)
+        if if_none_match is not None and "ETag" in headers and etag_matches(if_none_match, headers["ETag"]):
+            return {"statusCode": 304, "headers": headers, "body": ""}
+        return {"statusCode": self.status_code, "headers": headers, "body": body}
 
 
 class Success(ApiResult):
     """The HTTP 200 result"""
 
-    def __init__(self, result: dict):
-        super().__init__(200, result)
+    def __init__(self, result: dict, expires: datetime = None):
+        super().__init__(200, result, expires)
 
 
 class BadRequest(ApiResult):
     """The HTTP 400 result"""
 
-    def __init__(self, error_msg):
-        super().__init__(400, {"error": error_msg})
+    def __init__(self, error_msg, errors: list[dict] = None):
+        body = {"error": error_msg}
+        if errors is not None:
+            body["errors"] = errors  # Every problem with the field that caused it
+        super().__init__(400, body)
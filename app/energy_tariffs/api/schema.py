@@ -0,0 +1,225 @@
+"""
+Declarative request schemas
+
+Every route declares the fields of its body once. The schema is compiled into a tuple of converters when the module is
+imported, so parsing a body is a single loop without any lookups. Problems are collected instead of failing on the first
+one, so a 400 response lists every problem with the field that caused it. Batch routes reuse the schema of the single
+route for every entry.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Type
+import re
+
+from pytz import timezone
+from pytz.exceptions import UnknownTimeZoneError
+
+
+class RequestError(ValueError):
+    """Error for an invalid request body, holding every problem that was found"""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__("; ".join(f"{error['field']}: {error['message']}" if error["field"] else error["message"] for error in errors))
+        self.errors = errors
+
+    @staticmethod
+    def of(field: str, message: str) -> RequestError:
+        """Create the error for a single problem"""
+        return RequestError([{"field": field, "message": message}])
+
+    def prefixed(self, prefix: str) -> list[dict]:
+        """Get the problems with the field names prefixed, for nested and batch bodies"""
+        return [{**error, "field": f"{prefix}.{error['field']}" if error["field"] else prefix} for error in self.errors]
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str):
+    """Get the timezone object, which is only created once per name"""
+    return timezone(name)
+
+
+DATE_DIRECTIVES = {
+    "%Y": ("year", r"(\d{4})"),
+    "%m": ("month", r"(\d{1,2})"),
+    "%d": ("day", r"(\d{1,2})"),
+    "%H": ("hour", r"(\d{1,2})"),
+    "%M": ("minute", r"(\d{1,2})"),
+}
+
+
+@lru_cache(maxsize=None)
+def compile_date_format(date_format: str) -> Callable[[str], datetime]:
+    """Compile a date format (with %Y, %m, %d, %H and %M) into a parser for naive dates, which is a lot faster than strptime"""
+    pattern, names = "", []
+    for part in re.split(r"(%[YmdHM])", date_format):
+        if part in DATE_DIRECTIVES:
+            name, regex = DATE_DIRECTIVES[part]
+            names.append(name)
+            pattern += regex
+        else:
+            pattern += re.escape(part)
+    compiled = re.compile(pattern)
+
+    def parse(value: str) -> datetime:
+        match = compiled.fullmatch(value) if isinstance(value, str) else None
+        if match is None:
+            raise ValueError(f"time data {value!r} does not match format {date_format!r}")
+        return datetime(**{"year": 1900, "month": 1, "day": 1, **dict(zip(names, map(int, match.groups())))})
+
+    return parse
+
+
+def string(value) -> str:
+    """Convert a string"""
+    if not isinstance(value, str):
+        raise ValueError("must be a string")
+    return value
+
+
+def number(value) -> float:
+    """Convert a number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("must be a number")
+    return value
+
+
+def boolean(value) -> bool:
+    """Convert a boolean, also accepting the integers 0 and 1 as the API did before the bodies were validated"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return value == 1
+    raise ValueError("must be a boolean")
+
+
+def timezone_name(value) -> str:
+    """Convert the name of a timezone, which must be known"""
+    try:
+        get_timezone(string(value))
+    except UnknownTimeZoneError:
+        raise ValueError(f"unknown timezone {value}")
+    return value
+
+
+def one_of(enum: Type[Enum]) -> Callable[[str], Enum]:
+    """Create the converter for the name of an enum value"""
+    members = enum.__members__
+    message = f"must be one of {', '.join(members)}"
+
+    def convert(value) -> Enum:
+        if not isinstance(value, str) or value not in members:
+            raise ValueError(message)
+        return members[value]
+
+    return convert
+
+
+def date(date_format: str) -> Callable[[str], datetime]:
+    """Create the converter for a naive date in the given format"""
+    parse = compile_date_format(date_format)
+
+    def convert(value) -> datetime:
+        try:
+            return parse(value)
+        except ValueError:
+            raise ValueError(f"must be a date formatted as {date_format}")
+
+    return convert
+
+
+def scalar_or_list(convert: Callable) -> Callable:
+    """Create the converter for a single value or a non-empty list of values"""
+
+    def convert_all(value):
+        if not isinstance(value, list):
+            return convert(value)
+        if len(value) == 0:
+            raise ValueError("must not be an empty list")
+        try:
+            return [convert(item) for item in value]
+        except ValueError as exc:
+            raise ValueError(f"{exc.args[0]} or a list of those")
+
+    return convert_all
+
+
+@dataclass(frozen=True)
+class Field:
+    """A field of a request body"""
+
+    convert: Callable  # Converts the value or raises a ValueError (or RequestError) with the problem
+    required: bool = True
+    default: object = None  # The value when an optional field is absent
+
+
+class Schema:
+    """Schema of a request body, an object with the declared fields (other keys are ignored)"""
+
+    def __init__(self, fields: dict[str, Field]):
+        self.fields = fields
+        self.compiled = tuple((name, field.convert, field.required, field.default) for name, field in fields.items())
+
+    def extend(self, fields: dict[str, Field]) -> Schema:
+        """Create a new schema with additional fields"""
+        return Schema({**self.fields, **fields})
+
+    def parse(self, body) -> dict:
+        """Validate and convert the body, raises a RequestError with every problem"""
+        if not isinstance(body, dict):
+            raise RequestError.of("", "must be an object")
+        values, errors = {}, []
+        for name, convert, required, default in self.compiled:
+            value = body.get(name)
+            if value is None:
+                if required:
+                    errors.append({"field": name, "message": "is required"})
+                values[name] = default
+                continue
+            try:
+                values[name] = convert(value)
+            except RequestError as exc:
+                errors.extend(exc.prefixed(name))
+            except ValueError as exc:
+                errors.append({"field": name, "message": exc.args[0]})
+        if len(errors) > 0:
+            raise RequestError(errors)
+        return values
+
+    __call__ = parse  # A schema is the converter of a nested object
+
+
+class Batch:
+    """Schema of a batch request body, an object of which every value follows the schema of a single request"""
+
+    def __init__(self, item: Schema):
+        self.item = item
+
+    def parse(self, body) -> dict[str, dict]:
+        """Validate and convert every request of the body, raises a RequestError with every problem"""
+        if not isinstance(body, dict) or len(body) == 0:
+            raise RequestError.of("", "must be an object with at least one request")
+        values, errors = {}, []
+        for key, item in body.items():
+            try:
+                values[key] = self.item.parse(item)
+            except RequestError as exc:
+                errors.extend(exc.prefixed(key))
+        if len(errors) > 0:
+            raise RequestError(errors)
+        return values
+
+
+def build_each(values: dict[str, dict], build: Callable[[dict], object]) -> dict[str, object]:
+    """Build the object of every request of a batch, raises a RequestError with the problems of all requests"""
+    results, errors = {}, []
+    for key, item in values.items():
+        try:
+            results[key] = build(item)
+        except RequestError as exc:
+            errors.extend(exc.prefixed(key))
+    if len(errors) > 0:
+        raise RequestError(errors)
+    return results
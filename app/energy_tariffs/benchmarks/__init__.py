@@ -0,0 +1,48 @@
+"""
+Benchmarks for the hot paths of the API and the feeders
+
+Run all benchmarks with `python -m benchmarks`, or only some with `python -m benchmarks logs`. Every benchmark reports
+the throughput in items per second, so the numbers before and after an optimisation can be compared.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable
+import time
+import tracemalloc
+
+
+@dataclass
+class Measurement:
+    """The result of a single benchmark"""
+
+    name: str
+    items: int  # The number of items processed in a single run
+    seconds: float  # The best time of a single run
+    peak_bytes: int = None  # The peak memory allocated during a single run
+
+    @property
+    def items_per_second(self) -> float:
+        """Get the throughput"""
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self) -> str:
+        peak = f"{self.peak_bytes / 1024:12.1f} KiB peak" if self.peak_bytes is not None else ""
+        return f"{self.name:<60} {self.items_per_second:14.1f} items/s {self.seconds * 1000:10.2f} ms/run {peak}"
+
+
+def measure(name: str, func: Callable[[], object], items: int, repeat: int = 5, memory: bool = False) -> Measurement:
+    """Run the function repeatedly and keep the best time, optionally measuring the peak memory of an extra run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return Measurement(name, items, best, peak_bytes)
@@ -0,0 +1,18 @@
+"""Run the benchmarks, e.g. `python -m benchmarks` or `python -m benchmarks logs`"""
+import importlib
+import sys
+
+BENCHMARKS = ["logs", "imports", "parsers", "codecs"]
+
+
+def main():
+    """Run the requested benchmarks and print their measurements"""
+    for name in sys.argv[1:] or BENCHMARKS:
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        print(f"# {name}")
+        for measurement in module.run():
+            print(measurement)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark for the DynamoDB codecs of the data access objects
+
+The codecs run for every stored and loaded item. The hand-written codecs of the models are compared to the previous
+implementation with `dataclasses.asdict` and `strptime`, which is kept here as the reference.
+"""
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from pytz import utc
+
+from benchmarks import Measurement, measure
+from dao.excise import EnergyExcise
+from dao.gridcost import EnergyDirection, EnergyGridCost
+from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+
+
+@dataclass
+class DictIndexingSetting:
+    """The indexing setting without slots, for comparing the memory of the objects"""
+
+    name: str
+    value: float
+    timeframe: IndexingSettingTimeframe
+    date: datetime
+    source: str
+    origin: IndexingSettingOrigin
+
+
+def asdict_encode_indexing_setting(index: IndexingSetting) -> dict:
+    """The reference encoder of the indexing settings"""
+    return {
+        **asdict(index),
+        "primary": f"{index.source}#{index.origin.name}#{index.timeframe.name}#{index.name}",
+        "secondary": int(index.date.astimezone(utc).timestamp()),
+        "date": index.date.astimezone(utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "timeframe": index.timeframe.name,
+        "origin": index.origin.name,
+        "value": str(index.value),
+        "last_updated": datetime.now(utc).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def strptime_decode_indexing_setting(data: dict) -> IndexingSetting:
+    """The reference decoder of the indexing settings"""
+    return IndexingSetting(
+        name=data.get("name"),
+        value=float(data.get("value")),
+        timeframe=IndexingSettingTimeframe[data.get("timeframe")],
+        date=datetime.strptime(data.get("date"), "%Y-%m-%d %H:%M:%S").replace(tzinfo=utc),
+        source=data.get("source"),
+        origin=IndexingSettingOrigin[data.get("origin")],
+    )
+
+
+def asdict_encode_grid_cost(grid_cost: EnergyGridCost) -> dict:
+    """The reference encoder of the grid costs"""
+    data = {
+        key: str(value) if isinstance(value, float) else value.name if isinstance(value, EnergyDirection) else value for key, value in asdict(grid_cost).items()
+    }
+    primary, secondary = EnergyGridCost._ddb_hash(grid_cost.country, grid_cost.grid_provider)
+    return {**data, "primary": primary, "secondary": secondary}
+
+
+def asdict_encode_excise(excise: EnergyExcise) -> dict:
+    """The reference encoder of the excises"""
+    primary, secondary = EnergyExcise._ddb_hash(excise.country)
+    return {
+        **asdict(excise),
+        "primary": primary,
+        "secondary": secondary,
+        "energy_contribution": str(excise.energy_contribution),
+        "graduated_excise": {str(key): str(value) for key, value in excise.graduated_excise.items()},
+    }
+
+
+def hourly_index_values(count: int) -> list[IndexingSetting]:
+    """Create hourly prices"""
+    start = datetime(2023, 1, 1, tzinfo=utc)
+    return [
+        IndexingSetting("SDAC BE", 100.0 + hour % 24, IndexingSettingTimeframe.HOURLY, start + timedelta(hours=hour), "ENTSO-E", IndexingSettingOrigin.ORIGINAL)
+        for hour in range(count)
+    ]
+
+
+def run(items: int = 10000) -> list[Measurement]:
+    """Compare the encoding and decoding throughput of the codecs, and the memory of the objects with and without slots"""
+    index_values = hourly_index_values(items)
+    index_items = [index._to_ddb_json() for index in index_values]
+    grid_costs = [EnergyGridCost("BE", f"Provider {number}", EnergyDirection.DRAWDOWN, 40.0, 0.05, 15.0, 20.0, 0.01, 0.002, 0.015) for number in range(items)]
+    grid_cost_items = [grid_cost._to_ddb_json() for grid_cost in grid_costs]
+    excises = [EnergyExcise("BE", {0: 0.05, 3000: 0.045, 20000: 0.04, 50000: 0.035}, 0.002) for _ in range(items)]
+    excise_items = [excise._to_ddb_json() for excise in excises]
+
+    def create(cls) -> list:
+        return [cls(index.name, index.value, index.timeframe, index.date, index.source, index.origin) for index in index_values]
+
+    return [
+        measure("indexing setting encode, asdict", lambda: [asdict_encode_indexing_setting(index) for index in index_values], items),
+        measure("indexing setting encode, hand-written", lambda: [index._to_ddb_json() for index in index_values], items),
+        measure("indexing setting decode, strptime", lambda: [strptime_decode_indexing_setting(item) for item in index_items], items),
+        measure("indexing setting decode, epoch", lambda: [IndexingSetting._from_ddb_json(item) for item in index_items], items),
+        measure("indexing setting create, dict", lambda: create(DictIndexingSetting), items, memory=True),
+        measure("indexing setting create, slots", lambda: create(IndexingSetting), items, memory=True),
+        measure("grid cost encode, asdict", lambda: [asdict_encode_grid_cost(grid_cost) for grid_cost in grid_costs], items),
+        measure("grid cost encode, hand-written", lambda: [grid_cost._to_ddb_json() for grid_cost in grid_costs], items),
+        measure("grid cost decode", lambda: [EnergyGridCost._from_ddb_json(item) for item in grid_cost_items], items),
+        measure("excise encode, asdict", lambda: [asdict_encode_excise(excise) for excise in excises], items),
+        measure("excise encode, hand-written", lambda: [excise._to_ddb_json() for excise in excises], items),
+        measure("excise decode", lambda: [EnergyExcise._from_ddb_json(item) for item in excise_items], items),
+    ]
@@ -0,0 +1,73 @@
+"""
+Benchmark for the cold start imports of the lambda handlers
+
+Every entry module is imported in a fresh interpreter with `-X importtime`. Run
+`python -m benchmarks.bench_imports lambda_api` for the report of the slowest imports of a single module.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import islice
+import os
+import subprocess
+import sys
+
+from benchmarks import Measurement
+
+
+ENTRY_MODULES = ["lambda_api", "lambda_feeder"]
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ImportTime:
+    """The import time of a single module"""
+
+    module: str
+    self_us: int  # Without the imports of the module
+    cumulative_us: int  # Including the imports of the module
+    depth: int
+
+
+def import_times(module: str) -> list[ImportTime]:
+    """Import the module in a fresh interpreter and get the import time of every module it pulls in"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": APP_DIR},
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2))
+    return times
+
+
+def report(module: str, top: int = 25) -> str:
+    """Get the report of the slowest imports (cumulative) of the module"""
+    times = import_times(module)
+    total = next(entry for entry in reversed(times) if entry.module == module)
+    lines = [f"{module}: {total.cumulative_us / 1000:.1f} ms"]
+    slowest = sorted(times, key=lambda entry: entry.cumulative_us, reverse=True)
+    for entry in islice(slowest, 1, top + 1):
+        lines.append(f"{entry.cumulative_us / 1000:10.1f} ms {entry.self_us / 1000:10.1f} ms self  {'  ' * entry.depth}{entry.module}")
+    return "\n".join(lines)
+
+
+def run() -> list[Measurement]:
+    """Measure the cold start imports of the entry modules"""
+    measurements = []
+    for module in ENTRY_MODULES:
+        times = import_times(module)
+        total = next(entry for entry in reversed(times) if entry.module == module)
+        measurements.append(Measurement(f"import {module} ({len(times)} modules)", 1, total.cumulative_us / 1e6))
+    return measurements
+
+
+if __name__ == "__main__":
+    for entry_module in sys.argv[1:] or ENTRY_MODULES:
+        print(report(entry_module))
@@ -0,0 +1,42 @@
+"""Benchmark for logging the response of a large batch request"""
+from __future__ import annotations
+import io
+import logging
+
+import logs
+from serializer import dumps
+from benchmarks import Measurement, measure
+
+
+def response_body(count: int) -> str:
+    """Create the body of a large /endprices response"""
+    return dumps({f"q{index}": {"name": "SDAC BE", "source": "ENTSO-E", "value": 100.0 + index, "date": "2023-05-01 00:00"} for index in range(count)})
+
+
+def run(records: int = 1000) -> list[Measurement]:
+    """Compare the eager log line to structured records with different sample rates"""
+    logger = logging.getLogger("benchmarks.logs")
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    body = {"items": response_body(50)}
+
+    def eager():
+        for _ in range(records):
+            logger.info(f"Returning status 200 with body {dumps(body)}")
+
+    def structured():
+        for _ in range(records):
+            logs.info(logger, "Returning response", status=200, body=logs.Payload(body))
+
+    measurements = []
+    try:
+        logger.setLevel(logging.INFO)
+        measurements.append(measure("eager f-string", eager, records))
+        for sample_rate in (1.0, 0.1, 0.0):
+            logs.SETTINGS.sample_rate = sample_rate
+            measurements.append(measure(f"structured, sample rate {sample_rate}", structured, records))
+        logger.setLevel(logging.WARNING)
+        measurements.append(measure("structured, level disabled", structured, records))
+    finally:
+        logs.SETTINGS = logs.LogSettings.from_env()
+    return measurements
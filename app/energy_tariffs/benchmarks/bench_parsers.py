@@ -0,0 +1,171 @@
+"""
+Benchmark for the parse paths of the feeders
+
+Every parser runs over the captured documents in tests/feeders/data and over synthetically scaled versions of them:
+the Engie tables and the EEX items repeated, the ENTSO-E time series shifted over multiple years and the Fluvius
+workbook with its rows repeated. The documents are parsed without any network access, so only the parsing is measured.
+"""
+from __future__ import annotations
+from copy import copy
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+import json
+import locale
+import logging
+import re
+
+from pytz import timezone, utc
+
+from benchmarks import Measurement, measure
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+DATA_DIR = Path(__file__).parent.parent / "tests" / "feeders" / "data"
+ENTSOE_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}Z")
+
+
+def read_text(file_name: str) -> str:
+    """Read a captured text document"""
+    return (DATA_DIR / file_name).read_text(encoding="utf-8")
+
+
+def read_bytes(file_name: str) -> bytes:
+    """Read a captured binary document"""
+    return (DATA_DIR / file_name).read_bytes()
+
+
+def scale_engie_html(html_text: str, scale: int) -> str:
+    """Repeat the rows of the Engie table"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_text, "html.parser")
+    table = soup.find("div", class_="table_body")
+    rows = table.find_all("div", class_="table_row")
+    for _ in range(scale - 1):
+        for row in rows:
+            table.append(copy(row))
+    return str(soup)
+
+
+def scale_entsoe_xml(xml: str, copies: int) -> str:
+    """Repeat the time series of the ENTSO-E document, every copy shifted after the period of the previous one"""
+    first = xml.index("<TimeSeries>")
+    last = xml.rindex("</TimeSeries>") + len("</TimeSeries>")
+    timestamps = [datetime.fromisoformat(text.replace("Z", "+00:00")) for text in ENTSOE_TIMESTAMP.findall(xml)]
+    span = max(timestamps) - min(timestamps)
+
+    def shift(copy_index: int) -> Callable[[re.Match], str]:
+        def replace(match: re.Match) -> str:
+            timestamp = datetime.fromisoformat(match.group(0).replace("Z", "+00:00")) + span * copy_index
+            return timestamp.strftime("%Y-%m-%dT%H:%MZ")
+
+        return replace
+
+    timeseries = xml[first:last]
+    shifted = "\n".join(ENTSOE_TIMESTAMP.sub(shift(copy_index), timeseries) for copy_index in range(copies))
+    return xml[:first] + shifted + xml[last:]
+
+
+def scale_workbook(content: bytes, scale: int) -> bytes:
+    """Repeat the rows of the Fluvius workbook below the original rows, the parsed cells are kept in place"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(BytesIO(content))
+    ws = wb.active
+    rows = [[cell.value for cell in row] for row in ws.iter_rows()]
+    for _ in range(scale - 1):
+        for row in rows:
+            ws.append(row)
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def measure_parser(name: str, parse: Callable[[], list], repeat: int) -> Measurement:
+    """Measure the throughput and the peak memory of a parser, the items are the parsed values"""
+    items = len(parse())
+    return measure(name, parse, items, repeat=repeat, memory=True)
+
+
+def engie_measurements(scale: int, repeat: int) -> list[Measurement]:
+    """Measure the Engie HTML parser"""
+    from feeders.engie import EngieIndexingSetting
+
+    measurements = []
+    for file_name in ("engie_gas.html", "engie_energy.html"):
+        html_text = read_text(file_name)
+        for label, document in ((file_name, html_text), (f"{file_name} x{scale}", scale_engie_html(html_text, scale))):
+            try:
+                measurements.append(measure_parser(f"engie {label}", lambda document=document: list(EngieIndexingSetting.iter_html(document)), repeat))
+            except (locale.Error, ValueError) as error:
+                # The Dutch month names can only be parsed when the nl_BE locale is installed
+                logger.warning("Skipping engie %s: %s", label, error)
+    return measurements
+
+
+def eex_measurements(scale: int, repeat: int) -> list[Measurement]:
+    """Measure the EEX JSON parser"""
+    from feeders.eex import EEXIndexingSetting
+
+    tz = timezone("Europe/Brussels")
+    start, end = datetime(2000, 1, 1).date(), datetime(2100, 1, 1).date()
+    measurements = []
+    for file_name, index in (("eex_ztp_gtnd.json", "#E.ZTP_GTND"), ("eex_ztp_gtwe.json", "#E.ZTP_GTWE")):
+        items = json.loads(read_text(file_name))["results"]["items"]
+        for label, document in ((file_name, items), (f"{file_name} x{scale}", items * scale)):
+            measurements.append(
+                measure_parser(f"eex {label}", lambda document=document: list(EEXIndexingSetting.parse_items(index, document, start, end, tz)), repeat)
+            )
+    return measurements
+
+
+def entsoe_measurements(years: int, repeat: int) -> list[Measurement]:
+    """Measure the ENTSO-E XML parser"""
+    from feeders.entsoe import EntsoeIndexingSetting
+
+    xml = read_text("entsoe_be.xml")
+    start, end = utc.localize(datetime(2000, 1, 1)), utc.localize(datetime(2100, 1, 1))
+    measurements = []
+    for label, document in (("entsoe_be.xml", xml), (f"entsoe_be.xml {years} years", scale_entsoe_xml(xml, years * 12))):
+        measurements.append(
+            measure_parser(f"entsoe {label} time series", lambda document=document: list(EntsoeIndexingSetting.iterate_timeseries(document)), repeat)
+        )
+        measurements.append(
+            measure_parser(f"entsoe {label}", lambda document=document: list(EntsoeIndexingSetting.parse_xml("BE", document, start, end)), repeat)
+        )
+    return measurements
+
+
+def fluvius_measurements(scale: int, repeat: int) -> list[Measurement]:
+    """Measure the Fluvius page and workbook parsers"""
+    from bs4 import BeautifulSoup
+    from feeders.fluvius import FluviusParser, iterate_subsection
+
+    def parse_page(html_text: str) -> list:
+        article = BeautifulSoup(html_text, "html.parser").find("article", class_="node--page")
+        return list(iterate_subsection(article))
+
+    html_text = read_text("fluvius_grid_costs.html")
+    content = read_bytes("fluvius_elec_drawdown_2023.xlsx")
+    return [
+        measure_parser("fluvius fluvius_grid_costs.html", lambda: parse_page(html_text), repeat),
+        measure_parser("fluvius fluvius_elec_drawdown_2023.xlsx", lambda: [FluviusParser.from_workbook("Fluvius", content)], repeat),
+        measure_parser(
+            f"fluvius fluvius_elec_drawdown_2023.xlsx x{scale}",
+            lambda scaled=scale_workbook(content, scale): [FluviusParser.from_workbook("Fluvius", scaled)],
+            repeat,
+        ),
+    ]
+
+
+def run(scale: int = 10, years: int = 3, repeat: int = 5) -> list[Measurement]:
+    """Measure the parsers over the captured documents and over the documents scaled up"""
+    return [
+        *engie_measurements(scale, repeat),
+        *eex_measurements(scale, repeat),
+        *entsoe_measurements(years, repeat),
+        *fluvius_measurements(scale, repeat),
+    ]
@@ -0,0 +1,59 @@
+"""Data access object for the checkpoints of long running (backfill) jobs"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+
+from pytz import utc
+
+from dao.dynamodb import DaoDynamoDB
+from dao.storage import KeyCondition
+
+
+@dataclass
+class BackfillCheckpoint(DaoDynamoDB):
+    """Class that represents until when a backfill job has completed, so a later invocation can resume from there"""
+
+    job: str  # The identification of the job, e.g. the source and the requested range
+    completed_until: datetime  # Everything before this moment has been stored
+
+    def __post_init__(self):
+        """Post initialization"""
+        assert self.completed_until.tzinfo is not None
+
+    def _to_ddb_json(self):
+        """Convert the current object to a JSON for storing in dynamodb"""
+        primary, secondary = BackfillCheckpoint._ddb_hash(self.job)
+        return {
+            "job": self.job,
+            "completed_until": self.completed_until.astimezone(utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "primary": primary,
+            "secondary": secondary,
+            "last_updated": datetime.now(utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    @staticmethod
+    def _ddb_hash(job: str) -> tuple[str, int]:
+        """Get a hash for dynamodb"""
+        secondary_int = int(hashlib.sha1(job.encode(encoding="utf-8")).hexdigest()[-16:], 16)
+        return ("backfillcheckpoint", secondary_int)
+
+    @classmethod
+    def _from_ddb_json(cls, data):
+        """Parse the JSON from dynamodb and create the object"""
+        return cls(
+            job=data.get("job"),
+            completed_until=datetime.strptime(data.get("completed_until"), "%Y-%m-%d %H:%M:%S").replace(tzinfo=utc),
+        )
+
+    @staticmethod
+    def load(db_table, job: str) -> BackfillCheckpoint:
+        """Retrieve the checkpoint of the job, None when the job did not start yet"""
+        primary, secondary = BackfillCheckpoint._ddb_hash(job)
+        return BackfillCheckpoint.load_key(db_table=db_table, primary=primary, secondary=secondary)
+
+    @staticmethod
+    def last_updated(db_table) -> datetime:
+        """Get when any backfill job last stored its progress, None when no job ever ran"""
+        updates = [item["last_updated"] for item in DaoDynamoDB.query_condition(db_table, KeyCondition("backfillcheckpoint")) if "last_updated" in item]
+        return datetime.strptime(max(updates), "%Y-%m-%d %H:%M:%S").replace(tzinfo=utc) if len(updates) > 0 else None
@@ -1,19 +1,38 @@
 """Data access object for indexing settings"""
 from __future__ import annotations
+from datetime import datetime
+from typing import Iterable
+
+from dao.storage import KeyCondition, as_backend
+
+
+def format_timestamp(date_time: datetime) -> str:
+    """Format a UTC datetime as `%Y-%m-%d %H:%M:%S`, isoformat does the same several times faster than strftime"""
+    return date_time.replace(tzinfo=None).isoformat(" ", "seconds")
 
 
 class DaoDynamoDB:
-    """Class that implements loading from and saving to dynamodb"""
+    """Class that implements loading from and saving to dynamodb, or any other storage backend with the same key semantics"""
+
+    __slots__ = ()  # The models declare their fields as slots, as they are created for every stored item
 
     def save(self, db_table):
         """Save the object to the dynamodb database"""
-        db_table.put_item(Item=self._to_ddb_json())
+        as_backend(db_table).put_item(self._to_ddb_json())
 
     @staticmethod
-    def save_list(db_table, objects: list[DaoDynamoDB]):
-        with db_table.batch_writer() as batch:
+    def save_list(db_table, objects: Iterable[DaoDynamoDB]) -> int:
+        """Save the objects while they are produced (any iterable), returns the number of saved objects"""
+        count = 0
+
+        def items():
+            nonlocal count
             for object in objects:
-                batch.put_item(Item=object._to_ddb_json())
+                count += 1
+                yield object._to_ddb_json()
+
+        as_backend(db_table).put_items(items())
+        return count
 
     def _to_ddb_json(self):
         """Convert the current object to a JSON for storing in dynamodb"""
@@ -32,19 +51,15 @@ class DaoDynamoDB:
         secondary: int,
     ):
         """Retrieve a single object from the database"""
-        response = db_table.get_item(Key={"primary": primary, "secondary": secondary})
+        item = as_backend(db_table).get_item(primary=primary, secondary=secondary)
 
-        if "Item" in response:
-            return cls._from_ddb_json(response["Item"])
+        if item is not None:
+            return cls._from_ddb_json(item)
 
     @staticmethod
     def query_condition(
         db_table,
-        condition,
+        condition: KeyCondition,
     ) -> list[dict]:
         """Query all objects in the database"""
-        response = db_table.query(
-            Select="ALL_ATTRIBUTES",
-            KeyConditionExpression=condition,
-        )
-        return response.get("Items", [])
+        return as_backend(db_table).query(condition)
@@ -1,46 +1,61 @@
-"""Data access object for grid costs"""
+"""Data access object for energy excises"""
 from __future__ import annotations
-from dataclasses import dataclass, asdict
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
 from typing import Tuple
 import hashlib
 
 from dao.dynamodb import DaoDynamoDB
 
 
-def divide_chunks(graduated: dict[int, float]):
-    """Divide the list of keys in intervals"""
-    keys = sorted(list(graduated.keys())) + [-1]
-    for i in range(0, len(keys) - 1):
-        yield (keys[i], keys[i + 1], graduated[keys[i]])
-
-
-def calculate_graduation(graduated: dict[int, float], energy_usage: float):
-    """Calculate the value given the graduaded values"""
-    return sum([max((min(energy_usage, end) if end != -1 else energy_usage) - start, 0) * value for start, end, value in divide_chunks(graduated)])
-
-
 @dataclass
 class EnergyExcise(DaoDynamoDB):
     """Class that represents the tax levied on energy consumption"""
 
+    __slots__ = ("country", "_graduated_excise", "energy_contribution", "_boundaries", "_rates", "_cumulative")
+
     country: str
 
-    graduated_excise: dict[int, float]
+    graduated_excise: dict[int, float]  # Assign another dict to change it, the brackets are compiled on assignment
     energy_contribution: float
 
+    def _get_graduated_excise(self) -> dict[int, float]:
+        return self._graduated_excise
+
+    def _set_graduated_excise(self, graduated_excise: dict[int, float]):
+        """Set the graduated excise and compile its brackets"""
+        self._graduated_excise = graduated_excise
+        self.compile()
+
+    def compile(self):
+        """Compile the graduated excise into sorted bracket boundaries, rates and the cumulative excise at every boundary"""
+        self._boundaries = sorted(self.graduated_excise.keys())
+        self._rates = [self.graduated_excise[boundary] for boundary in self._boundaries]
+        widths = [end - start for start, end in zip(self._boundaries, self._boundaries[1:])]
+        self._cumulative = list(accumulate((width * rate for width, rate in zip(widths, self._rates)), initial=0))
+
+    def graduation(self, energy_usage: float) -> float:
+        """Calculate the graduated excise through a binary search on the compiled brackets"""
+        bracket = bisect_right(self._boundaries, energy_usage) - 1
+        if bracket < 0:
+            return 0
+        return self._cumulative[bracket] + (energy_usage - self._boundaries[bracket]) * self._rates[bracket]
+
     def _to_ddb_json(self):
         """Convert the current object to a JSON for storing in dynamodb"""
-
         primary, secondary = EnergyExcise._ddb_hash(self.country)
         return {
-            **asdict(self),
+            "country": self.country,
+            "graduated_excise": {str(key): str(value) for key, value in self.graduated_excise.items()},
+            "energy_contribution": str(self.energy_contribution),
             "primary": primary,
             "secondary": secondary,
-            "energy_contribution": str(self.energy_contribution),
-            "graduated_excise": {str(key): str(value) for key, value in self.graduated_excise.items()},
         }
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _ddb_hash(country: str) -> Tuple[str, int]:
         """Get a hash for dynamodb"""
         primary = f"excise#{country}"
@@ -51,9 +66,9 @@ class EnergyExcise(DaoDynamoDB):
     def _from_ddb_json(cls, data):
         """Parse the JSON from dynamodb and create the object"""
         return cls(
-            country=data.get("country"),
+            country=data["country"],
             graduated_excise={int(key): float(value) for key, value in data.get("graduated_excise", {}).items()},
-            energy_contribution=float(data.get("energy_contribution")),
+            energy_contribution=float(data["energy_contribution"]),
         )
 
     @classmethod
@@ -64,7 +79,12 @@ class EnergyExcise(DaoDynamoDB):
 
     def calculate(self, total_energy_usage: float) -> float:
         """Calculate the excise given the total energy usage"""
-        excise = calculate_graduation(self.graduated_excise, total_energy_usage)
+        excise = self.graduation(total_energy_usage)
         contribution = total_energy_usage * self.energy_contribution
 
         return round(excise + contribution, 3)
+
+
+# A property, so the dataclass __init__ and every later assignment compile the brackets. Set after the class is created, as
+# the dataclass would take a property in the class body for the default of the field.
+EnergyExcise.graduated_excise = property(EnergyExcise._get_graduated_excise, EnergyExcise._set_graduated_excise)
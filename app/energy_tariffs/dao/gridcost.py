@@ -1,11 +1,13 @@
 """Data access object for grid costs"""
 from __future__ import annotations
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Tuple
+from functools import lru_cache
+from typing import Iterable, Tuple
 import hashlib
 
 from dao.dynamodb import DaoDynamoDB
+from dao.storage import KeyCondition, as_backend
 
 
 class EnergyDirection(Enum):
@@ -15,10 +17,29 @@ class EnergyDirection(Enum):
     INJECTION = auto()
 
 
+DIRECTIONS = dict(EnergyDirection.__members__)
+PRICE_FIELDS = (
+    "peak_usage_avg_monthly_cost",
+    "peak_usage_kwh",
+    "data_management_standard",
+    "data_management_dynamic",
+    "public_services_kwh",
+    "surcharges_kwh",
+    "transmission_charges_kwh",
+)
+
+
+def _price_str(value):
+    """Store a float price as a string, as DynamoDB does not accept floats"""
+    return str(value) if isinstance(value, float) else value
+
+
 @dataclass
 class EnergyGridCost(DaoDynamoDB):
     """Class that represents a grid cost configuration"""
 
+    __slots__ = ("country", "grid_provider", "direction", *PRICE_FIELDS)
+
     country: str
     grid_provider: str
     direction: EnergyDirection
@@ -33,45 +54,83 @@ class EnergyGridCost(DaoDynamoDB):
     surcharges_kwh: float  # price per kWh for surcharges
     transmission_charges_kwh: float  # price per kWh for transmissions
 
-    def _to_ddb_json(self):
-        """Convert the current object to a JSON for storing in dynamodb"""
+    def save(self, db_table):
+        """Save the object, and its copy in the partition of the country, to the dynamodb database"""
+        super().save(db_table)
+        as_backend(db_table).put_item(self._to_ddb_json_country())
 
-        def _convert_value(value):
-            if isinstance(value, float):
-                return str(value)
-            if isinstance(value, EnergyDirection):
-                return value.name
-            return value
+    @staticmethod
+    def save_list(db_table, objects: Iterable[EnergyGridCost]) -> int:
+        """Save the objects while they are produced, and their copies in the partition of the country, returns the number of saved objects"""
+        count = 0
+
+        def items():
+            nonlocal count
+            for object in objects:
+                count += 1
+                data = object._to_ddb_json()
+                yield data
+                yield object._to_ddb_json_country(data)
+
+        as_backend(db_table).put_items(items())
+        return count
 
-        data = {key: _convert_value(value) for key, value in asdict(self).items()}
+    def _to_ddb_json(self):
+        """Convert the current object to a JSON for storing in dynamodb"""
         primary, secondary = EnergyGridCost._ddb_hash(self.country, self.grid_provider)
         return {
-            **data,
+            "country": self.country,
+            "grid_provider": self.grid_provider,
+            "direction": self.direction.name,
+            "peak_usage_avg_monthly_cost": _price_str(self.peak_usage_avg_monthly_cost),
+            "peak_usage_kwh": _price_str(self.peak_usage_kwh),
+            "data_management_standard": _price_str(self.data_management_standard),
+            "data_management_dynamic": _price_str(self.data_management_dynamic),
+            "public_services_kwh": _price_str(self.public_services_kwh),
+            "surcharges_kwh": _price_str(self.surcharges_kwh),
+            "transmission_charges_kwh": _price_str(self.transmission_charges_kwh),
+            "primary": primary,
+            "secondary": secondary,
+        }
+
+    def _to_ddb_json_country(self, data: dict = None):
+        """Convert the current object to a JSON for storing in the partition that holds the grid costs of all providers of the country"""
+        # The JSON of the object is reused when it was already converted, e.g. when saving both copies
+        primary, secondary = EnergyGridCost._ddb_country_hash(self.country, self.grid_provider)
+        return {
+            **(data if data is not None else self._to_ddb_json()),
             "primary": primary,
             "secondary": secondary,
         }
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _ddb_hash(country: str, provider: str) -> Tuple[str, int]:
         """Get a hash for dynamodb"""
         primary = f"energygridcost#{country}#{provider}"
         secondary_int = int(hashlib.sha1(primary.encode(encoding="utf-8")).hexdigest()[-16:], 16)
         return (primary, secondary_int)
 
+    @staticmethod
+    def _ddb_country_hash(country: str, provider: str) -> Tuple[str, int]:
+        """Get a hash for dynamodb in the partition of the country"""
+        _, secondary_int = EnergyGridCost._ddb_hash(country, provider)
+        return (f"energygridcosts#{country}", secondary_int)
+
     @classmethod
     def _from_ddb_json(cls, data):
         """Parse the JSON from dynamodb and create the object"""
         return cls(
-            country=data.get("country"),
-            grid_provider=data.get("grid_provider"),
-            direction=EnergyDirection[data.get("direction")],
-            peak_usage_avg_monthly_cost=float(data.get("peak_usage_avg_monthly_cost")),
-            peak_usage_kwh=float(data.get("peak_usage_kwh")),
-            data_management_standard=float(data.get("data_management_standard")),
-            data_management_dynamic=float(data.get("data_management_dynamic")),
-            public_services_kwh=float(data.get("public_services_kwh")),
-            surcharges_kwh=float(data.get("surcharges_kwh")),
-            transmission_charges_kwh=float(data.get("transmission_charges_kwh")),
+            country=data["country"],
+            grid_provider=data["grid_provider"],
+            direction=DIRECTIONS[data["direction"]],
+            peak_usage_avg_monthly_cost=float(data["peak_usage_avg_monthly_cost"]),
+            peak_usage_kwh=float(data["peak_usage_kwh"]),
+            data_management_standard=float(data["data_management_standard"]),
+            data_management_dynamic=float(data["data_management_dynamic"]),
+            public_services_kwh=float(data["public_services_kwh"]),
+            surcharges_kwh=float(data["surcharges_kwh"]),
+            transmission_charges_kwh=float(data["transmission_charges_kwh"]),
         )
 
     @classmethod
@@ -80,13 +139,41 @@ class EnergyGridCost(DaoDynamoDB):
         primary, secondary = EnergyGridCost._ddb_hash(country, provider)
         return EnergyGridCost.load_key(db_table=db_table, primary=primary, secondary=secondary)
 
+    @staticmethod
+    def query_country(db_table, country: str) -> list[EnergyGridCost]:
+        """Load the grid costs of all providers of the country with a single query"""
+        key_condition = KeyCondition(primary=f"energygridcosts#{country}")
+        return [EnergyGridCost._from_ddb_json(object) for object in DaoDynamoDB.query_condition(db_table=db_table, condition=key_condition)]
+
+    @staticmethod
+    def replace_country(db_table, country: str, providers: set[str]) -> list[EnergyGridCost]:
+        """
+        Make the partition of the country hold the grid costs of exactly the given providers
+
+        The grid costs of the providers that are no longer published are deleted from the partition. Returns the stored
+        grid costs of the providers that are missing from the partition, to be saved again.
+        """
+        backend = as_backend(db_table)
+        stored = {item["grid_provider"]: item for item in backend.query(KeyCondition(primary=f"energygridcosts#{country}"))}
+        for provider in sorted(stored.keys() - providers):
+            backend.delete_item(*EnergyGridCost._ddb_country_hash(country, provider))
+        missing = [EnergyGridCost.load(backend, country, provider) for provider in sorted(providers - stored.keys())]
+        return [grid_cost for grid_cost in missing if grid_cost is not None]
+
     def calculate(self, peak_power_usage: float, total_energy_usage: float, dynamic_data_management: bool) -> float:
         """Calculate the yearly price given the average monthly peak power usage and total energy usage"""
-        if self.country == "BE" and self.direction == EnergyDirection.DRAWDOWN:
-            energy_cost = total_energy_usage * (self.peak_usage_kwh + self.public_services_kwh + self.surcharges_kwh + self.transmission_charges_kwh)
-            power_cost = peak_power_usage * self.peak_usage_avg_monthly_cost
-            data_management_cost = self.data_management_dynamic if dynamic_data_management else self.data_management_standard
+        return self.calculate_many([peak_power_usage], [total_energy_usage], [dynamic_data_management])[0]
 
-            return round(energy_cost + power_cost + data_management_cost, 3)
+    def calculate_many(self, peak_power_usages: list[float], total_energy_usages: list[float], dynamic_data_managements: list[bool]) -> list[float]:
+        """Calculate the yearly prices for many consumption profiles at once, the rates are only combined once"""
+        if self.country == "BE" and self.direction == EnergyDirection.DRAWDOWN:
+            energy_rate = self.peak_usage_kwh + self.public_services_kwh + self.surcharges_kwh + self.transmission_charges_kwh
+            power_rate = self.peak_usage_avg_monthly_cost
+            dynamic_cost, standard_cost = self.data_management_dynamic, self.data_management_standard
+
+            return [
+                round(energy * energy_rate + power * power_rate + (dynamic_cost if dynamic else standard_cost), 3)
+                for power, energy, dynamic in zip(peak_power_usages, total_energy_usages, dynamic_data_managements)
+            ]
 
         raise NotImplementedError(f"Grid costs not implemented for this country and direction: {self.country} {self.direction.name}")
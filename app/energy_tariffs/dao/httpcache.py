@@ -0,0 +1,58 @@
+"""Data access object for the validators of the documents that were fetched by the feeders"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+
+from pytz import utc
+
+from dao.dynamodb import DaoDynamoDB
+
+
+@dataclass
+class HttpCacheEntry(DaoDynamoDB):
+    """Class that represents the last processed version of a document, so the next run only processes a changed document"""
+
+    url: str
+    content_hash: str  # The SHA-256 of the content
+    etag: str = None
+    last_modified: str = None
+    data: str = None  # A small value derived from the content, e.g. the link on a page
+
+    def _to_ddb_json(self):
+        """Convert the current object to a JSON for storing in dynamodb"""
+        primary, secondary = HttpCacheEntry._ddb_hash(self.url)
+        data = {
+            "url": self.url,
+            "content_hash": self.content_hash,
+            "primary": primary,
+            "secondary": secondary,
+            "last_updated": datetime.now(utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        for key in ("etag", "last_modified", "data"):
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        return data
+
+    @staticmethod
+    def _ddb_hash(url: str) -> tuple[str, int]:
+        """Get a hash for dynamodb"""
+        secondary_int = int(hashlib.sha1(url.encode(encoding="utf-8")).hexdigest()[-16:], 16)
+        return ("httpcache", secondary_int)
+
+    @classmethod
+    def _from_ddb_json(cls, data):
+        """Parse the JSON from dynamodb and create the object"""
+        return cls(
+            url=data.get("url"),
+            content_hash=data.get("content_hash"),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            data=data.get("data"),
+        )
+
+    @staticmethod
+    def load(db_table, url: str) -> HttpCacheEntry:
+        """Retrieve the entry of the URL, None when the document was not processed yet"""
+        primary, secondary = HttpCacheEntry._ddb_hash(url)
+        return HttpCacheEntry.load_key(db_table=db_table, primary=primary, secondary=secondary)
@@ -1,15 +1,16 @@
 """Data access object for indexing settings"""
 from __future__ import annotations
 from enum import Enum, auto
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Iterable
 import hashlib
 import json
 
 from pytz import utc
-from boto3.dynamodb.conditions import Key
 
-from dao.dynamodb import DaoDynamoDB
+from dao.dynamodb import DaoDynamoDB, format_timestamp
+from dao.storage import KeyCondition
 
 
 class IndexingSettingOrigin(Enum):
@@ -27,10 +28,17 @@ class IndexingSettingTimeframe(Enum):
     MONTHLY = auto()
 
 
+# Plain dicts for decoding the enum names, which is cheaper than the lookup through the Enum metaclass
+ORIGINS = dict(IndexingSettingOrigin.__members__)
+TIMEFRAMES = dict(IndexingSettingTimeframe.__members__)
+
+
 @dataclass
 class IndexingSetting(DaoDynamoDB):
     """Class that represents an indexing setting"""
 
+    __slots__ = ("name", "value", "timeframe", "date", "source", "origin")
+
     name: str  # The name of the index
     value: float  # The actual value of the index setting
     timeframe: IndexingSettingTimeframe  # The timeframe that is represented by the value: hourly/daily/monthly
@@ -48,35 +56,44 @@ class IndexingSetting(DaoDynamoDB):
         self.doc().save(db_table)
 
     @staticmethod
-    def save_list(db_table, objects: list[IndexingSetting]):
-        docs = {obj.doc() for obj in objects}
-        DaoDynamoDB.save_list(db_table=db_table, objects=objects + list(docs))
+    def save_list(db_table, objects: Iterable[IndexingSetting]) -> int:
+        """Save the objects while they are produced, followed by their documentation, returns the number of saved indexing settings"""
+        docs = set()
+
+        def with_docs():
+            for obj in objects:
+                docs.add(obj.doc())
+                yield obj
+            yield from docs
+
+        return DaoDynamoDB.save_list(db_table=db_table, objects=with_docs()) - len(docs)
 
     def _to_ddb_json(self):
         """Convert the current object to a JSON for storing in dynamodb"""
-        date_time_str = self.date.astimezone(utc).strftime("%Y-%m-%d %H:%M:%S")
-        secondary = int(self.date.astimezone(utc).timestamp())
+        date_time = self.date.astimezone(utc)
+        timeframe, origin = self.timeframe.name, self.origin.name
         return {
-            **asdict(self),
-            "primary": f"{self.source}#{self.origin.name}#{self.timeframe.name}#{self.name}",
-            "secondary": secondary,
-            "date": date_time_str,
-            "timeframe": self.timeframe.name,
-            "origin": self.origin.name,
+            "name": self.name,
             "value": str(self.value),
-            "last_updated": datetime.now(utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "timeframe": timeframe,
+            "date": format_timestamp(date_time),
+            "source": self.source,
+            "origin": origin,
+            "primary": f"{self.source}#{origin}#{timeframe}#{self.name}",
+            "secondary": int(date_time.timestamp()),
+            "last_updated": format_timestamp(datetime.now(utc)),
         }
 
     @classmethod
     def _from_ddb_json(cls, data):
-        """Parse the JSON from dynamodb and create the object"""
+        """Parse the JSON from dynamodb and create the object, the date is the epoch of the secondary key"""
         return cls(
-            name=data.get("name"),
-            value=float(data.get("value")),
-            timeframe=IndexingSettingTimeframe[data.get("timeframe")],
-            date=datetime.strptime(data.get("date"), "%Y-%m-%d %H:%M:%S").replace(tzinfo=utc),
-            source=data.get("source"),
-            origin=IndexingSettingOrigin[data.get("origin")],
+            name=data["name"],
+            value=float(data["value"]),
+            timeframe=TIMEFRAMES[data["timeframe"]],
+            date=datetime.fromtimestamp(int(data["secondary"]), utc),
+            source=data["source"],
+            origin=ORIGINS[data["origin"]],
         )
 
     @classmethod
@@ -104,17 +121,27 @@ class IndexingSetting(DaoDynamoDB):
         start: datetime = None,
         end: datetime = None,
     ) -> list[IndexingSetting]:
-        """Query all objects in the database from the same campaign"""
-        key_condition = Key("primary").eq(f"{source}#{origin.name}#{timeframe.name}#{name}")
-        if start is not None and end is None:
-            key_condition = key_condition & Key("secondary").gte(int(start.astimezone(utc).timestamp()))
-        if end is not None and start is None:
-            key_condition = key_condition & Key("secondary").lt(int(end.astimezone(utc).timestamp()))
-        if start is not None and end is not None:
-            key_condition = key_condition & Key("secondary").between(int(start.astimezone(utc).timestamp()), int(end.astimezone(utc).timestamp()))
-
+        """Query all objects in the database from the same campaign, see IndexingSettingSeries.query for long series"""
+        key_condition = IndexingSetting.key_condition(source=source, name=name, origin=origin, timeframe=timeframe, start=start, end=end)
         return [IndexingSetting._from_ddb_json(object) for object in DaoDynamoDB.query_condition(db_table=db_table, condition=key_condition)]
 
+    @staticmethod
+    def key_condition(
+        source: str,
+        name: str,
+        origin: IndexingSettingOrigin,
+        timeframe: IndexingSettingTimeframe,
+        start: datetime = None,
+        end: datetime = None,
+    ) -> KeyCondition:
+        """Get the key condition of a query on a single index"""
+        return KeyCondition(
+            primary=f"{source}#{origin.name}#{timeframe.name}#{name}",
+            lower=int(start.astimezone(utc).timestamp()) if start is not None else None,
+            upper=int(end.astimezone(utc).timestamp()) if end is not None else None,
+            upper_inclusive=start is not None,  # Only end is exclusive, while start and end is an inclusive range
+        )
+
     def doc(self) -> IndexingSettingDocumentation:
         """Generate the documentation"""
         return IndexingSettingDocumentation(name=self.name, timeframe=self.timeframe, source=self.source, origin=self.origin)
@@ -124,6 +151,8 @@ class IndexingSetting(DaoDynamoDB):
 class IndexingSettingDocumentation(DaoDynamoDB):
     """A class representing documentation about the indexing setting in the database"""
 
+    __slots__ = ("name", "timeframe", "source", "origin")
+
     name: str
     timeframe: IndexingSettingTimeframe
     source: str
@@ -132,21 +161,19 @@ class IndexingSettingDocumentation(DaoDynamoDB):
     def _to_ddb_json(self):
         """Convert the current object to a JSON for storing in dynamodb"""
         return {
-            **asdict(self),
-            "timeframe": self.timeframe.name,
-            "origin": self.origin.name,
+            **self._fields(),
             "primary": "indexingsettingdoc",
             "secondary": self._ddb_hash(),
-            "last_updated": datetime.now(utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "last_updated": format_timestamp(datetime.now(utc)),
         }
 
+    def _fields(self) -> dict:
+        """Get the fields with the names of the enums"""
+        return {"name": self.name, "timeframe": self.timeframe.name, "source": self.source, "origin": self.origin.name}
+
     def _ddb_hash(self):
         """Get a hash for dynamodb"""
-        data = {
-            **asdict(self),
-            "timeframe": self.timeframe.name,
-            "origin": self.origin.name,
-        }
+        data = self._fields()
         secondary_int = int(hashlib.sha1(json.dumps(data, sort_keys=True).encode("UTF-8")).hexdigest()[-16:], 16)
         return secondary_int
 
@@ -154,10 +181,10 @@ class IndexingSettingDocumentation(DaoDynamoDB):
     def _from_ddb_json(cls, data):
         """Parse the JSON from dynamodb and create the object"""
         return cls(
-            name=data.get("name"),
-            timeframe=IndexingSettingTimeframe[data.get("timeframe")],
-            source=data.get("source"),
-            origin=IndexingSettingOrigin[data.get("origin")],
+            name=data["name"],
+            timeframe=TIMEFRAMES[data["timeframe"]],
+            source=data["source"],
+            origin=ORIGINS[data["origin"]],
         )
 
     @staticmethod
@@ -165,5 +192,5 @@ class IndexingSettingDocumentation(DaoDynamoDB):
         db_table,
     ) -> list[IndexingSettingDocumentation]:
         """Query all objects in the database from the same campaign"""
-        key_condition = Key("primary").eq("indexingsettingdoc")
+        key_condition = KeyCondition(primary="indexingsettingdoc")
         return [IndexingSettingDocumentation._from_ddb_json(object) for object in DaoDynamoDB.query_condition(db_table=db_table, condition=key_condition)]
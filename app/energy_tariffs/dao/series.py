@@ -0,0 +1,142 @@
+"""
+Columnar series of indexing settings
+
+A range query of hourly values returns thousands of items, that share the same name, source, timeframe and origin. The
+series holds that metadata once with two parallel arrays of UTC epochs and values, so aggregating a month or a year
+of values does not create a dataclass with a datetime and enums for every point. The indexing settings are only
+created on demand, e.g. when iterating over the series.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from itertools import groupby
+from math import fsum
+from typing import Iterator
+
+from pytz import utc
+
+from dao.dynamodb import DaoDynamoDB
+from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+
+
+def epoch(date_time: datetime) -> int:
+    """Get the UTC epoch in seconds, i.e. the secondary key, of a tz-aware datetime"""
+    return int(date_time.astimezone(utc).timestamp())
+
+
+@dataclass
+class IndexingSettingSeries:
+    """Series of the values of a single index, sorted on date"""
+
+    name: str
+    source: str
+    timeframe: IndexingSettingTimeframe
+    origin: IndexingSettingOrigin
+    epochs: array = field(default_factory=lambda: array("q"))  # The UTC epochs in seconds of the values
+    values: array = field(default_factory=lambda: array("d"))
+
+    @classmethod
+    def from_items(cls, name: str, source: str, timeframe: IndexingSettingTimeframe, origin: IndexingSettingOrigin, items: list[dict]) -> IndexingSettingSeries:
+        """Create the series from the items of a query, only the secondary key and the value are decoded"""
+        return cls(
+            name=name,
+            source=source,
+            timeframe=timeframe,
+            origin=origin,
+            epochs=array("q", [int(item["secondary"]) for item in items]),
+            values=array("d", [float(item["value"]) for item in items]),
+        )
+
+    @classmethod
+    def from_indexing_settings(cls, indexing_settings: list[IndexingSetting]) -> IndexingSettingSeries:
+        """Create the series from indexing settings of the same index sorted on date, raises a ValueError when there are none"""
+        if len(indexing_settings) == 0:
+            raise ValueError("No indexing settings to create the series from")
+        first = indexing_settings[0]
+        return cls(
+            name=first.name,
+            source=first.source,
+            timeframe=first.timeframe,
+            origin=first.origin,
+            epochs=array("q", [epoch(indexing_setting.date) for indexing_setting in indexing_settings]),
+            values=array("d", [indexing_setting.value for indexing_setting in indexing_settings]),
+        )
+
+    @classmethod
+    def query(
+        cls,
+        db_table,
+        source: str,
+        name: str,
+        origin: IndexingSettingOrigin = IndexingSettingOrigin.ORIGINAL,
+        timeframe: IndexingSettingTimeframe = IndexingSettingTimeframe.MONTHLY,
+        start: datetime = None,
+        end: datetime = None,
+    ) -> IndexingSettingSeries:
+        """Query the series with the same range semantics as IndexingSetting.query"""
+        key_condition = IndexingSetting.key_condition(source=source, name=name, origin=origin, timeframe=timeframe, start=start, end=end)
+        return cls.from_items(name, source, timeframe, origin, DaoDynamoDB.query_condition(db_table=db_table, condition=key_condition))
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def __iter__(self) -> Iterator[IndexingSetting]:
+        return (self.indexing_setting(seconds, value) for seconds, value in zip(self.epochs, self.values))
+
+    def __getitem__(self, key):
+        """Get the indexing setting at a position, or the series of a slice of positions"""
+        if isinstance(key, slice):
+            return replace(self, epochs=self.epochs[key], values=self.values[key])
+        return self.indexing_setting(self.epochs[key], self.values[key])
+
+    def indexing_setting(self, seconds: int, value: float) -> IndexingSetting:
+        """Create the indexing setting of a single point"""
+        return IndexingSetting(self.name, value, self.timeframe, datetime.fromtimestamp(seconds, utc), self.source, self.origin)
+
+    @property
+    def dates(self) -> list[datetime]:
+        """Get the (UTC) dates of the values"""
+        return [datetime.fromtimestamp(seconds, utc) for seconds in self.epochs]
+
+    def items(self) -> Iterator[tuple[datetime, float]]:
+        """Iterate over the (UTC) dates and the values"""
+        return zip(self.dates, self.values)
+
+    def between(self, start: datetime, end: datetime) -> IndexingSettingSeries:
+        """Get the values from start until end (inclusive) through a binary search on the epochs"""
+        first, last = bisect_left(self.epochs, epoch(start)), bisect_right(self.epochs, epoch(end))
+        return self[first:last]
+
+    def mean(self) -> float:
+        """Get the arithmetic mean of the values, raises a ValueError for an empty series"""
+        if len(self.values) == 0:
+            raise ValueError("Mean of an empty series")
+        return fsum(self.values) / len(self.values)
+
+    def min(self) -> float:
+        """Get the lowest value, raises a ValueError for an empty series"""
+        return min(self.values)
+
+    def max(self) -> float:
+        """Get the highest value, raises a ValueError for an empty series"""
+        return max(self.values)
+
+    def resample(self, timeframe: IndexingSettingTimeframe, tz=utc) -> IndexingSettingSeries:
+        """Get the derived series of the means per hour, day or month (in the timezone) of the values"""
+
+        def period_start(seconds: int) -> int:
+            local = datetime.fromtimestamp(seconds, tz)
+            if timeframe == IndexingSettingTimeframe.HOURLY:
+                return seconds - local.minute * 60 - local.second
+            if timeframe == IndexingSettingTimeframe.DAILY:
+                return int(tz.localize(datetime(local.year, local.month, local.day)).timestamp())
+            return int(tz.localize(datetime(local.year, local.month, 1)).timestamp())
+
+        epochs, values = array("q"), array("d")
+        for start, points in groupby(zip(self.epochs, self.values), key=lambda point: period_start(point[0])):
+            period_values = [value for _seconds, value in points]
+            epochs.append(start)
+            values.append(fsum(period_values) / len(period_values))
+        return replace(self, timeframe=timeframe, origin=IndexingSettingOrigin.DERIVED, epochs=epochs, values=values)
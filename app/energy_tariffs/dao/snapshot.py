@@ -0,0 +1,256 @@
+"""
+Read-only snapshot of the table in a compact, memory-mappable file
+
+The snapshot holds all items with a secondary key before a cutoff (i.e. historic data keyed on an epoch) and answers
+the reads for those keys, so reads for historic data never leave the process. Newer keys are read from the fallback
+backend, e.g. DynamoDB. Export a snapshot with `python -m dao.snapshot <table name> <output file> [--cutoff YYYY/MM/DD]`.
+
+The snapshot is a copy of the table at the time of the export, the reads never check whether it is still current.
+Every job that rewrites historic values (a backfill, or a feed over an explicit `start`) records a checkpoint, and the
+time of the latest checkpoint is the generation of the table that is baked into the snapshot. Export with `--if-stale`
+(e.g. before the snapshot is packaged) to only export again when a checkpoint is newer than the generation of the
+existing snapshot file.
+
+Layout (all integers unsigned 64 bit little-endian, all sections 8 byte aligned):
+    header          magic, byte order marker, cutoff, export time, generation, number of primary keys (P), number of
+                    items (N)
+    primary_offsets P + 1 offsets of the sorted primary keys in the primary blob
+    row_starts      P + 1 index of the first item of every primary key
+    secondaries     N sorted (per primary key) secondary keys
+    item_offsets    N + 1 offsets of the items in the item blob
+    primary blob    the UTF-8 encoded primary keys
+    item blob       the JSON encoded items
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+import argparse
+import json
+import mmap
+import logging
+import os
+import struct
+import sys
+import time
+
+from pytz import utc
+
+from dao.checkpoint import BackfillCheckpoint
+from dao.storage import KeyCondition, StorageBackend, as_backend, json_default
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+MAGIC = b"ETSNAP03"
+BYTE_ORDER_MARKER = 0x0102030405060708
+HEADER = struct.Struct("<8sQQQQQQ")
+
+
+def _aligned(data: bytes) -> bytes:
+    """Pad the data to a multiple of 8 bytes"""
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _u64_array(values: list[int]) -> bytes:
+    """Encode the values as an array of little-endian unsigned 64 bit integers"""
+    values = array("Q", values)
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return values.tobytes()
+
+
+class Snapshot:
+    """Memory-mapped snapshot with binary search lookups on the sorted key index"""
+
+    def __init__(self, buffer):
+        if sys.byteorder == "big":  # pragma: no cover
+            raise NotImplementedError("Snapshots can only be read on little-endian platforms")
+        magic, marker, self.cutoff, self.exported, self.generation, primaries, rows = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or marker != BYTE_ORDER_MARKER:
+            raise ValueError("Not a valid snapshot file")
+        self.buffer = buffer
+        view = memoryview(buffer)
+        offset = HEADER.size
+
+        def u64_section(count: int) -> memoryview:
+            nonlocal offset
+            start, offset = offset, offset + 8 * count
+            return view[start:offset].cast("Q")
+
+        self.primary_offsets = u64_section(primaries + 1)
+        self.row_starts = u64_section(primaries + 1)
+        self.secondaries = u64_section(rows)
+        self.item_offsets = u64_section(rows + 1)
+        primary_blob_size, item_blob_size = self.primary_offsets[-1], self.item_offsets[-1]
+        self.primary_blob = view[offset:][:primary_blob_size]
+        offset += primary_blob_size + (-primary_blob_size % 8)
+        self.item_blob = view[offset:][:item_blob_size]
+
+    @classmethod
+    def open(cls, path: str) -> Snapshot:
+        """Memory-map the snapshot file"""
+        with open(path, "rb") as file_handle:
+            return cls(mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @staticmethod
+    def generation_of(db_table) -> int:
+        """Get the generation of the historic values in the table: when a job last rewrote them, 0 when no job ever did"""
+        last_updated = BackfillCheckpoint.last_updated(db_table)
+        return 0 if last_updated is None else int(last_updated.timestamp())
+
+    @staticmethod
+    def write(path: str, items, cutoff: int, exported: int = None, generation: int = 0) -> int:
+        """Write the items with a secondary key before the cutoff to a snapshot file, returns the number of items"""
+        exported = int(time.time()) if exported is None else exported
+        rows = sorted(
+            ((item["primary"].encode("utf-8"), int(item["secondary"]), json.dumps(item, default=json_default).encode("utf-8")) for item in items),
+            key=lambda row: (row[0], row[1]),
+        )
+        rows = [row for row in rows if row[1] < cutoff]
+
+        primary_blob, item_blob = bytearray(), bytearray()
+        primary_offsets, row_starts, secondaries, item_offsets = [0], [], [], [0]
+        for index, (primary, secondary, item) in enumerate(rows):
+            if index == 0 or primary != rows[index - 1][0]:
+                row_starts.append(index)
+                primary_blob += primary
+                primary_offsets.append(len(primary_blob))
+            secondaries.append(secondary)
+            item_blob += item
+            item_offsets.append(len(item_blob))
+        row_starts.append(len(rows))
+
+        with open(path, "wb") as file_handle:
+            file_handle.write(HEADER.pack(MAGIC, BYTE_ORDER_MARKER, cutoff, exported, generation, len(primary_offsets) - 1, len(rows)))
+            for section in (primary_offsets, row_starts, secondaries, item_offsets):
+                file_handle.write(_u64_array(section))
+            file_handle.write(_aligned(bytes(primary_blob)))
+            file_handle.write(bytes(item_blob))
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self.secondaries)
+
+    def _primary(self, index: int) -> bytes:
+        """Get the primary key at the index"""
+        start, end = self.primary_offsets[index], self.primary_offsets[index + 1]
+        return bytes(self.primary_blob[start:end])
+
+    def _rows(self, primary: str) -> tuple[int, int]:
+        """Get the range of items for the primary key (binary search)"""
+        key = primary.encode("utf-8")
+        low, high = 0, len(self.primary_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._primary(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.primary_offsets) - 1 and self._primary(low) == key:
+            return self.row_starts[low], self.row_starts[low + 1]
+        return 0, 0
+
+    def _item(self, row: int) -> dict:
+        """Decode the item at the row"""
+        start, end = self.item_offsets[row], self.item_offsets[row + 1]
+        return {**json.loads(bytes(self.item_blob[start:end])), "secondary": self.secondaries[row]}
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        """Get a single item or None when it is not in the snapshot"""
+        start, end = self._rows(primary)
+        row = bisect_left(self.secondaries, secondary, start, end)
+        if row < end and self.secondaries[row] == secondary:
+            return self._item(row)
+        return None
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        """Get all items in the snapshot matching the key condition"""
+        start, end = self._rows(condition.primary)
+        if condition.lower is not None:
+            start = bisect_left(self.secondaries, condition.lower, start, end)
+        if condition.upper is not None:
+            end = (bisect_right if condition.upper_inclusive else bisect_left)(self.secondaries, condition.upper, start, end)
+        return [self._item(row) for row in range(start, end)]
+
+
+class SnapshotBackend(StorageBackend):
+    """Storage backend that answers keys before the snapshot cutoff from the snapshot and newer keys from the fallback"""
+
+    def __init__(self, snapshot: Snapshot, fallback: StorageBackend):
+        self.snapshot = snapshot
+        self.fallback = fallback
+
+    def put_item(self, item: dict):
+        self.fallback.put_item(item)
+
+    def put_items(self, items):
+        self.fallback.put_items(items)
+
+    def delete_item(self, primary: str, secondary: int):
+        self.fallback.delete_item(primary, secondary)
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        if secondary < self.snapshot.cutoff:
+            return self.snapshot.get_item(primary, secondary)
+        return self.fallback.get_item(primary, secondary)
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        cutoff = self.snapshot.cutoff
+        items = []
+        if condition.lower is None or condition.lower < cutoff:
+            items.extend(self.snapshot.query(condition))
+        if condition.upper is None or condition.upper > cutoff or (condition.upper == cutoff and condition.upper_inclusive):
+            lower = cutoff if condition.lower is None else max(condition.lower, cutoff)
+            items.extend(self.fallback.query(KeyCondition(condition.primary, lower, condition.upper, condition.upper_inclusive)))
+        return items
+
+
+@lru_cache(maxsize=None)
+def open_snapshot(path: str) -> Snapshot:
+    """Open the snapshot once per process, so warm invocations reuse the mapping"""
+    return Snapshot.open(path)
+
+
+def is_current(path: str, generation: int) -> bool:
+    """Check whether the snapshot file is a valid snapshot of the given generation (or a later one)"""
+    try:
+        return generation <= Snapshot.open(path).generation
+    except ValueError:
+        return False
+
+
+def default_cutoff() -> datetime:
+    """Get the default cutoff: the start of the previous month, as later values might still be published or derived"""
+    previous_month = datetime.now(utc).replace(day=1) - timedelta(days=1)
+    return previous_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def main():
+    """Export the table to a snapshot file"""
+    import boto3
+
+    parser = argparse.ArgumentParser(
+        description="Export the DynamoDB table to a snapshot file",
+        epilog="A backfill or a feed over an explicit start after the export supersedes the snapshot, see --if-stale",
+    )
+    parser.add_argument("table")
+    parser.add_argument("output")
+    parser.add_argument("--cutoff", help="Only export keys before this date (YYYY/MM/DD), defaults to the start of the previous month")
+    parser.add_argument("--if-stale", action="store_true", help="Only export when the historic values changed since the existing output was exported")
+    args = parser.parse_args()
+
+    cutoff = utc.localize(datetime.strptime(args.cutoff, "%Y/%m/%d")) if args.cutoff is not None else default_cutoff()
+    backend = as_backend(boto3.resource("dynamodb").Table(args.table))
+    # The generation is taken before the scan, so a rewrite during the export makes the snapshot stale
+    generation = Snapshot.generation_of(backend)
+    if args.if_stale and os.path.exists(args.output) and is_current(args.output, generation):
+        print(f"The snapshot {args.output} is current, not exporting")
+        return
+    count = Snapshot.write(args.output, backend.scan(), int(cutoff.timestamp()), generation=generation)
+    print(f"Exported {count} items before {cutoff} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Storage backends for the data access objects"""
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
+import json
+import os
+import time
+
+
+# The provisioned write capacity of the table, the budget of the writes of the feeders that are paced
+TABLE_WRITES_PER_SECOND = float(os.environ.get("TABLE_WRITES_PER_SECOND", 10))
+
+
+@dataclass(frozen=True)
+class KeyCondition:
+    """Backend independent key condition: a primary key and an optional range on the secondary key"""
+
+    primary: str
+    lower: int = None  # Inclusive lower bound of the secondary key
+    upper: int = None  # Upper bound of the secondary key
+    upper_inclusive: bool = True
+
+    def matches(self, secondary: int) -> bool:
+        """Check whether the secondary key is within the range"""
+        if self.lower is not None and secondary < self.lower:
+            return False
+        if self.upper is not None and (secondary > self.upper if self.upper_inclusive else secondary >= self.upper):
+            return False
+        return True
+
+
+class StorageBackend:
+    """Interface for a key-value store with a primary (partition) and secondary (sort) key, i.e. the DynamoDB key semantics"""
+
+    def put_item(self, item: dict):
+        """Store a single item, replacing an existing item with the same key"""
+        raise NotImplementedError("Method for storing an item not implemented")
+
+    def put_items(self, items):
+        """Store multiple items"""
+        for item in items:
+            self.put_item(item)
+
+    def delete_item(self, primary: str, secondary: int):
+        """Delete a single item, nothing happens when it does not exist"""
+        raise NotImplementedError("Method for deleting an item not implemented")
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        """Get a single item or None when it does not exist"""
+        raise NotImplementedError("Method for getting an item not implemented")
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        """Get all items matching the key condition, sorted on the secondary key"""
+        raise NotImplementedError("Method for querying items not implemented")
+
+    def scan(self):
+        """Iterate over all items"""
+        raise NotImplementedError("Method for scanning items not implemented")
+
+
+class DynamoDBBackend(StorageBackend):
+    """Storage backend on top of a boto3 DynamoDB Table"""
+
+    def __init__(self, db_table):
+        self.db_table = db_table
+
+    def put_item(self, item: dict):
+        self.db_table.put_item(Item=item)
+
+    def put_items(self, items):
+        with self.db_table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def delete_item(self, primary: str, secondary: int):
+        self.db_table.delete_item(Key={"primary": primary, "secondary": secondary})
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        response = self.db_table.get_item(Key={"primary": primary, "secondary": secondary})
+        return response.get("Item")
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        from boto3.dynamodb.conditions import Key
+
+        key_condition = Key("primary").eq(condition.primary)
+        if condition.lower is not None and condition.upper is not None:
+            # DynamoDB supports a single range condition on the sort key, an exclusive upper bound is filtered afterwards
+            key_condition = key_condition & Key("secondary").between(condition.lower, condition.upper)
+        elif condition.lower is not None:
+            key_condition = key_condition & Key("secondary").gte(condition.lower)
+        elif condition.upper is not None:
+            key_condition = key_condition & (Key("secondary").lte(condition.upper) if condition.upper_inclusive else Key("secondary").lt(condition.upper))
+
+        items = []
+        kwargs = {"Select": "ALL_ATTRIBUTES", "KeyConditionExpression": key_condition}
+        while True:
+            response = self.db_table.query(**kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return [item for item in items if condition.matches(int(item["secondary"]))]
+
+    def scan(self):
+        kwargs = {}
+        while True:
+            response = self.db_table.scan(**kwargs)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def json_default(value):
+    """Encode the values DynamoDB returns that JSON does not know about"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLiteBackend(StorageBackend):
+    """Storage backend on top of a local SQLite database, in memory by default"""
+
+    # The secondary keys are unsigned 64 bit integers (epochs and hashes), shift them into the signed range of SQLite
+    SECONDARY_OFFSET = 2**63
+
+    def __init__(self, path: str = ":memory:"):
+        import sqlite3  # Only used locally, so not imported on the cold start of the lambdas
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = Lock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS items (pk TEXT NOT NULL, sk INTEGER NOT NULL, item TEXT NOT NULL, PRIMARY KEY (pk, sk)) WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def _row(item: dict) -> tuple:
+        """Convert an item to a database row"""
+        return (item["primary"], int(item["secondary"]) - SQLiteBackend.SECONDARY_OFFSET, json.dumps(item, default=json_default))
+
+    @staticmethod
+    def _item(row: tuple) -> dict:
+        """Convert a database row to an item"""
+        return {**json.loads(row[1]), "secondary": row[0] + SQLiteBackend.SECONDARY_OFFSET}
+
+    def put_item(self, item: dict):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO items VALUES (?, ?, ?)", self._row(item))
+
+    def put_items(self, items):
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?)", (self._row(item) for item in items))
+
+    def delete_item(self, primary: str, secondary: int):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM items WHERE pk = ? AND sk = ?", (primary, int(secondary) - self.SECONDARY_OFFSET))
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        with self.lock:
+            row = self.connection.execute("SELECT sk, item FROM items WHERE pk = ? AND sk = ?", (primary, int(secondary) - self.SECONDARY_OFFSET)).fetchone()
+        return self._item(row) if row is not None else None
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        sql = "SELECT sk, item FROM items WHERE pk = ?"
+        params = [condition.primary]
+        if condition.lower is not None:
+            sql += " AND sk >= ?"
+            params.append(condition.lower - self.SECONDARY_OFFSET)
+        if condition.upper is not None:
+            sql += " AND sk <= ?" if condition.upper_inclusive else " AND sk < ?"
+            params.append(condition.upper - self.SECONDARY_OFFSET)
+        with self.lock:
+            rows = self.connection.execute(sql + " ORDER BY sk", params).fetchall()
+        return [self._item(row) for row in rows]
+
+    def scan(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT sk, item FROM items ORDER BY pk, sk").fetchall()
+        return (self._item(row) for row in rows)
+
+
+class PacedBackend(StorageBackend):
+    """Storage backend that limits the write rate of another backend, e.g. to the provisioned write capacity of a table"""
+
+    def __init__(self, backend: StorageBackend, items_per_second: float):
+        self.backend = backend
+        self.interval = 1.0 / items_per_second
+        self.lock = Lock()
+        self.next_time = time.monotonic()
+
+    def _paced(self, items):
+        """Yield the items no faster than the configured rate, which is shared by all threads writing through the backend"""
+        for item in items:
+            with self.lock:
+                now = time.monotonic()
+                delay = self.next_time - now
+                self.next_time = max(self.next_time, now) + self.interval
+            if delay > 0:
+                time.sleep(delay)
+            yield item
+
+    def put_item(self, item: dict):
+        self.backend.put_items(self._paced([item]))
+
+    def put_items(self, items):
+        self.backend.put_items(self._paced(items))
+
+    def delete_item(self, primary: str, secondary: int):
+        # A delete consumes the write capacity like a put
+        for _ in self._paced([None]):
+            self.backend.delete_item(primary, secondary)
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        return self.backend.get_item(primary, secondary)
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        return self.backend.query(condition)
+
+    def scan(self):
+        return self.backend.scan()
+
+
+class CoalescingBackend(StorageBackend):
+    """Storage backend that reads every key (or key condition) only once, to share the reads of the sub-requests of a batch"""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self.items = {}
+        self.queries = {}
+
+    def put_item(self, item: dict):
+        self.backend.put_item(item)
+
+    def put_items(self, items):
+        self.backend.put_items(items)
+
+    def delete_item(self, primary: str, secondary: int):
+        self.backend.delete_item(primary, secondary)
+
+    def get_item(self, primary: str, secondary: int) -> dict:
+        key = (primary, int(secondary))
+        if key not in self.items:
+            self.items[key] = self.backend.get_item(primary, secondary)
+        return self.items[key]
+
+    def query(self, condition: KeyCondition) -> list[dict]:
+        if condition not in self.queries:
+            self.queries[condition] = self.backend.query(condition)
+        return self.queries[condition]
+
+    def scan(self):
+        return self.backend.scan()
+
+
+def as_backend(db_table) -> StorageBackend:
+    """Get the storage backend for the given table, wrapping a boto3 DynamoDB Table when needed"""
+    if isinstance(db_table, StorageBackend):
+        return db_table
+    return DynamoDBBackend(db_table)
+
+
+def as_paced_backend(db_table, items_per_second: float = TABLE_WRITES_PER_SECOND) -> PacedBackend:
+    """Get the paced storage backend for the given table, a table that is already paced keeps its (shared) pace"""
+    if isinstance(db_table, PacedBackend):
+        return db_table
+    return PacedBackend(as_backend(db_table), items_per_second)
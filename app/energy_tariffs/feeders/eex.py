@@ -3,22 +3,28 @@ Module for getting EEX Spot Prices
 
 https://www.eex.com/en/market-data/natural-gas/spot
 """
+from __future__ import annotations
 from dataclasses import dataclass
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 import requests
-from pytz import timezone
+from pytz import timezone, utc
 
 from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+from feeders.registry import FeederPlugin
 
 
 EEX_URL = "https://webservice-eex.gvsi.com/query/json/getDaily/ontradeprice/close/tradedatetimegmt/"
+ZTP_INDEXES = ["#E.ZTP_GTND", "#E.ZTP_GTWE"]
+ZEE_INDEXES = ["#E.ZEE_GWND", "#E.ZEE_GWWE"]
 
 
 @dataclass
 class EEXIndexingSetting(IndexingSetting):
     """Spot price of EEX"""
 
+    __slots__ = ()
+
     @classmethod
     def from_eex_json(cls, index_name: str, timezone, data):
         """Parse from the EEX JSON"""
@@ -38,6 +44,11 @@ class EEXIndexingSetting(IndexingSetting):
     @staticmethod
     def query(indexes: list[str], start: date, end: date, timezone):
         """Query"""
+        return list(EEXIndexingSetting.iter_query(indexes=indexes, start=start, end=end, timezone=timezone))
+
+    @staticmethod
+    def session() -> requests.Session:
+        """Create the session for querying the EEX web service"""
         session = requests.session()
         headers = {
             "Host": "webservice-eex.gvsi.com",
@@ -55,39 +66,91 @@ class EEXIndexingSetting(IndexingSetting):
             "Cache-Control": "no-cache",
         }
         session.headers = headers
+        return session
+
+    @staticmethod
+    def fetch_items(session: requests.Session, index: str, start: date, end: date) -> list[dict]:
+        """Fetch the daily items of a single index"""
+        response = session.get(
+            EEX_URL,
+            params={
+                "priceSymbol": f'"{index}"',
+                "chartstartdate": start.strftime("%Y/%m/%d"),
+                "chartstopdate": end.strftime("%Y/%m/%d"),
+                "dailybarinterval": "Days",
+                "aggregatepriceselection": "First",
+            },
+        )
+        response.raise_for_status()
+        return response.json().get("results", {}).get("items", [])
+
+    @staticmethod
+    def parse_items(index: str, items: list[dict], start: date, end: date, timezone):
+        """Parse the values of a single index within the range from its items"""
+        for item in items:
+            result = EEXIndexingSetting.from_eex_json(index, timezone, item)
+            if result.value is not None and result.date.date() >= start and result.date.date() <= end:
+                yield result
+
+    @staticmethod
+    def iter_query(indexes: list[str], start: date, end: date, timezone):
+        """Query the indexes one by one, yielding the values of an index before the next one is requested"""
+        session = EEXIndexingSetting.session()
+        for index in indexes:
+            yield from EEXIndexingSetting.parse_items(index, EEXIndexingSetting.fetch_items(session, index, start, end), start, end, timezone)
+
+    @staticmethod
+    def iter_ztp_values(date_filter: date, end: date = None):
+        """Iterate over the ZTP indexes since given datefilter"""
+        return EEXIndexingSetting.iter_query(
+            indexes=ZTP_INDEXES, start=date_filter, end=date.today() if end is None else end, timezone=timezone("Europe/Brussels")
+        )
 
-        def sub_query(session, index: str, start: date, end: date) -> list[EEXIndexingSetting]:
-            """Query for a single index"""
-            response = session.get(
-                EEX_URL,
-                params={
-                    "priceSymbol": f'"{index}"',
-                    "chartstartdate": start.strftime("%Y/%m/%d"),
-                    "chartstopdate": end.strftime("%Y/%m/%d"),
-                    "dailybarinterval": "Days",
-                    "aggregatepriceselection": "First",
-                },
-            )
-            response.raise_for_status()
-            return [EEXIndexingSetting.from_eex_json(index, timezone, item) for item in response.json().get("results", {}).get("items", [])]
-
-        return [
-            result
-            for index in indexes
-            for result in sub_query(session=session, index=index, start=start, end=end)
-            if result.value is not None and result.date.date() >= start and result.date.date() <= end
-        ]
+    @staticmethod
+    def iter_zee_values(date_filter: date, end: date = None):
+        """Iterate over the ZEE indexes since given datefilter"""
+        return EEXIndexingSetting.iter_query(
+            indexes=ZEE_INDEXES, start=date_filter, end=date.today() if end is None else end, timezone=timezone("Europe/Brussels")
+        )
 
     @staticmethod
     def get_ztp_values(date_filter: date, end: date = None):
         """Get the ZTP indexes since given datefilter"""
-        return EEXIndexingSetting.query(
-            indexes=["#E.ZTP_GTND", "#E.ZTP_GTWE"], start=date_filter, end=date.today() if end is None else end, timezone=timezone("Europe/Brussels")
-        )
+        return list(EEXIndexingSetting.iter_ztp_values(date_filter=date_filter, end=end))
 
     @staticmethod
     def get_zee_values(date_filter: date, end: date = None):
         """Get the ZEE indexes since given datefilter"""
-        return EEXIndexingSetting.query(
-            indexes=["#E.ZEE_GWND", "#E.ZEE_GWWE"], start=date_filter, end=date.today() if end is None else end, timezone=timezone("Europe/Brussels")
-        )
+        return list(EEXIndexingSetting.iter_zee_values(date_filter=date_filter, end=end))
+
+
+class EEXFeeder(FeederPlugin):
+    """Feeder for the EEX spot prices of ZTP and ZEE, by default of the last 7 days"""
+
+    @staticmethod
+    def date_range(event: dict) -> tuple[date, date]:
+        """Get the range of the values that are stored"""
+        if "start" in event and "end" in event:
+            return datetime.strptime(event["start"], "%Y/%m/%d").date(), datetime.strptime(event["end"], "%Y/%m/%d").date()
+        return datetime.now(utc).date() - timedelta(days=7), date.today()
+
+    def __init__(self):
+        self.session = None
+
+    def units(self, event: dict) -> list[str]:
+        return ZTP_INDEXES + ZEE_INDEXES
+
+    def fetch(self, event: dict, unit: str) -> tuple[str, list[dict]]:
+        # The values of an index are written while the next index is requested, reusing the session of the previous indexes
+        if self.session is None:
+            self.session = EEXIndexingSetting.session()
+        start, end = EEXFeeder.date_range(event)
+        return unit, EEXIndexingSetting.fetch_items(self.session, unit, start, end)
+
+    def parse(self, event: dict, document: tuple[str, list[dict]]):
+        start, end = EEXFeeder.date_range(event)
+        index, items = document
+        return EEXIndexingSetting.parse_items(index, items, start, end, timezone("Europe/Brussels"))
+
+    def save(self, db_table, values) -> int:
+        return EEXIndexingSetting.save_list(db_table, values)
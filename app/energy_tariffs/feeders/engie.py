@@ -1,7 +1,10 @@
 """Module for retrieving the indexation parameters from Engie"""
+from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from statistics import mean
+from urllib.parse import urlsplit
 import locale
 import logging
 
@@ -10,7 +13,13 @@ import requests
 from pytz import timezone
 import holidays
 
+import logs
+from dao.checkpoint import BackfillCheckpoint
 from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+from dao.series import IndexingSettingSeries
+from dao.storage import as_paced_backend
+from feeders.httpcache import CachedResponse, HttpCache, is_conditional
+from feeders.registry import FeederPlugin
 
 
 logger = logging.getLogger(__name__)
@@ -35,14 +44,31 @@ def convert_month(month: str) -> int:
     raise ValueError("Not able to translate")
 
 
+@lru_cache(maxsize=None)
+def country_holidays(country: str, year: int) -> holidays.HolidayBase:
+    """Get the holidays of a country for a year, which are generated only once"""
+    return holidays.country_holidays(country=country, years=year)
+
+
 def is_holiday(day: datetime) -> bool:
     """Check if a day is a holiday"""
-    return (
-        day in holidays.country_holidays(country="BE", years=day.year)
-        or day in holidays.country_holidays(country="NL", years=day.year)
-        or day in holidays.country_holidays(country="DE", years=day.year)
-        or day in holidays.country_holidays(country="FR", years=day.year)
-    )
+    return any(day in country_holidays(country, day.year) for country in ["BE", "NL", "DE", "FR"])
+
+
+def month_starts(start: datetime, end: datetime, tz) -> list[datetime]:
+    """Get the (localized) start of every month from the month of start until the month of end"""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(tz.localize(datetime(year, month, 1)))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def next_month_start(month_start: datetime, tz) -> datetime:
+    """Get the (localized) start of the next month"""
+    next_month = month_start.replace(day=28) + timedelta(days=4)
+    return tz.localize(datetime(next_month.year, next_month.month, 1))
 
 
 def get_last_weekday(day: datetime) -> datetime:
@@ -59,6 +85,8 @@ def get_last_weekday(day: datetime) -> datetime:
 class EngieIndexingSetting(IndexingSetting):
     """Indexing Setting class for Engie"""
 
+    __slots__ = ()
+
     @classmethod
     def from_cell(cls, month, year, cell):
         """Parse the value from a table cell"""
@@ -90,29 +118,48 @@ class EngieIndexingSetting(IndexingSetting):
             return []
 
     @staticmethod
-    def from_url(url):
-        """Parse the values from URL"""
-        html_text = requests.get(url).text
+    def iter_url(url):
+        """Parse the values from URL, row by row"""
+        return EngieIndexingSetting.iter_html(requests.get(url).text)
+
+    @staticmethod
+    def iter_html(html_text: str):
+        """Parse the values from the HTML of a page, row by row"""
         soup = BeautifulSoup(html_text, "html.parser")
 
         table = soup.find("div", class_="table_body")
-        return [
-            index_value
-            for row in table.find_all("div", class_="table_row")
-            for index_value in EngieIndexingSetting.from_row(row.find_all("div", class_="table_cell"))
-        ]
+        for row in table.find_all("div", class_="table_row"):
+            yield from EngieIndexingSetting.from_row(row.find_all("div", class_="table_cell"))
+
+    @staticmethod
+    def from_url(url):
+        """Parse the values from URL"""
+        return list(EngieIndexingSetting.iter_url(url))
+
+    @staticmethod
+    def iter_values(url: str, date_filter: datetime = None):
+        """Scrape the indexing settings from the Engie website since the date filter, while they are parsed"""
+        return (index_value for index_value in EngieIndexingSetting.iter_url(url) if (date_filter is None or index_value.date >= date_filter))
+
+    @staticmethod
+    def iter_gas_values(date_filter: datetime = None):
+        """Iterate over the GAS indexing settings from the Engie website"""
+        return EngieIndexingSetting.iter_values(GAS_URL, date_filter)
+
+    @staticmethod
+    def iter_energy_values(date_filter: datetime = None):
+        """Iterate over the ENERGY indexing settings from the Engie website"""
+        return EngieIndexingSetting.iter_values(ENERGY_URL, date_filter)
 
     @staticmethod
     def get_gas_values(date_filter: datetime = None):
         """Scrape the GAS indexing settings from the Engie website"""
-        index_values = EngieIndexingSetting.from_url(GAS_URL)
-        return [index_value for index_value in index_values if (date_filter is None or index_value.date >= date_filter)]
+        return list(EngieIndexingSetting.iter_gas_values(date_filter))
 
     @staticmethod
     def get_energy_values(date_filter: datetime = None):
         """Scrape the ENERGY indexing settings from the Engie website"""
-        index_values = EngieIndexingSetting.from_url(ENERGY_URL)
-        return [index_value for index_value in index_values if (date_filter is None or index_value.date >= date_filter)]
+        return list(EngieIndexingSetting.iter_energy_values(date_filter))
 
     @staticmethod
     def calculate_derived_values(db_table, calculation_date: datetime = None) -> list[IndexingSetting]:
@@ -161,7 +208,7 @@ class EngieIndexingSetting(IndexingSetting):
         logger.info("Calculating values for EPEX DAM")
         start = calculation_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         end = tomorrow.replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(seconds=1)
-        index_values_month = IndexingSetting.query(
+        index_values_month = IndexingSettingSeries.query(
             db_table=db_table,
             source="ENTSO-E",
             name="SDAC BE",
@@ -169,18 +216,23 @@ class EngieIndexingSetting(IndexingSetting):
             start=start,
             end=end,
         )
+        return EngieIndexingSetting._epex_dam(tz_be.localize(datetime(calculation_date.year, calculation_date.month, 1)), index_values_month)
+
+    @staticmethod
+    def _epex_dam(month: datetime, index_values_month: IndexingSettingSeries):
+        """Calculate the EPEX DAM derived indexing setting from the hourly SDAC BE values of the month"""
         if len(index_values_month) > 0:
             # Only calculate if we found results
-            value = round(mean(index.value for index in index_values_month), 2)
+            value = round(index_values_month.mean(), 2)
             epex_dam = EngieIndexingSetting(
                 name="Epex DAM",
                 value=value,
                 timeframe=IndexingSettingTimeframe.MONTHLY,
-                date=tz_be.localize(datetime(calculation_date.year, calculation_date.month, 1)),
+                date=month,
                 source="Engie",
                 origin=IndexingSettingOrigin.DERIVED,
             )
-            logger.info(f"EPEX DAM: {value} (records: {len(index_values_month)})")
+            logs.info(logger, "Derived EPEX DAM", month=month, value=value, records=len(index_values_month))
             return epex_dam
         return None
 
@@ -192,7 +244,7 @@ class EngieIndexingSetting(IndexingSetting):
         # we have the weekend values if the month starts with a weekend
         start = calculation_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
         end = tomorrow.replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(seconds=1)
-        ztp_weekends = IndexingSetting.query(
+        ztp_weekends = IndexingSettingSeries.query(
             db_table=db_table,
             source="EEX",
             name="ZTP GTWE",
@@ -201,7 +253,7 @@ class EngieIndexingSetting(IndexingSetting):
             start=start,
             end=end,
         )
-        ztp_days = IndexingSetting.query(
+        ztp_days = IndexingSettingSeries.query(
             db_table=db_table,
             source="EEX",
             name="ZTP GTND",
@@ -210,38 +262,165 @@ class EngieIndexingSetting(IndexingSetting):
             start=start,
             end=end,
         )
+        return EngieIndexingSetting._ztp_dam(
+            tz_be.localize(datetime(calculation_date.year, calculation_date.month, 1)),
+            [calculation_date.replace(day=day + 1) for day in range(end.day)],
+            ztp_days,
+            ztp_weekends,
+        )
+
+    @staticmethod
+    def _ztp_dam(month: datetime, days: list[datetime], ztp_days: IndexingSettingSeries, ztp_weekends: IndexingSettingSeries):
+        """Calculate the ZTP DAM derived indexing setting for the days of the month from the daily ZTP GTND and GTWE values"""
         if len(ztp_weekends) == 0 or len(ztp_days) == 0:
             return None
+        ztp_day_values = dict(ztp_days.items())
+        ztp_weekend_values = dict(ztp_weekends.items())
 
         def get_ztp_value_for_day(day: datetime) -> float:
             """Get the ZTP value for a given day"""
-            if day.weekday() <= 4:
+            if day.weekday() <= 4 and day in ztp_day_values:
                 # A week day so we need ZTP Next Day
-                for ztp_day in ztp_days:
-                    if ztp_day.date == day:
-                        logger.debug(f"Found ZTP GTND value for day {day}: {ztp_day.value}")
-                        return ztp_day.value
+                logger.debug("Found ZTP GTND value for day %s: %s", day, ztp_day_values[day])
+                return ztp_day_values[day]
 
             if day.weekday() > 4 or is_holiday(day):
                 # A weekend day or holiday so we need ZTP Weekend
                 day_before = get_last_weekday(day)
-                for ztp_weekend in ztp_weekends:
-                    if ztp_weekend.date == day_before:
-                        logger.debug(f"Found ZTP GTWE value for day {day} from {ztp_weekend.date}: {ztp_weekend.value}")
-                        return ztp_weekend.value
+                if day_before in ztp_weekend_values:
+                    logger.debug("Found ZTP GTWE value for day %s from %s: %s", day, day_before, ztp_weekend_values[day_before])
+                    return ztp_weekend_values[day_before]
 
             raise ValueError(f"No ZTP value found for day {day}")
 
         try:
-            month_values = [get_ztp_value_for_day(calculation_date.replace(day=day + 1)) for day in range(end.day)]
+            month_values = [get_ztp_value_for_day(day) for day in days]
             return EngieIndexingSetting(
                 name="ZTP DAM",
                 value=round(mean(month_values), 2),
                 timeframe=IndexingSettingTimeframe.MONTHLY,
-                date=tz_be.localize(datetime(calculation_date.year, calculation_date.month, 1)),
+                date=month,
                 source="Engie",
                 origin=IndexingSettingOrigin.DERIVED,
             )
         except ValueError as exc:
-            logger.error(exc.args[0])
+            logs.error(logger, "Failed to derive ZTP DAM", month=month, error=exc.args[0])
             return None
+
+    @staticmethod
+    def backfill_derived_values(db_table, start: datetime, end: datetime) -> list[IndexingSetting]:
+        """Calculate the derived indexing settings for every month from the month of start until the month of end"""
+        tz_be = timezone("Europe/Brussels")
+        months = month_starts(start, end, tz_be)
+        if len(months) == 0:
+            return []
+        range_end = next_month_start(months[-1], tz_be) - timedelta(seconds=1)
+
+        # Prefetch the underlying series for the whole range at once instead of querying per month
+        logger.info(f"Prefetching values from {months[0]} until {range_end}")
+        sdac_values = IndexingSettingSeries.query(
+            db_table=db_table,
+            source="ENTSO-E",
+            name="SDAC BE",
+            timeframe=IndexingSettingTimeframe.HOURLY,
+            start=months[0],
+            end=range_end,
+        )
+        # 7 days before the first month to have the weekend values if a month starts with a weekend
+        ztp_weekends, ztp_days = [
+            IndexingSettingSeries.query(
+                db_table=db_table,
+                source="EEX",
+                name=name,
+                origin=IndexingSettingOrigin.ORIGINAL,
+                timeframe=IndexingSettingTimeframe.DAILY,
+                start=months[0] - timedelta(days=7),
+                end=range_end,
+            )
+            for name in ["ZTP GTWE", "ZTP GTND"]
+        ]
+
+        def calculate_month(month: datetime) -> list[IndexingSetting]:
+            """Calculate the derived values of a single month from the prefetched series"""
+            month_end = next_month_start(month, tz_be) - timedelta(seconds=1)
+            days = [tz_be.localize(datetime(month.year, month.month, day + 1)) for day in range(month_end.day)]
+            epex_dam = EngieIndexingSetting._epex_dam(month, sdac_values.between(month, month_end))
+            ztp_dam = EngieIndexingSetting._ztp_dam(
+                month,
+                days,
+                ztp_days.between(month - timedelta(days=7), month_end),
+                ztp_weekends.between(month - timedelta(days=7), month_end),
+            )
+            return [index for index in [epex_dam, ztp_dam] if index is not None]
+
+        # The calculation is CPU-bound, the months are calculated in order from the prefetched series
+        return [index for month in months for index in calculate_month(month)]
+
+
+class EngieFeeder(FeederPlugin):
+    """Feeder for the Engie indexing settings and the values derived from the ENTSO-E and EEX values"""
+
+    depends_on = ("entsoe", "eex")
+
+    @staticmethod
+    def not_before(event: dict) -> datetime:
+        """Get the date from which the values are stored, by default the last 90 days"""
+        tz_be = timezone("Europe/Brussels")  # Use BE timezone as we will be fetching "BE values"
+        if "start" in event:
+            return tz_be.localize(datetime.strptime(event["start"], "%Y/%m/%d"))
+        return datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90)
+
+    def __init__(self):
+        self.cache = None
+
+    def prepare(self, event: dict, db_table):
+        self.cache = HttpCache(db_table)
+
+    def units(self, event: dict) -> list[str]:
+        return [GAS_URL, ENERGY_URL]
+
+    def host(self, unit: str) -> str:
+        return urlsplit(unit).netloc
+
+    def fetch(self, event: dict, unit: str) -> CachedResponse:
+        response = self.cache.get(unit, conditional=is_conditional(event))
+        return None if response.unchanged else response
+
+    def parse(self, event: dict, document: CachedResponse):
+        not_before = EngieFeeder.not_before(event)
+        return (index_value for index_value in EngieIndexingSetting.iter_html(document.text) if index_value.date >= not_before)
+
+    def commit(self, unit: str, document: CachedResponse):
+        self.cache.store(document)
+
+    def derive(self, db_table, event: dict) -> list[IndexingSetting]:
+        calculation_date = None
+        if "calculate" in event:
+            calculation_date = timezone("Europe/Brussels").localize(datetime.strptime(event["calculate"], "%Y/%m/%d"))
+        return EngieIndexingSetting.calculate_derived_values(db_table, calculation_date)
+
+    def save(self, db_table, values) -> int:
+        return EngieIndexingSetting.save_list(db_table, values)
+
+
+class EngieBackfillFeeder(EngieFeeder):
+    """Feeder that recalculates the Engie derived values for a range of months (from start until end as YYYY/MM)"""
+
+    def units(self, event: dict) -> list:
+        return []
+
+    def derive(self, db_table, event: dict) -> list[IndexingSetting]:
+        tz_be = timezone("Europe/Brussels")
+        start = tz_be.localize(datetime.strptime(event["start"], "%Y/%m"))
+        end = tz_be.localize(datetime.strptime(event["end"], "%Y/%m"))
+        return EngieIndexingSetting.backfill_derived_values(db_table, start, end)
+
+    def save(self, db_table, values) -> int:
+        paced = as_paced_backend(db_table)
+        values = list(values)
+        count = EngieIndexingSetting.save_list(paced, values)
+        if count > 0:
+            # Like every backfill it records its progress, which supersedes the snapshots that were exported before
+            first, last = min(value.date for value in values), max(value.date for value in values)
+            BackfillCheckpoint(job=f"Engie#derived#{first:%Y%m}#{last:%Y%m}", completed_until=last).save(paced)
+        return count
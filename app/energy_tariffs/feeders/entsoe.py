@@ -1,29 +1,89 @@
 """Module for getting ENTSO-E SDAC prices (Single Day Ahead Coupling price)"""
 from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Callable
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 import json
+import logging
+import os
+import time
 
 import requests
 import boto3
-from pytz import utc
+from pytz import utc, timezone
 
+import logs
+from dao.checkpoint import BackfillCheckpoint
 from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+from dao.storage import TABLE_WRITES_PER_SECOND, as_paced_backend
+from feeders import sessions
+from feeders.ratelimit import RateLimiter
+from feeders.registry import FeederPlugin
 
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 ENTSOE_URL = "https://web-api.tp.entsoe.eu/api"
+BACKFILL_WINDOW = timedelta(days=30)  # The API allows at most a year per request, smaller windows can be fetched concurrently
+BACKFILL_REQUESTS_PER_SECOND = 5  # The API allows 400 requests per minute per user
+BACKFILL_MARGIN_SECONDS = 60  # Stop requesting new windows this long before the lambda times out
+# The EIC codes of the bidding zones of the day-ahead market, the index of a zone is named "SDAC <zone>"
+BIDDING_ZONES = {
+    "AT": "10YAT-APG------L",
+    "BE": "10YBE----------2",
+    "BG": "10YCA-BULGARIA-R",
+    "CH": "10YCH-SWISSGRIDZ",
+    "CZ": "10YCZ-CEPS-----N",
+    "DE-LU": "10Y1001A1001A82H",
+    "DK1": "10YDK-1--------W",
+    "DK2": "10YDK-2--------M",
+    "EE": "10Y1001A1001A39I",
+    "ES": "10YES-REE------0",
+    "FI": "10YFI-1--------U",
+    "FR": "10YFR-RTE------C",
+    "GR": "10YGR-HTSO-----Y",
+    "HR": "10YHR-HEP------M",
+    "HU": "10YHU-MAVIR----U",
+    "IT-NORD": "10Y1001A1001A73I",
+    "LT": "10YLT-1001A0008Q",
+    "LV": "10YLV-1001A00074",
+    "NL": "10YNL----------L",
+    "NO1": "10YNO-1--------2",
+    "NO2": "10YNO-2--------T",
+    "NO3": "10YNO-3--------J",
+    "NO4": "10YNO-4--------9",
+    "NO5": "10Y1001A1001A48H",
+    "PL": "10YPL-AREA-----S",
+    "PT": "10YPT-REN------W",
+    "RO": "10YRO-TEL------P",
+    "SE1": "10Y1001A1001A44P",
+    "SE2": "10Y1001A1001A45N",
+    "SE3": "10Y1001A1001A46L",
+    "SE4": "10Y1001A1001A47J",
+    "SI": "10YSI-ELES-----O",
+    "SK": "10YSK-SEPS-----K",
+}
+
+
+class NoMatchingData(ValueError):
+    """The API has no values for the requested range"""
 
 
 @dataclass
 class EntsoeIndexingSetting(IndexingSetting):
     """Single Day Ahead Coupling price of ENTSO-E"""
 
+    __slots__ = ()
+
     @staticmethod
     def lookup_area_code(country_code: str) -> str:
-        if country_code == "BE":
-            return "10YBE----------2"
+        """Get the EIC code of the bidding zone, e.g. BE, DE-LU or NO1"""
+        if country_code in BIDDING_ZONES:
+            return BIDDING_ZONES[country_code]
         raise NotImplementedError(f"Did not find area code for given country code {country_code}")
 
     @classmethod
@@ -48,6 +108,11 @@ class EntsoeIndexingSetting(IndexingSetting):
     @staticmethod
     def query(api_key: str, country_code: str, start: datetime, end: datetime):
         """Query"""
+        return list(EntsoeIndexingSetting.iter_query(api_key=api_key, country_code=country_code, start=start, end=end))
+
+    @staticmethod
+    def fetch_xml(api_key: str, country_code: str, start: datetime, end: datetime, session: requests.Session = None) -> str:
+        """Fetch the XML document with the day-ahead prices of the range, optionally reusing the connections of a session"""
         area = EntsoeIndexingSetting.lookup_area_code(country_code=country_code)
         params = {
             "documentType": "A44",
@@ -58,22 +123,98 @@ class EntsoeIndexingSetting(IndexingSetting):
             "periodEnd": end.astimezone(utc).strftime("%Y%m%d%H00"),
         }
 
-        response = requests.get(url=ENTSOE_URL, params=params)
+        response = (session or requests).get(url=ENTSOE_URL, params=params)
         response.raise_for_status()
         if response.headers.get("content-type", "") == "application/xml" and "No matching data found" in response.text:
-            raise ValueError("Not expecting no data")
+            raise NoMatchingData("Not expecting no data")
+        return response.text
 
-        return [
-            EntsoeIndexingSetting.from_entsoe_data(f"SDAC {country_code}", timestamp, value)
-            for timeserie in EntsoeIndexingSetting.iterate_timeseries(response.text)
-            for timestamp, value in timeserie.to_period().items()
-            if timestamp >= start and timestamp < end
-        ]
+    @staticmethod
+    def parse_xml(country_code: str, xml: str, start: datetime, end: datetime):
+        """Parse the values within the range from the XML document, while the time series are parsed"""
+        for timeserie in EntsoeIndexingSetting.iterate_timeseries(xml):
+            for timestamp, value in timeserie.to_period().items():
+                if timestamp >= start and timestamp < end:
+                    yield EntsoeIndexingSetting.from_entsoe_data(f"SDAC {country_code}", timestamp, value)
+
+    @staticmethod
+    def iter_query(api_key: str, country_code: str, start: datetime, end: datetime):
+        """Query, yielding the values while the time series are parsed"""
+        return EntsoeIndexingSetting.parse_xml(country_code, EntsoeIndexingSetting.fetch_xml(api_key, country_code, start, end), start, end)
+
+    @staticmethod
+    def iter_be_values(api_key: str, start: datetime, end: datetime = None):
+        """Iterate over the Belgium SDAC"""
+        return EntsoeIndexingSetting.iter_query(api_key=api_key, country_code="BE", start=start, end=(datetime.now(utc) if end is None else end))
 
     @staticmethod
     def get_be_values(api_key: str, start: datetime, end: datetime = None):
         """Get the Belgium SDAC"""
-        return EntsoeIndexingSetting.query(api_key=api_key, country_code="BE", start=start, end=(datetime.now(utc) if end is None else end))
+        return list(EntsoeIndexingSetting.iter_be_values(api_key=api_key, start=start, end=end))
+
+    @staticmethod
+    def windows(start: datetime, end: datetime, size: timedelta = BACKFILL_WINDOW) -> list[tuple[datetime, datetime]]:
+        """Split the range in consecutive windows of at most the given size"""
+        windows = []
+        while start < end:
+            windows.append((start, min(start + size, end)))
+            start = windows[-1][1]
+        return windows
+
+    @staticmethod
+    def backfill(
+        api_key: str,
+        country_code: str,
+        start: datetime,
+        end: datetime,
+        on_window: Callable[[datetime, list[EntsoeIndexingSetting]], None],
+        deadline: float = None,
+        max_workers: int = 4,
+        rate_limiter: RateLimiter = None,
+        writes_per_second: float = None,
+    ) -> datetime:
+        """
+        Fetch the range window by window with concurrent requests and pass the values of every window, in order, to on_window
+
+        No new window is requested when it could not be stored before the deadline (a time.monotonic() value), taking the
+        expected time to write the hourly values of the windows in flight at the paced writes_per_second into account.
+        The return value is until when the range has been completed.
+        """
+        rate_limiter = RateLimiter(BACKFILL_REQUESTS_PER_SECOND) if rate_limiter is None else rate_limiter
+        windows = iter(EntsoeIndexingSetting.windows(start, end))
+
+        def fetch(window: tuple[datetime, datetime]) -> list[EntsoeIndexingSetting]:
+            """Fetch a single window within the rate limit, a window without data is empty so the backfill moves past it"""
+            rate_limiter.wait()
+            logs.info(logger, "Fetching window", country_code=country_code, start=window[0], end=window[1])
+            try:
+                return EntsoeIndexingSetting.query(api_key=api_key, country_code=country_code, start=window[0], end=window[1])
+            except NoMatchingData:
+                logs.warning(logger, "No data for window", country_code=country_code, start=window[0], end=window[1])
+                return []
+
+        def write_seconds(window: tuple[datetime, datetime]) -> float:
+            """The expected time to write the hourly values of a window"""
+            return 0.0 if writes_per_second is None else (window[1] - window[0]).total_seconds() / 3600 / writes_per_second
+
+        completed_until = start
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = deque()
+            window = next(windows, None)
+            while True:
+                # Keep the workers busy, but only with windows that can be stored in order before the deadline
+                while window is not None and len(in_flight) < max_workers:
+                    pending = sum(write_seconds(flight[0]) for flight in in_flight) + write_seconds(window)
+                    if deadline is not None and time.monotonic() + pending >= deadline:
+                        break
+                    in_flight.append((window, executor.submit(fetch, window)))
+                    window = next(windows, None)
+                if len(in_flight) == 0:
+                    break
+                (_window_start, window_end), future = in_flight.popleft()
+                on_window(window_end, future.result())
+                completed_until = window_end
+        return completed_until
 
     @staticmethod
     def fetch_api_key(secret_arn: str) -> str:
@@ -113,3 +254,96 @@ class EntsoeTimeSeries:
 
     def to_period(self) -> dict[datetime, float]:
         return {self.start_time + timedelta(hours=i): value for i, value in enumerate(self.period)}
+
+
+class EntsoeFeeder(FeederPlugin):
+    """
+    Feeder for the day-ahead prices of ENTSO-E, by default of the last 7 days until the day after tomorrow
+
+    Only the Belgian prices are fed, unless the event lists the bidding zones, e.g. `"zones": ["BE", "NL", "FR", "DE-LU"]`.
+    The zones are then fetched concurrently within the rate limit of the API and their values are written paced.
+    """
+
+    max_workers = 4
+
+    def __init__(self):
+        self.api_key = None
+        self.rate_limiter = RateLimiter(BACKFILL_REQUESTS_PER_SECOND)
+
+    @staticmethod
+    def date_range(event: dict) -> tuple[datetime, datetime]:
+        """Get the range of the values that are stored"""
+        if "start" in event and "end" in event:
+            return utc.localize(datetime.strptime(event["start"], "%Y/%m/%d")), utc.localize(datetime.strptime(event["end"], "%Y/%m/%d"))
+        now = datetime.now(timezone("Europe/Brussels")).replace(hour=0, minute=0, second=0, microsecond=0)  # Use BE timezone as we fetch "BE values"
+        return now - timedelta(days=7), now + timedelta(days=2)  # Also include tomorrow (so 'until' the day after tomorrow)
+
+    @staticmethod
+    def zones(event: dict) -> list[str]:
+        """Get the bidding zones that are fed"""
+        return event.get("zones", ["BE"])
+
+    def units(self, event: dict) -> list[str]:
+        zones = EntsoeFeeder.zones(event)
+        for zone in zones:
+            EntsoeIndexingSetting.lookup_area_code(zone)  # Fail before anything is requested
+        if self.api_key is None:
+            self.api_key = EntsoeIndexingSetting.fetch_api_key(os.environ["SECRET_ARN"])
+        return zones
+
+    def fetch(self, event: dict, unit: str) -> tuple[str, str]:
+        start, end = EntsoeFeeder.date_range(event)
+        self.rate_limiter.wait()
+        logs.info(logger, "Fetching values", country_code=unit, start=start, end=end)
+        return unit, EntsoeIndexingSetting.fetch_xml(self.api_key, unit, start, end, session=sessions.session())
+
+    def parse(self, event: dict, document: tuple[str, str]):
+        start, end = EntsoeFeeder.date_range(event)
+        zone, xml = document
+        return EntsoeIndexingSetting.parse_xml(zone, xml, start, end)
+
+    def save(self, db_table, values) -> int:
+        return EntsoeIndexingSetting.save_list(db_table, values)
+
+    def run(self, event: dict, context, db_table) -> dict:
+        if len(EntsoeFeeder.zones(event)) > 1:
+            db_table = as_paced_backend(db_table)
+        return super().run(event, context, db_table)
+
+
+class EntsoeBackfillFeeder(EntsoeFeeder):
+    """
+    Feeder that backfills the ENTSO-E values (from start until end as YYYY/MM/DD) and resumes from the checkpoint of a previous run
+
+    The bidding zones of the event (by default BE) are backfilled one after the other, each with its own checkpoint.
+    """
+
+    def run(self, event: dict, context, db_table) -> dict:
+        start = utc.localize(datetime.strptime(event["start"], "%Y/%m/%d"))
+        end = utc.localize(datetime.strptime(event["end"], "%Y/%m/%d"))
+        zones = self.units(event)
+        deadline = None
+        if hasattr(context, "get_remaining_time_in_millis"):
+            deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - BACKFILL_MARGIN_SECONDS
+
+        paced = as_paced_backend(db_table)
+        completed_until = end
+        for zone in zones:
+            job = f"ENTSO-E#{zone}#{start:%Y%m%d}#{end:%Y%m%d}"
+            checkpoint = BackfillCheckpoint.load(db_table, job)
+            resume_from = checkpoint.completed_until if checkpoint is not None else start
+
+            def save_window(window_end: datetime, index_values: list[EntsoeIndexingSetting], job: str = job):
+                """Store the values of a window within the write capacity of the table and record the progress"""
+                logger.info(f"Sending {len(index_values)} indexing settings until {window_end} to the database")
+                self.save(paced, index_values)
+                BackfillCheckpoint(job=job, completed_until=window_end).save(paced)
+
+            logger.info(f"Backfilling values of {zone} from {resume_from} until {end}")
+            zone_completed_until = EntsoeIndexingSetting.backfill(
+                self.api_key, zone, resume_from, end, save_window, deadline=deadline, writes_per_second=TABLE_WRITES_PER_SECOND
+            )
+            completed_until = min(completed_until, zone_completed_until)
+        if completed_until < end:
+            logger.info(f"Backfill stopped at {completed_until}, invoke again with the same event to resume")
+        return {"completed_until": completed_until.strftime("%Y/%m/%d %H:%M"), "done": completed_until >= end}
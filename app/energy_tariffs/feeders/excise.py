@@ -0,0 +1,28 @@
+"""Module for the excises, which are published in the law and thus defined here"""
+from __future__ import annotations
+
+from dao.excise import EnergyExcise
+from feeders.registry import FeederPlugin
+
+
+BE_EXCISE = EnergyExcise(
+    country="BE",
+    graduated_excise={0: 0.0425755, 3000: 0.04748, 20000: 0.04546, 50000: 0.04478, 1000000: 0.04411, 25000000: 0.03628},
+    energy_contribution=0.0019261,
+)
+
+
+class ExciseFeeder(FeederPlugin):
+    """Feeder for the excises"""
+
+    def units(self, event: dict) -> list[str]:
+        return [BE_EXCISE.country]
+
+    def fetch(self, event: dict, unit: str) -> EnergyExcise:
+        return BE_EXCISE
+
+    def parse(self, event: dict, document: EnergyExcise):
+        return [document]
+
+    def save(self, db_table, values) -> int:
+        return EnergyExcise.save_list(db_table, values)
@@ -1,20 +1,29 @@
 """Module for parsing Fluvius grid costs"""
 from __future__ import annotations
+from functools import partial
 from io import BytesIO
+from typing import Callable
 from urllib.parse import urlsplit, urlunsplit, urljoin
+import json
 
 from bs4 import BeautifulSoup, Tag
 import requests
 from openpyxl import load_workbook
 
 from dao.gridcost import EnergyDirection, EnergyGridCost
+from feeders.httpcache import CachedResponse, HttpCache, is_conditional
+from feeders.registry import FeederPlugin
 
 
 def extract_excel_url(url: str) -> str:
     """Get the Excel URL from a given URL"""
+    return excel_url_from_html(url, requests.get(url).text)
+
+
+def excel_url_from_html(url: str, html_text: str) -> str:
+    """Get the Excel URL from the HTML of the page at the given URL"""
     url_details = urlsplit(url)
     base_url = urlunsplit((url_details[0], url_details[1], "", "", ""))
-    html_text = requests.get(url).text
     soup = BeautifulSoup(html_text, "html.parser")
     file = soup.find("span", class_="file")
     file_link = file.find("a")
@@ -51,11 +60,12 @@ def iterate_subsection(article: Tag):
                     subsection_name = None
 
 
-def iterate_subsection_links(article: Tag, base_url: str):
-    """Iterate over the section links"""
+def iterate_subsection_links(article: Tag, base_url: str, excel_url: Callable[[str], str] = None):
+    """Iterate over the section links, of which the Excel URL is extracted from the linked page (by extract_excel_url by default)"""
+    excel_url = extract_excel_url if excel_url is None else excel_url
     for section_name, year, subsection_name, subsection in iterate_subsection(article):
         for link in subsection.find_all("a", href=True):
-            yield section_name, year, subsection_name, link.text, extract_excel_url(urljoin(base_url, link["href"]))
+            yield section_name, year, subsection_name, link.text, excel_url(urljoin(base_url, link["href"]))
 
 
 class FluviusParser:
@@ -64,49 +74,130 @@ class FluviusParser:
     @staticmethod
     def from_url() -> list[EnergyGridCost]:
         """Parse the values from URL"""
+        return list(FluviusParser.iter_url())
+
+    @staticmethod
+    def iter_links(html_text: str = None, excel_url: Callable[[str], str] = None):
+        """Iterate over the utility, direction, provider and Excel link of every tariff on the (given or requested) page"""
         url_details = urlsplit(FluviusParser.url)
         base_url = urlunsplit((url_details[0], url_details[1], "", "", ""))
-        html_text = requests.get(FluviusParser.url).text
+        if html_text is None:
+            html_text = requests.get(FluviusParser.url).text
         soup = BeautifulSoup(html_text, "html.parser")
 
         article = soup.find("article", class_="node--page")
-        return list(
-            filter(
-                lambda item: item is not None,
-                [
-                    FluviusParser.from_excel(name, subname, provider, link)
-                    for name, _year, subname, provider, link in iterate_subsection_links(article, base_url)
-                ],
-            )
-        )
+        for name, _year, subname, provider, link in iterate_subsection_links(article, base_url, excel_url):
+            yield name, subname, provider, link
+
+    @staticmethod
+    def iter_url():
+        """Parse the values from URL, downloading the next Excel file only after the previous grid cost was consumed"""
+        for name, subname, provider, link in FluviusParser.iter_links():
+            grid_cost = FluviusParser.from_excel(name, subname, provider, link)
+            if grid_cost is not None:
+                yield grid_cost
+
+    @staticmethod
+    def is_supported(utility: str, direction: str) -> bool:
+        """Check whether the grid costs of the tariff are stored, only the electricity drawdown for now"""
+        return utility == "Elektriciteit" and direction != "Injectie"
 
     @staticmethod
     def from_excel(utility: str, direction: str, provider: str, excel_link: str) -> EnergyGridCost:
         """Read the grid costs from excel"""
-        direction_enum = EnergyDirection.INJECTION if direction == "Injectie" else EnergyDirection.DRAWDOWN
-        if utility == "Elektriciteit" and direction_enum == EnergyDirection.DRAWDOWN:
+        if FluviusParser.is_supported(utility, direction):
             response = requests.get(excel_link)
-            wb = load_workbook(BytesIO(response.content))
-            ws = wb.active
-            peak_usage_avg_monthly_cost: float = ws["O15"].value
-            peak_usage_kwh: float = ws["O17"].value
-            data_management_standard: float = ws["O29"].value
-            data_management_dynamic: float = ws["O28"].value
-            public_services_kwh: float = ws["O32"].value
-            surcharges_kwh: float = ws["O35"].value
-            transmission_charges_kwh: float = ws["O37"].value
-
-            return EnergyGridCost(
-                "BE",
-                provider,
-                direction_enum,
-                peak_usage_avg_monthly_cost,
-                peak_usage_kwh,
-                data_management_standard,
-                data_management_dynamic,
-                public_services_kwh,
-                surcharges_kwh,
-                transmission_charges_kwh,
-            )
+            return FluviusParser.from_workbook(provider, response.content)
 
         return None
+
+    @staticmethod
+    def from_workbook(provider: str, content: bytes) -> EnergyGridCost:
+        """Read the electricity drawdown grid costs from the content of the Excel file"""
+        wb = load_workbook(BytesIO(content))
+        ws = wb.active
+        peak_usage_avg_monthly_cost: float = ws["O15"].value
+        peak_usage_kwh: float = ws["O17"].value
+        data_management_standard: float = ws["O29"].value
+        data_management_dynamic: float = ws["O28"].value
+        public_services_kwh: float = ws["O32"].value
+        surcharges_kwh: float = ws["O35"].value
+        transmission_charges_kwh: float = ws["O37"].value
+
+        return EnergyGridCost(
+            "BE",
+            provider,
+            EnergyDirection.DRAWDOWN,
+            peak_usage_avg_monthly_cost,
+            peak_usage_kwh,
+            data_management_standard,
+            data_management_dynamic,
+            public_services_kwh,
+            surcharges_kwh,
+            transmission_charges_kwh,
+        )
+
+
+class FluviusFeeder(FeederPlugin):
+    """Feeder for the Fluvius grid costs"""
+
+    def __init__(self):
+        self.cache = None
+        self.providers = None  # The providers of the tariffs that are published, listed by units
+        self.countries = set()  # The countries of which the partition is rewritten in this run
+
+    def prepare(self, event: dict, db_table):
+        self.cache = HttpCache(db_table)
+        self.countries = set()
+
+    def page(self, event: dict, url: str, derive: Callable[[str], str]) -> str:
+        """Get the value derived from the page, which is only derived again when the page changed"""
+        response = self.cache.get(url, conditional=is_conditional(event))
+        if response.unchanged and response.data is not None:
+            return response.data
+        if response.content is None:
+            response = self.cache.get(url, conditional=False)
+        data = derive(response.text)
+        self.cache.store(response, data)
+        return data
+
+    def units(self, event: dict) -> list[tuple[str, str]]:
+        # The tariff page is only parsed when it changed, and so is the page with the link of the workbook of a tariff
+        pages = self.page(event, FluviusParser.url, lambda html_text: json.dumps(list(FluviusParser.iter_links(html_text, excel_url=lambda url: url))))
+        units = [
+            (provider, self.page(event, page_url, partial(excel_url_from_html, page_url)))
+            for utility, direction, provider, page_url in json.loads(pages)
+            if FluviusParser.is_supported(utility, direction)
+        ]
+        self.providers = {provider for provider, _link in units}
+        return units
+
+    def unit_id(self, unit: tuple[str, str]) -> str:
+        return unit[0]
+
+    def host(self, unit: tuple[str, str]) -> str:
+        return urlsplit(unit[1]).netloc
+
+    def fetch(self, event: dict, unit: tuple[str, str]) -> tuple[str, CachedResponse]:
+        # Every grid cost is written while the next Excel file is downloaded
+        provider, link = unit
+        response = self.cache.get(link, conditional=is_conditional(event))
+        return None if response.unchanged else (provider, response)
+
+    def parse(self, event: dict, document: tuple[str, CachedResponse]):
+        provider, response = document
+        return [FluviusParser.from_workbook(provider, response.content)]
+
+    def commit(self, unit: tuple[str, str], document: tuple[str, CachedResponse]):
+        self.cache.store(document[1])
+
+    def save(self, db_table, values) -> int:
+        grid_costs = list(values)
+        if self.providers:
+            # The partition of the country of the parsed grid costs is rewritten to the published providers, once per run
+            parsed = {grid_cost.grid_provider for grid_cost in grid_costs}
+            for country in sorted({grid_cost.country for grid_cost in grid_costs} - self.countries):
+                self.countries.add(country)
+                restored = EnergyGridCost.replace_country(db_table, country, self.providers)
+                grid_costs += [grid_cost for grid_cost in restored if grid_cost.grid_provider not in parsed]
+        return EnergyGridCost.save_list(db_table, grid_costs)
@@ -0,0 +1,80 @@
+"""
+HTTP cache of the scraped documents
+
+The Engie pages, the Fluvius pages and the Fluvius workbooks change about once a month, but are requested on every run.
+The ETag, Last-Modified and SHA-256 of the content of every processed document are kept in the table, so the next run
+sends a conditional request. A document that is not modified (304) or that has the same content is reported as
+unchanged, and its values are neither parsed nor written again. The entry of a document is only stored after its
+values were saved, so a failed run processes the document again. A run with `"refresh": true` or for a range of dates
+processes every document.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+
+import requests
+
+from dao.httpcache import HttpCacheEntry
+from feeders import sessions
+
+
+def is_conditional(event: dict) -> bool:
+    """Check whether the run only processes the changed documents"""
+    return not event.get("refresh", False) and "start" not in event
+
+
+@dataclass
+class CachedResponse:
+    """The response of a (conditional) request"""
+
+    url: str
+    content: bytes  # None when the document was not modified
+    content_hash: str
+    etag: str = None
+    last_modified: str = None
+    encoding: str = None
+    unchanged: bool = False
+    data: str = None  # The value that was derived from the unchanged document by the previous run
+
+    @property
+    def text(self) -> str:
+        """Get the decoded content"""
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpCache:
+    """Cache of the validators of the documents in the table"""
+
+    def __init__(self, db_table, session: requests.Session = None):
+        self.db_table = db_table
+        self.session = session
+
+    def get(self, url: str, conditional: bool = True) -> CachedResponse:
+        """Request the document, conditionally on the processed version unless disabled, raises an HTTPError on failure"""
+        entry = HttpCacheEntry.load(self.db_table, url) if conditional else None
+        headers = {}
+        if entry is not None and entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        response = (self.session or sessions.session()).get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            return CachedResponse(url, None, entry.content_hash, entry.etag, entry.last_modified, unchanged=True, data=entry.data)
+        response.raise_for_status()
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        unchanged = entry is not None and entry.content_hash == content_hash
+        return CachedResponse(
+            url=url,
+            content=response.content,
+            content_hash=content_hash,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            encoding=response.encoding,
+            unchanged=unchanged,
+            data=entry.data if unchanged else None,
+        )
+
+    def store(self, response: CachedResponse, data: str = None):
+        """Record that the document is processed, with the value that was derived from it"""
+        data = data if data is not None else response.data
+        HttpCacheEntry(response.url, response.content_hash, response.etag, response.last_modified, data).save(self.db_table)
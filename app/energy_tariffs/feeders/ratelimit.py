@@ -0,0 +1,21 @@
+"""Module for limiting the request rate towards the data sources"""
+from threading import Lock
+import time
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces the calls over all threads to a maximum rate"""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1.0 / calls_per_second
+        self.lock = Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        """Wait until the next call is allowed"""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(self.next_time, now) + self.interval
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,98 @@
+"""
+Registry of the feeder plugins
+
+Every feed name maps to the plugin class that feeds it, referenced as `module:Class`. The module of a plugin is only
+imported when its feed runs, so a run of the excises does not load bs4, openpyxl or holidays. A new source is added by
+writing a plugin and registering it here (or with `register`), without touching the dispatcher in lambda_feeder.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from importlib import import_module
+from typing import Iterable
+
+from feeders import runner
+
+
+FEEDERS = {
+    "engie": "feeders.engie:EngieFeeder",
+    "engie_backfill": "feeders.engie:EngieBackfillFeeder",
+    "eex": "feeders.eex:EEXFeeder",
+    "entsoe": "feeders.entsoe:EntsoeFeeder",
+    "entsoe_backfill": "feeders.entsoe:EntsoeBackfillFeeder",
+    "fluvius": "feeders.fluvius:FluviusFeeder",
+    "excises": "feeders.excise:ExciseFeeder",
+}
+# The feeds that run for `"feed": "all"`, the backfills need a range and are only run on their own
+ALL_FEEDS = ["entsoe", "eex", "engie", "fluvius", "excises"]
+
+
+class FeederPlugin:
+    """
+    Interface of a feeder plugin
+
+    A run splits the source in units, e.g. the pages, indexes or bidding zones. The document of every unit is fetched
+    (with retries), its values are parsed and saved while the next document is fetched. Afterwards the values that are
+    derived from the stored values are saved. See feeders.runner for the report of a run.
+    """
+
+    name: str = None  # The feed name, set when the plugin is loaded
+    max_workers: int = 1  # The units that are fetched concurrently
+    depends_on: tuple[str, ...] = ()  # The feeds of which the values are used, which run first when run together
+
+    def prepare(self, event: dict, db_table):
+        """Prepare the run on the table, e.g. the HTTP cache of the documents, nothing by default"""
+
+    def units(self, event: dict) -> Iterable:
+        """Get the units of the source, e.g. the URLs of the pages"""
+        raise NotImplementedError("Method for listing the units not implemented")
+
+    def unit_id(self, unit) -> str:
+        """Get the identifier of a unit in the report, which reruns the unit when listed in the `units` of the event"""
+        return str(unit)
+
+    def host(self, unit) -> str:
+        """Get the host of a unit, of which the circuit is opened after failures, by default a single host per feed"""
+        return self.name
+
+    def fetch(self, event: dict, unit):
+        """Fetch the document of a unit, e.g. the HTML page or JSON response, or None when it did not change since the last run"""
+        raise NotImplementedError("Method for fetching a document not implemented")
+
+    def parse(self, event: dict, document) -> Iterable:
+        """Parse the values from a single document"""
+        raise NotImplementedError("Method for parsing a document not implemented")
+
+    def commit(self, unit, document):
+        """Record that the values of the document of a unit are saved, nothing by default"""
+
+    def derive(self, db_table, event: dict) -> list:
+        """Calculate the values derived from the stored values, none by default"""
+        return []
+
+    def save(self, db_table, values: Iterable) -> int:
+        """Save the values, returns the number of values"""
+        raise NotImplementedError("Method for saving the values not implemented")
+
+    def run(self, event: dict, context, db_table) -> dict:
+        """Fetch, parse and save the values of every unit and then the derived values, returns the report of the run"""
+        return runner.run(self, event, db_table)
+
+
+def register(name: str, spec: str):
+    """Register the plugin class (as `module:Class`) for the feed name"""
+    FEEDERS[name] = spec
+    plugin_class.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def plugin_class(name: str) -> type:
+    """Import the module of the plugin for the feed name and get its class, raises a KeyError for an unknown feed"""
+    module_name, class_name = FEEDERS[name].split(":")
+    return getattr(import_module(module_name), class_name)
+
+
+def load(name: str) -> FeederPlugin:
+    """Create the plugin for the feed name, raises a KeyError for an unknown feed"""
+    plugin = plugin_class(name)()
+    plugin.name = name
+    return plugin
@@ -0,0 +1,200 @@
+"""
+Resilient runner of the feeder plugins
+
+A feed is split in units of work, e.g. a page, an index or a bidding zone. Every unit is fetched with retries of the
+transient errors and an exponential backoff, and its values are saved as soon as it is parsed, so a failing unit does
+not lose the units that were already completed. After a number of units of the same host failed, the circuit of that
+host is opened and its remaining units are not requested anymore. A unit of which the document did not change since
+the last run is neither parsed nor saved. The report of the run lists the completed, unchanged and failed units; the
+handler fails the invocation when a unit failed, and invoking the feed again with `"units": [...]` of the failed units
+only reruns those. When several feeds run together, the units are listed per feed, e.g. `"units": {"engie": [...]}`.
+A run over an explicit `start` records a checkpoint when it saved values, as it may rewrite historic values (see
+dao.snapshot).
+
+    RETRY_ATTEMPTS          the attempts to fetch a unit (default 3)
+    RETRY_BACKOFF_SECONDS   the wait before the second attempt, doubled for every next attempt (default 1)
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Callable, TYPE_CHECKING
+import logging
+import os
+import time
+
+from pytz import utc
+
+import logs
+from dao.checkpoint import BackfillCheckpoint
+
+if TYPE_CHECKING:  # pragma: no cover
+    from feeders.registry import FeederPlugin
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+RETRY_ATTEMPTS = int(os.environ.get("RETRY_ATTEMPTS", 3))
+RETRY_BACKOFF_SECONDS = float(os.environ.get("RETRY_BACKOFF_SECONDS", 1))
+CIRCUIT_THRESHOLD = 2  # The consecutive failed units of a host that open its circuit
+
+
+class FeedFailed(Exception):
+    """Units of the feeds failed, raised after the completed units were saved"""
+
+    def __init__(self, reports: list[dict]):
+        self.reports = reports
+        failed = [f"{report['feed']}/{failure['unit']}" for report in reports for failure in report.get("failed", [])]
+        super().__init__(f"Failed units: {', '.join(failed)}")
+
+
+class CircuitOpen(Exception):
+    """The circuit of the host is open, so the unit is not requested"""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker per host, opened after consecutive failures"""
+
+    def __init__(self, threshold: int = CIRCUIT_THRESHOLD):
+        self.threshold = threshold
+        self.failures = {}
+        self.lock = Lock()
+
+    def is_open(self, host: str) -> bool:
+        """Check whether the host should not be requested anymore"""
+        with self.lock:
+            return self.failures.get(host, 0) >= self.threshold
+
+    def record(self, host: str, success: bool):
+        """Record the outcome of a unit of the host"""
+        with self.lock:
+            self.failures[host] = 0 if success else self.failures.get(host, 0) + 1
+
+
+@dataclass
+class Outcome:
+    """The outcome of fetching a single unit"""
+
+    document: object = None
+    error: Exception = None
+    attempts: int = 0
+    interrupted: bool = False  # The attempts were cut short by the circuit of the host, which already counted its failures
+
+
+@dataclass
+class RunReport:
+    """The report of a run"""
+
+    feed: str
+    saved: int = 0
+    derived: int = 0
+    completed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    failed: list[dict] = field(default_factory=list)
+
+    def fail(self, unit: str, error: Exception, attempts: int):
+        """Record a failed unit"""
+        self.failed.append({"unit": unit, "error": f"{type(error).__name__}: {error}", "attempts": attempts})
+        logs.error(logger, "Failed unit", feed=self.feed, unit=unit, error=self.failed[-1]["error"], attempts=attempts)
+
+    def to_dict(self) -> dict:
+        """Get the report as a JSON serialisable dict"""
+        return {
+            "feed": self.feed,
+            "saved": self.saved,
+            "derived": self.derived,
+            "completed": self.completed,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+        }
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether the error is transient: a connection error, a timeout or an HTTP 429 or 5xx response"""
+    import requests  # Only used once a unit failed, the feeders that request documents imported it already
+
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is not None and (status == 429 or status >= 500)
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+def retry(func: Callable[[], object], attempts: int = None, backoff: float = None, is_open: Callable[[], bool] = None) -> Outcome:
+    """Call the function until it succeeds or fails with an error that is not transient, waiting longer between every next attempt"""
+    attempts = RETRY_ATTEMPTS if attempts is None else attempts
+    backoff = RETRY_BACKOFF_SECONDS if backoff is None else backoff
+    outcome = Outcome()
+    for attempt in range(attempts):
+        if is_open is not None and is_open():
+            outcome.error, outcome.interrupted = outcome.error or CircuitOpen("Circuit open after failures of the host"), True
+            return outcome
+        outcome.attempts += 1
+        try:
+            outcome.document, outcome.error = func(), None
+            return outcome
+        except Exception as exc:
+            outcome.error = exc
+            if not is_transient(exc):
+                return outcome
+            logs.warning(logger, "Attempt failed", attempt=outcome.attempts, error=f"{type(exc).__name__}: {exc}")
+            if attempt < attempts - 1:
+                time.sleep(backoff * 2**attempt)
+    return outcome
+
+
+def run(plugin: FeederPlugin, event: dict, db_table) -> dict:
+    """Run the units of the plugin, returns the report of the run"""
+    report = RunReport(feed=plugin.name)
+    plugin.prepare(event, db_table)
+    listing = retry(lambda: list(plugin.units(event)))
+    if listing.error is not None:
+        report.fail("units", listing.error, listing.attempts)
+        return report.to_dict()
+    units = listing.document
+    selected = event.get("units")
+    if isinstance(selected, dict):
+        # The units of the feeds that run together, the feeds that are not listed run all their units
+        selected = selected.get(plugin.name)
+    if selected is not None:
+        # A rerun of (the failed) units only
+        units = [unit for unit in units if plugin.unit_id(unit) in selected]
+
+    breaker = CircuitBreaker()
+
+    def fetch(unit) -> Outcome:
+        host = plugin.host(unit)
+        outcome = retry(lambda: plugin.fetch(event, unit), is_open=lambda: breaker.is_open(host))
+        if not outcome.interrupted:
+            breaker.record(host, outcome.error is None)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=max(1, plugin.max_workers)) as executor:
+        # The next units are fetched while a unit is parsed and saved, in the order of the units
+        for unit, outcome in zip(units, executor.map(fetch, units)):
+            unit_id = plugin.unit_id(unit)
+            if outcome.error is not None:
+                report.fail(unit_id, outcome.error, outcome.attempts)
+                continue
+            if outcome.document is None:
+                report.unchanged.append(unit_id)
+                continue
+            try:
+                report.saved += plugin.save(db_table, plugin.parse(event, outcome.document))
+                plugin.commit(unit, outcome.document)
+                report.completed.append(unit_id)
+            except Exception as exc:
+                report.fail(unit_id, exc, outcome.attempts)
+
+    if "start" in event and report.saved > 0:
+        # A run over an explicit range may rewrite historic values, which supersedes the snapshots exported before
+        BackfillCheckpoint(job=f"{plugin.name}#{event['start']}", completed_until=datetime.now(utc)).save(db_table)
+
+    try:
+        derived = plugin.derive(db_table, event)
+        if len(derived) > 0:
+            plugin.save(db_table, derived)
+        report.derived = len(derived)
+    except Exception as exc:
+        report.fail("derive", exc, 1)
+    return report.to_dict()
@@ -0,0 +1,26 @@
+"""
+Shared HTTP session of the feeders
+
+The feeds that run in the same invocation reuse the connections of a single session, of which the connection pools are
+sized for the concurrent units of the feeds. The pools of urllib3 are thread-safe, and the feeders only send plain GET
+requests without cookies or authentication headers on the session. The EEX web service keeps its own session, as it
+requires browser headers.
+"""
+from __future__ import annotations
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+POOL_SIZE = 10  # The connections that are kept per host
+
+
+@lru_cache(maxsize=None)
+def session() -> requests.Session:
+    """Get the shared session, which is created on the first request"""
+    shared = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    shared.mount("https://", adapter)
+    shared.mount("http://", adapter)
+    return shared
@@ -1,33 +1,30 @@
 """Module for the API lambda handler"""
-import json
 import os
 import logging
 
 import boto3
 
+import logs
 from api import Api
-from api.result import BadRequest
+from profiling import profiled
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+@profiled("api")
 def handler(event, _context):
     """The handler"""
-    logger.info(json.dumps(event))
+    logs.info(logger, "Received event", path=event.get("path"), method=event.get("httpMethod"), event=logs.Payload(event))
     dynamodb = boto3.resource("dynamodb")
     db_table = dynamodb.Table(os.environ["TABLE_NAME"])
+    if os.path.exists(os.environ.get("SNAPSHOT_PATH", "")):
+        # Serve the historic data from the snapshot, e.g. shipped in a layer, and only newer data from DynamoDB
+        from dao.snapshot import SnapshotBackend, open_snapshot
+        from dao.storage import DynamoDBBackend
+
+        db_table = SnapshotBackend(open_snapshot(os.environ["SNAPSHOT_PATH"]), DynamoDBBackend(db_table))
     base_path = os.environ["API_BASE_PATH"]
     api = Api(base_path, db_table)
-    method = api.parse(event)
-
-    if method is not None:
-        # Process the messages when we could parse it
-        logger.info(f"Processing the event using the {method.__class__.__name__} method")
-        result = method.process()
-        logger.info(f"Returning {json.dumps(result.to_api())}")
-        return result.to_api()
-
-    logger.warning("Returning Bad Request as we were not able to find a suitable processing method")
-    return BadRequest("No method found for processing").to_api()
+    return api.handle(event)
@@ -1,117 +1,94 @@
 """Module for the feeder lambda handler"""
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from graphlib import TopologicalSorter
 import os
 import logging
 
 import boto3
-from pytz import utc, timezone
 
-from feeders.engie import EngieIndexingSetting
-from feeders.eex import EEXIndexingSetting
-from feeders.entsoe import EntsoeIndexingSetting
-from feeders.fluvius import FluviusParser, EnergyGridCost
-from dao.excise import EnergyExcise
+import logs
+from dao.storage import as_paced_backend
+from profiling import profiled
+from feeders import registry
+from feeders.runner import FeedFailed
 
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def engie_handler(event, _context):
-    """The Engie handler"""
-    tz_be = timezone("Europe/Brussels")  # Use BE timezone as we will be fetching "BE values"
-    if "start" in event:
-        not_before = tz_be.localize(datetime.strptime(event["start"], "%Y/%m/%d"))
-    else:
-        not_before = datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90)
-    index_values = EngieIndexingSetting.get_gas_values(not_before) + EngieIndexingSetting.get_energy_values(not_before)
-    dynamodb = boto3.resource("dynamodb")
-    db_table = dynamodb.Table(os.environ["TABLE_NAME"])
-    logger.info(f"Sending {len(index_values)} indexing settings to the database")
-    EngieIndexingSetting.save_list(db_table, index_values)
-
-    # Derived values
-    calculation_date = None
-    if "calculate" in event:
-        calculation_date = tz_be.localize(datetime.strptime(event["calculate"], "%Y/%m/%d"))
-    derived_values = EngieIndexingSetting.calculate_derived_values(db_table, calculation_date)
-    logger.info(f"Sending {len(derived_values)} derived indexing settings to the database")
-    EngieIndexingSetting.save_list(db_table, derived_values)
-
-
-def eex_handler(event, _context):
-    """The EEX handler"""
-    if "start" in event and "end" in event:
-        not_before = utc.localize(datetime.strptime(event["start"], "%Y/%m/%d")).date()
-        not_after = utc.localize(datetime.strptime(event["end"], "%Y/%m/%d")).date()
-    else:
-        not_before = (datetime.now(utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)).date()
-        not_after = None
-    index_values = EEXIndexingSetting.get_ztp_values(date_filter=not_before, end=not_after) + EEXIndexingSetting.get_zee_values(
-        date_filter=not_before, end=not_after
-    )
-    dynamodb = boto3.resource("dynamodb")
-    db_table = dynamodb.Table(os.environ["TABLE_NAME"])
-    logger.info(f"Sending {len(index_values)} indexing settings to the database")
-    EEXIndexingSetting.save_list(db_table, index_values)
-
-
-def entsoe_handler(event, _context):
-    """The ENTSO-E handler"""
-    if "start" in event and "end" in event:
-        not_before = utc.localize(datetime.strptime(event["start"], "%Y/%m/%d"))
-        not_after = utc.localize(datetime.strptime(event["end"], "%Y/%m/%d"))
-    else:
-        tz_be = timezone("Europe/Brussels")  # Use BE timezone as we will be fetching "BE values"
-        now = datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0)
-        not_before = now - timedelta(days=7)
-        not_after = now + timedelta(days=2)  # Also include tomorrow (so 'until' the day after tomorrow)
-    logger.info(f"Fetching values from {not_before} until {not_after}")
-    api_key = EntsoeIndexingSetting.fetch_api_key(os.environ["SECRET_ARN"])
-    index_values = EntsoeIndexingSetting.get_be_values(api_key=api_key, start=not_before, end=not_after)
+def create_table():
+    """Create the handle of the table"""
     dynamodb = boto3.resource("dynamodb")
-    db_table = dynamodb.Table(os.environ["TABLE_NAME"])
-    logger.info(f"Sending {len(index_values)} indexing settings to the database")
-    EntsoeIndexingSetting.save_list(db_table, index_values)
-
-
-def fluvius_handler(event, _context):
-    """The Fluvius handler"""
-    logger.info(f"Fetching values from {FluviusParser.url}")
-    grid_costs = FluviusParser.from_url()
-    dynamodb = boto3.resource("dynamodb")
-    db_table = dynamodb.Table(os.environ["TABLE_NAME"])
-    logger.info(f"Sending {len(grid_costs)} Fluvius grid costs to the database")
-    EnergyGridCost.save_list(db_table, grid_costs)
-
-
-def excises_handler(event, _context):
-    """The excises handler"""
-    logger.info("Pushing values for BE")
-    be_excise = EnergyExcise(
-        country="BE",
-        graduated_excise={0: 0.0425755, 3000: 0.04748, 20000: 0.04546, 50000: 0.04478, 1000000: 0.04411, 25000000: 0.03628},
-        energy_contribution=0.0019261,
-    )
-    dynamodb = boto3.resource("dynamodb")
-    db_table = dynamodb.Table(os.environ["TABLE_NAME"])
-    be_excise.save(db_table)
-
-
+    return dynamodb.Table(os.environ["TABLE_NAME"])
+
+
+def run_feed(feeder: str, event, context) -> dict:
+    """Run the plugin of the feed within the write budget of the table, only its own modules are imported"""
+    plugin = registry.load(feeder)
+    report = plugin.run(event, context, as_paced_backend(create_table()))
+    logs.info(logger, "Completed the feeder", feed=feeder, report=report)
+    if is_failed(report):
+        raise FeedFailed([report])
+    return report
+
+
+def is_failed(report: dict) -> bool:
+    """Check whether units of the feed failed, or the feed was skipped"""
+    return len(report.get("failed", [])) > 0 or len(report.get("skipped", [])) > 0
+
+
+def run_feeds(feeders: list[str], event, context) -> list[dict]:
+    """
+    Run the plugins of the feeds concurrently, sharing the table handle, the HTTP session and the write budget
+
+    A feed only starts after the feeds it depends on (that run as well) completed, e.g. the Engie derived values are
+    calculated from the ENTSO-E and EEX values of the same run. A feed of which a dependency failed (or was skipped) is
+    skipped, its report lists those dependencies. The reports are in the order of the feeds, and are raised as
+    FeedFailed after all feeds ran when a unit of any feed failed or a feed was skipped.
+    """
+    if len(feeders) > 1 and isinstance(event.get("units"), list):
+        raise ValueError('The units of the feeds that run together are listed per feed, e.g. {"units": {"engie": [...]}}')
+    plugins = {feeder: registry.load(feeder) for feeder in feeders}
+    db_table = as_paced_backend(create_table())
+    dependencies = {feeder: [dependency for dependency in plugin.depends_on if dependency in plugins] for feeder, plugin in plugins.items()}
+    futures = {}
+
+    def run(feeder: str) -> dict:
+        """Run a single feed after its dependencies, a failing feed is reported instead of failing the other feeds"""
+        failed = [dependency for dependency in dependencies[feeder] if is_failed(futures[dependency].result())]
+        if len(failed) > 0:
+            logs.warning(logger, "Skipped the feeder, its dependencies failed", feed=feeder, dependencies=",".join(failed))
+            return {"feed": feeder, "skipped": failed}
+        try:
+            report = plugins[feeder].run(event, context, db_table)
+        except Exception as exc:
+            report = {"feed": feeder, "failed": [{"unit": "run", "error": f"{type(exc).__name__}: {exc}", "attempts": 1}]}
+        logs.info(logger, "Completed the feeder", feed=feeder, report=report)
+        return report
+
+    # Every feed has its own worker, so the feeds that wait for their dependencies do not block the dependencies
+    with ThreadPoolExecutor(max_workers=max(1, len(plugins))) as executor:
+        for feeder in TopologicalSorter(dependencies).static_order():
+            futures[feeder] = executor.submit(run, feeder)
+    reports = [futures[feeder].result() for feeder in plugins]
+    if any(is_failed(report) for report in reports):
+        raise FeedFailed(reports)
+    return reports
+
+
+@profiled("feeder")
 def handler(event, context):
     """The handler"""
-    if "feed" in event:
-        feeder = event["feed"]
-        logger.info(f"Initiating {feeder} handler")
-        if feeder == "engie":
-            engie_handler(event, context)
-        if feeder == "eex":
-            eex_handler(event, context)
-        if feeder == "entsoe":
-            entsoe_handler(event, context)
-        if feeder == "fluvius":
-            fluvius_handler(event, context)
-        if feeder == "excises":
-            excises_handler(event, context)
+    if "feed" in event or "feeds" in event:
+        feeders = registry.ALL_FEEDS if event.get("feed") == "all" else event.get("feeds", [event.get("feed")])
+        logs.info(logger, "Initiating the feeder", feed=",".join(feeders), event=logs.Payload(event))
+        unknown = [feeder for feeder in feeders if feeder not in registry.FEEDERS]
+        if len(unknown) > 0:
+            logs.warning(logger, "No feeder registered, so skipping...", feed=",".join(unknown))
+            return None
+        if "feed" in event and event["feed"] != "all":
+            return run_feed(event["feed"], event, context)
+        return run_feeds(feeders, event, context)
     else:
         logger.info("No feed defined, so skipping...")
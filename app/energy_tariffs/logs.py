@@ -0,0 +1,103 @@
+"""
+Structured logging with lazily serialised, sampled and truncated payloads
+
+A record is a single JSON object: the message plus its fields. Nothing is serialised unless the record is emitted, and
+large payloads (events, request and response bodies) are only attached to a sample of the records and truncated, as
+serialising them costs more than answering a batch request. Warnings and errors always carry their payloads in full.
+
+    LOG_PAYLOAD_SAMPLE_RATE     fraction of the records that carry their payloads (default 0.1)
+    LOG_PAYLOAD_MAX_CHARS       payloads are truncated to this many characters (default 2048)
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import logging
+import os
+import random
+
+from serializer import dumps
+
+
+@dataclass
+class LogSettings:
+    """The payload settings of the structured records"""
+
+    sample_rate: float = 0.1
+    max_chars: int = 2048
+
+    @classmethod
+    def from_env(cls) -> LogSettings:
+        """Read the settings from the environment"""
+        return cls(
+            sample_rate=float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", cls.sample_rate)),
+            max_chars=int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", cls.max_chars)),
+        )
+
+
+SETTINGS = LogSettings.from_env()
+
+
+class Payload:
+    """Payload field of a record, only serialised when the record is emitted"""
+
+    __slots__ = ("value", "raw")
+
+    def __init__(self, value, raw: bool = False):
+        self.value = value
+        self.raw = raw  # The value is already a JSON text, e.g. a response body
+
+    def render(self, max_chars: int) -> str:
+        """Get the JSON text of the payload, a truncated string when it is longer than max_chars (None for no limit)"""
+        text = (self.value or "null") if self.raw else dumps(self.value)
+        if max_chars is not None and len(text) > max_chars:
+            return dumps(f"{text[:max_chars]}... ({len(text)} chars)")
+        return text
+
+
+class Record:
+    """Structured record that is only serialised when it is formatted"""
+
+    __slots__ = ("message", "fields", "full", "sampled")
+
+    def __init__(self, message: str, fields: dict, full: bool, sampled: bool):
+        self.message = message
+        self.fields = fields
+        self.full = full  # Payloads are not truncated
+        self.sampled = sampled  # Payloads are included
+
+    def __str__(self) -> str:
+        max_chars = None if self.full else SETTINGS.max_chars
+        parts = [f'"message":{dumps(self.message)}']
+        for key, value in self.fields.items():
+            if isinstance(value, Payload):
+                if not self.sampled:
+                    continue
+                parts.append(f"{dumps(key)}:{value.render(max_chars)}")
+            else:
+                parts.append(f"{dumps(key)}:{dumps(value)}")
+        if not self.sampled:
+            parts.append('"sampled":false')
+        return "{" + ",".join(parts) + "}"
+
+
+def log(logger: logging.Logger, level: int, message: str, **fields):
+    """Log a structured record, warnings and errors always include their payloads in full"""
+    if not logger.isEnabledFor(level):
+        return
+    full = level >= logging.WARNING
+    sampled = full or SETTINGS.sample_rate >= 1 or random.random() < SETTINGS.sample_rate
+    logger.log(level, "%s", Record(message, fields, full, sampled))
+
+
+def info(logger: logging.Logger, message: str, **fields):
+    """Log a structured record at INFO level"""
+    log(logger, logging.INFO, message, **fields)
+
+
+def warning(logger: logging.Logger, message: str, **fields):
+    """Log a structured record at WARNING level"""
+    log(logger, logging.WARNING, message, **fields)
+
+
+def error(logger: logging.Logger, message: str, **fields):
+    """Log a structured record at ERROR level"""
+    log(logger, logging.ERROR, message, **fields)
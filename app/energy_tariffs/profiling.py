@@ -0,0 +1,111 @@
+"""
+Opt-in profiling of the lambda handlers with cProfile and tracemalloc
+
+Profiling is enabled for every invocation with the environment variable PROFILE=1, or for a single invocation with
+`"profile": true` in the event, e.g. of a test invocation of the lambda. A request header does not enable it, as any
+caller of the public API could then inflate the duration and memory of its invocations. The top hotspots and allocation
+sites are logged as a structured record. With PROFILE_DUMP=1 the raw profile is also written to /tmp, to inspect it
+with e.g. `python -m pstats` or snakeviz after a local run.
+
+    PROFILE_TOP         the number of hotspots and allocation sites in the summary (default 15)
+    PROFILE_DIR         the directory for the raw profiles (default /tmp)
+"""
+from __future__ import annotations
+from functools import wraps
+from typing import Callable, TYPE_CHECKING
+import logging
+import os
+import time
+
+import logs
+
+if TYPE_CHECKING:  # pragma: no cover
+    import cProfile
+    import tracemalloc
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+TRUE_VALUES = ("1", "true", "yes")
+
+
+def is_enabled(event) -> bool:
+    """Check whether the invocation should be profiled"""
+    if os.environ.get("PROFILE", "").lower() in TRUE_VALUES:
+        return True
+    return isinstance(event, dict) and event.get("profile") is True
+
+
+def hotspots(profile: cProfile.Profile, top: int) -> list[dict]:
+    """Get the functions with the most cumulative time"""
+    import io
+    import pstats
+
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_primitive_calls, calls, own_time, cumulative_time, _callers) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": calls,
+                "own_ms": round(own_time * 1000, 3),
+                "cumulative_ms": round(cumulative_time * 1000, 3),
+            }
+        )
+    return sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def allocations(snapshot: tracemalloc.Snapshot, top: int) -> list[dict]:
+    """Get the lines that hold the most memory"""
+    return [
+        {"line": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", "kib": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+def profiled(name: str) -> Callable:
+    """Decorator for a lambda handler that profiles the invocations for which profiling is enabled"""
+
+    def decorator(handler: Callable) -> Callable:
+        @wraps(handler)
+        def wrapper(event, context):
+            if not is_enabled(event):
+                return handler(event, context)
+
+            # The profilers are only imported when they are used, to keep them out of the cold start
+            import cProfile
+            import tracemalloc
+
+            top = int(os.environ.get("PROFILE_TOP", 15))
+            profile = cProfile.Profile()
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                return profile.runcall(handler, event, context)
+            finally:
+                duration = time.perf_counter() - start
+                snapshot = tracemalloc.take_snapshot()
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                path = None
+                if os.environ.get("PROFILE_DUMP", "").lower() in TRUE_VALUES:
+                    path = os.path.join(os.environ.get("PROFILE_DIR", "/tmp"), f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.prof")
+                    profile.dump_stats(path)
+                logs.info(
+                    logger,
+                    "Profiled the invocation",
+                    handler=name,
+                    duration_ms=round(duration * 1000, 3),
+                    peak_kib=round(peak_bytes / 1024, 1),
+                    hotspots=hotspots(profile, top),
+                    allocations=allocations(snapshot, top),
+                    profile_path=path,
+                )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,63 @@
+"""Module for serialising the API payloads and the log records to JSON"""
+from __future__ import annotations
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from functools import lru_cache
+import json
+
+try:
+    import orjson  # A dependency of the lambdas (see the Pipfile), the stdlib fallback only serves environments without it
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> tuple[str, ...]:
+    """Get the (cached) field names of a dataclass type"""
+    return tuple(field.name for field in fields(cls))
+
+
+def to_dict(obj) -> dict:
+    """Encode a (flat) dataclass to a dict, translating enums to their name"""
+    result = {}
+    for name in _field_names(type(obj)):
+        value = getattr(obj, name)
+        result[name] = value.name if isinstance(value, Enum) else value
+    return result
+
+
+def _default(obj):
+    """Encode the types that are not supported natively by the JSON encoder"""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return to_dict(obj)
+    if isinstance(obj, Enum):
+        # Only reached by the stdlib encoder, orjson encodes bare enums by their value so use to_dict for enum fields
+        return obj.name
+    return str(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> str:
+        """Serialise the object to a JSON string"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+
+else:  # pragma: no cover
+    _ENCODER = json.JSONEncoder(default=_default)
+
+    def dumps(obj) -> str:
+        """Serialise the object to a JSON string"""
+        return _ENCODER.encode(obj)
+
+
+class LazyJson:
+    """Wrapper that only serialises its payload when it is formatted, e.g. when a log record is emitted"""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self) -> str:
+        return dumps(self.payload)
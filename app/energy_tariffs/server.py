@@ -0,0 +1,154 @@
+"""
+Module for running the API as a standalone, multi-threaded HTTP server
+
+The same Api class as in the lambda handler answers the requests, so the server can run in a container behind a load
+balancer or locally against a DynamoDB stand-in, e.g. `DYNAMODB_ENDPOINT_URL=http://localhost:8000 python server.py`, or
+against a local SQLite database with `python server.py --sqlite energy.db`. With `--snapshot` the historic data is served
+from a snapshot file, which is a copy of the table at the time of its export (see dao.snapshot for when it is stale).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import argparse
+import logging
+import os
+import queue
+
+import boto3
+
+from api import Api
+from dao.snapshot import SnapshotBackend, open_snapshot
+from dao.storage import StorageBackend, SQLiteBackend, DynamoDBBackend
+from serializer import dumps
+
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class TablePool:
+    """Pool of DynamoDB table handles that are reused by the request threads"""
+
+    def __init__(self, table_name: str, endpoint_url: str = None, snapshot_path: str = None):
+        self.table_name = table_name
+        self.endpoint_url = endpoint_url
+        self.snapshot_path = snapshot_path
+        self._tables = queue.SimpleQueue()
+
+    def _create(self):
+        """Create a new table handle"""
+        # boto3 sessions and resources are not thread-safe, so each handle gets its own session (and connection pool)
+        session = boto3.session.Session()
+        db_table = session.resource("dynamodb", endpoint_url=self.endpoint_url).Table(self.table_name)
+        if self.snapshot_path is not None:
+            return SnapshotBackend(open_snapshot(self.snapshot_path), DynamoDBBackend(db_table))
+        return db_table
+
+    @contextmanager
+    def table(self):
+        """Borrow a table handle for the duration of a request"""
+        try:
+            db_table = self._tables.get_nowait()
+        except queue.Empty:
+            db_table = self._create()
+        try:
+            yield db_table
+        finally:
+            self._tables.put(db_table)
+
+
+class SharedTable:
+    """Provider of a single thread-safe storage backend that is shared by all request threads"""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    @contextmanager
+    def table(self):
+        """Borrow the backend for the duration of a request"""
+        yield self.backend
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Handler that translates HTTP requests into API Gateway events"""
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+
+    def handle_request(self):
+        """Answer the request through the Api class"""
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length > 0 else "{}"
+        event = {
+            "path": urlsplit(self.path).path,
+            "httpMethod": self.command,
+            "headers": dict(self.headers),
+            "body": body,
+        }
+        with self.server.tables.table() as db_table:
+            try:
+                response = Api(self.server.base_path, db_table).handle(event)
+            except Exception:
+                logger.exception("Failed to process the request")
+                response = {"statusCode": 500, "body": dumps({"error": "Internal server error"})}
+
+        payload = response["body"].encode("utf-8")
+        self.send_response(response["statusCode"])
+        for key, value in response.get("headers", {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+    def log_message(self, format, *args):
+        """Log the requests through the module logger instead of stderr"""
+        logger.debug(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Multi-threaded HTTP server that shares the table handles over all requests"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], base_path: str, tables: TablePool | SharedTable):
+        super().__init__(address, ApiRequestHandler)
+        self.base_path = base_path
+        self.tables = tables
+
+
+def main():
+    """Run the server until interrupted"""
+    parser = argparse.ArgumentParser(description="Run the energy API as a standalone HTTP server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sqlite", help="Serve from the given SQLite database instead of DynamoDB")
+    parser.add_argument(
+        "--snapshot",
+        help="Serve the historic data from the given snapshot file, historic values that are rewritten after its export are only served "
+        "after a new export (see python -m dao.snapshot --if-stale)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.sqlite is not None and args.snapshot is not None:
+        tables = SharedTable(SnapshotBackend(open_snapshot(args.snapshot), SQLiteBackend(args.sqlite)))
+    elif args.sqlite is not None:
+        tables = SharedTable(SQLiteBackend(args.sqlite))
+    else:
+        tables = TablePool(os.environ["TABLE_NAME"], endpoint_url=os.environ.get("DYNAMODB_ENDPOINT_URL"), snapshot_path=args.snapshot)
+    server = ApiServer((args.host, args.port), os.environ.get("API_BASE_PATH", ""), tables)
+    logger.info(f"Serving the API on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
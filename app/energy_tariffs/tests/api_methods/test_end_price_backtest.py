@@ -0,0 +1,150 @@
+"""Test module for end price backtest method"""
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+from moto import mock_dynamodb
+from pytz import utc
+
+from api.methods.end_price_backtest import EndPriceBacktestApiMethod, MAX_PERIODS, summarize
+from api.methods.grid_cost import GridCostApiMethod
+from api.methods.excise import ExciseApiMethod
+from dao.indexingsetting import IndexingSettingTimeframe, IndexingSettingOrigin
+from tests.creators import create_dynamodb_table
+from tests.api_methods import TestCaseApiMethod
+
+
+@mock_dynamodb
+class TestEndPriceBacktestApiMethod(TestCaseApiMethod):
+    """Test class for EndPriceBacktestApiMethod"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        self.load_db(self.db_table, "db_indexingsettings.json")
+        self.valid_body = {
+            "INDEX": "index1",
+            "SOURCE": "src",
+            "START": "2023-01-01 00:00",
+            "END": "2023-12-01 00:00",
+            "INTERCEPT": 1.0,
+            "SLOPE": 2.0,
+            "TAXES": 1.5,
+        }
+
+    def create_method(self, **kwargs) -> EndPriceBacktestApiMethod:
+        """Create a backtest method for index1"""
+        return EndPriceBacktestApiMethod(
+            **{
+                "db_table": self.db_table,
+                "name": "index1",
+                "source": "src",
+                "timeframe": IndexingSettingTimeframe.MONTHLY,
+                "origin": IndexingSettingOrigin.ORIGINAL,
+                "start": datetime(2023, 1, 1, tzinfo=utc),
+                "end": datetime(2023, 12, 1, tzinfo=utc),
+                "intercept": 1.0,
+                "slope": 2.0,
+                "taxes": 1.5,
+                **kwargs,
+            }
+        )
+
+    def test_from_body_invalid(self):
+        """Test the from_body method with invalid input"""
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {key: value for key, value in self.valid_body.items() if key != "END"})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "START": "2023/01/01"})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "START": "2024-01-01 00:00"})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "TIMEFRAME": "YEARLY"})
+        # More than a leap year of hourly values
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "TIMEFRAME": "HOURLY", "END": "2024-01-02 00:00"})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "TZ": "Mars/Olympus"})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "GRID": {}})
+        self.assertBodyInvalid(EndPriceBacktestApiMethod, {**self.valid_body, "EXCISE": {}})
+
+    def test_from_body_valid(self):
+        """Test the from_body method"""
+        self.assertBodyValid(EndPriceBacktestApiMethod, self.valid_body)
+        self.assertBodyValid(
+            EndPriceBacktestApiMethod,
+            {
+                **self.valid_body,
+                "TIMEFRAME": "HOURLY",
+                "TZ": "Europe/Brussels",
+                "GRID": {"COUNTRY": "BE", "PROVIDER": "Fluvius Antwerpen", "POWER": 2.5, "ENERGY": 5000, "DYNAMIC": True},
+                "EXCISE": {"COUNTRY": "BE", "ENERGY": 5000},
+            },
+        )
+        method = EndPriceBacktestApiMethod.from_body(None, {**self.valid_body, "TZ": "Europe/Brussels"})
+        self.assertEqual(datetime(2022, 12, 31, 23, tzinfo=utc), method.start)
+        self.assertTrue(method.closed)
+        method = EndPriceBacktestApiMethod.from_body(None, {**self.valid_body, "END": datetime.now().strftime("%Y-%m-%d %H:%M")})
+        self.assertFalse(method.closed)
+
+    def test_count_periods(self):
+        """Test the number of periods in the inclusive range"""
+        start = datetime(2023, 11, 1)
+        self.assertEqual(3, EndPriceBacktestApiMethod.count_periods(IndexingSettingTimeframe.MONTHLY, start, datetime(2024, 1, 1)))
+        self.assertEqual(62, EndPriceBacktestApiMethod.count_periods(IndexingSettingTimeframe.DAILY, start, datetime(2024, 1, 1)))
+        self.assertEqual(1, EndPriceBacktestApiMethod.count_periods(IndexingSettingTimeframe.HOURLY, start, start))
+        self.assertEqual(
+            MAX_PERIODS, EndPriceBacktestApiMethod.count_periods(IndexingSettingTimeframe.HOURLY, datetime(2024, 1, 1), datetime(2024, 12, 31, 23))
+        )
+
+    def test_summarize(self):
+        """Test the summary statistics"""
+        self.assertEqual({"count": 1, "mean": 2.0, "min": 2.0, "max": 2.0, "volatility": 0.0}, summarize([2.0]))
+        self.assertEqual({"count": 4, "mean": 3.0, "min": 1.0, "max": 5.0, "volatility": 2.0}, summarize([1.0, 5.0, 1.0, 5.0]))
+
+    def test_process(self):
+        """Test the process method"""
+        method = self.create_method()
+        result = method.process()
+        self.assertEqual(200, result.status_code)
+        self.assertLess(result.expires, datetime.now(utc) + timedelta(days=1))
+        self.assertEqual(
+            [
+                {"date": datetime(2023, 3, 1, tzinfo=utc), "value": 1.5, "end_price": (1.0 + 2.0 * 1.5) * 1.5},
+                {"date": datetime(2023, 4, 1, tzinfo=utc), "value": 1.0, "end_price": (1.0 + 2.0 * 1.0) * 1.5},
+                {"date": datetime(2023, 5, 1, tzinfo=utc), "value": 1.1, "end_price": (1.0 + 2.0 * 1.1) * 1.5},
+            ],
+            result.body["series"],
+        )
+        self.assertEqual(summarize([series["end_price"] for series in result.body["series"]]), result.body["statistics"])
+        self.assertEqual({"grid_cost": 0, "energy": 1}, result.body["grid"])
+        self.assertEqual({"excise_cost": 0, "energy": 1}, result.body["excise"])
+
+    def test_process_closed(self):
+        """Test the result for a closed range does not change anymore"""
+        result = self.create_method(closed=True).process()
+        self.assertEqual(200, result.status_code)
+        self.assertGreater(result.expires, datetime.now(utc) + timedelta(days=300))
+
+    def test_process_range(self):
+        """Test the process method for a range with only part of the series, both ends are inclusive"""
+        method = self.create_method(start=datetime(2023, 4, 1, tzinfo=utc), end=datetime(2023, 5, 1, tzinfo=utc))
+        result = method.process()
+        self.assertEqual(200, result.status_code)
+        self.assertEqual([1.0, 1.1], [series["value"] for series in result.body["series"]])
+
+    def test_process_with_grid_excise(self):
+        """Test the process method with grid costs and excises, which should match the end price of every single period"""
+        grid_method = GridCostApiMethod(db_table=self.db_table, country="BE", provider="Fluvius Antwerpen", power_usage=2.5, energy_usage=5000, dynamic=True)
+        grid_result = grid_method.process()
+        excise_method = ExciseApiMethod(db_table=self.db_table, country="BE", energy_usage=5000)
+        excise_result = excise_method.process()
+        method = self.create_method(grid_costs=grid_method, excises=excise_method)
+        result = method.process()
+        self.assertEqual(200, result.status_code)
+        for series in result.body["series"]:
+            expected = (1.0 + 2.0 * series["value"] + grid_result.body["grid_cost"] / 5000.0 + excise_result.body["excise_cost"] / 5000.0) * 1.5
+            self.assertAlmostEqual(expected, series["end_price"])
+        self.assertEqual(grid_result.body, result.body["grid"])
+        self.assertEqual(excise_result.body, result.body["excise"])
+
+    def test_process_not_existing(self):
+        """Test the process method for a not existing index or an empty range"""
+        method = self.create_method(name="otherindex")
+        self.assertProcess(method, 400, {"error": "No result found for requested index"})
+        method = self.create_method(start=datetime(2022, 1, 1, tzinfo=utc), end=datetime(2022, 12, 1, tzinfo=utc))
+        self.assertProcess(method, 400, {"error": "No result found for requested index"})
@@ -1,6 +1,7 @@
 """Test module for API classes"""
 from __future__ import annotations
 from datetime import datetime
+from unittest.mock import patch
 
 from moto import mock_dynamodb
 from pytz import utc
@@ -8,6 +9,7 @@ from pytz import utc
 from api.methods.end_prices import EndPricesApiMethod
 from api.methods.end_price import EndPriceApiMethod
 from api.methods.indexing_setting import IndexingSettingApiMethod
+from dao.storage import DynamoDBBackend
 from dao.indexingsetting import IndexingSetting, IndexingSettingTimeframe, IndexingSettingOrigin
 from tests.creators import create_dynamodb_table
 from tests.api_methods import TestCaseApiMethod
@@ -98,6 +100,32 @@ class TestEndPricesApiMethod(TestCaseApiMethod):
         }
         self.assertProcess(method, 200, {"q1": expected, "q2": expected})
 
+    def test_process_coalesced(self):
+        """Test the process method for requests that share their index, grid costs and excises"""
+        request = {
+            "INDEX": "index1",
+            "SOURCE": "src",
+            "DATE": "2023-05-01 00:00",
+            "INTERCEPT": 1.0,
+            "SLOPE": 1.0,
+            "GRID": {"COUNTRY": "BE", "PROVIDER": "Fluvius Antwerpen", "POWER": 2.5, "ENERGY": 5000, "DYNAMIC": True},
+            "EXCISE": {"COUNTRY": "BE", "ENERGY": 5000},
+        }
+        body = {
+            "q1": {**request, "TAXES": 1.0},
+            "q2": {**request, "TAXES": 1.06},
+            "q3": {**request, "TAXES": 1.21},
+            "q4": {**request, "TAXES": 1.21, "GRID": {**request["GRID"], "POWER": 4}},
+        }
+        method = EndPricesApiMethod.from_body(self.db_table, body)
+        with patch.object(DynamoDBBackend, "get_item", autospec=True, side_effect=DynamoDBBackend.get_item) as mock:
+            result = method.process()
+            # The index, the grid provider and the excise are read only once
+            self.assertEqual(3, mock.call_count)
+        self.assertEqual(200, result.status_code)
+        for key, request in body.items():
+            self.assertEqual(EndPriceApiMethod.from_body(self.db_table, request).process().body, result.body[key])
+
     def test_process_not_existing(self):
         """Test the process method for a not existing EndPrice"""
         bare_method = IndexingSettingApiMethod(
@@ -0,0 +1,65 @@
+"""Test module for API classes"""
+from __future__ import annotations
+
+from moto import mock_dynamodb
+
+from api.methods.grid_cost_all import GridCostAllApiMethod
+from dao.gridcost import EnergyGridCost, EnergyDirection
+from tests.creators import create_dynamodb_table
+from tests.api_methods import TestCaseApiMethod
+
+
+@mock_dynamodb
+class TestGridCostAllApiMethod(TestCaseApiMethod):
+    """Test class for GridCostAllApiMethod"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        EnergyGridCost.save_list(
+            self.db_table,
+            [
+                EnergyGridCost(
+                    country="BE",
+                    grid_provider=provider,
+                    direction=EnergyDirection.DRAWDOWN,
+                    peak_usage_avg_monthly_cost=peak_usage_avg_monthly_cost,
+                    peak_usage_kwh=0.00908,
+                    data_management_standard=12.63,
+                    data_management_dynamic=13.71,
+                    public_services_kwh=0.0215095,
+                    surcharges_kwh=0.0011539,
+                    transmission_charges_kwh=0.0035578,
+                )
+                for provider, peak_usage_avg_monthly_cost in [("Fluvius Limburg", 40.0), ("Fluvius Antwerpen", 37.7649625)]
+            ],
+        )
+
+    def test_from_body_invalid(self):
+        """Test the from_body method with invalid input"""
+        self.assertBodyInvalid(GridCostAllApiMethod, {})
+        self.assertBodyInvalid(GridCostAllApiMethod, {"COUNTRY": "BE", "POWER": 3, "ENERGY": 5000})
+
+    def test_from_body_valid(self):
+        """Test the from_body method"""
+        self.assertBodyValid(GridCostAllApiMethod, {"COUNTRY": "BE", "POWER": 3, "ENERGY": 5000, "DYNAMIC": True})
+        # The integers 0 and 1 are accepted as booleans, as before the bodies were validated
+        self.assertIs(False, GridCostAllApiMethod.from_body(self.db_table, {"COUNTRY": "BE", "POWER": 3, "ENERGY": 5000, "DYNAMIC": 0}).dynamic)
+        self.assertBodyInvalid(GridCostAllApiMethod, {"COUNTRY": "BE", "POWER": 3, "ENERGY": 5000, "DYNAMIC": 2})
+
+    def test_process(self):
+        """Test the process method"""
+        method = GridCostAllApiMethod.from_body(self.db_table, {"COUNTRY": "BE", "POWER": 3, "ENERGY": 5000, "DYNAMIC": True})
+        expected = {
+            "country": "BE",
+            "power": 3,
+            "energy": 5000,
+            "dynamic": True,
+            "grid_costs": {"Fluvius Antwerpen": 303.511, "Fluvius Limburg": 310.216},
+        }
+        self.assertProcess(method, 200, expected)
+
+    def test_process_not_existing(self):
+        """Test the process method for a country without grid costs"""
+        method = GridCostAllApiMethod.from_body(self.db_table, {"COUNTRY": "FR", "POWER": 3, "ENERGY": 5000, "DYNAMIC": True})
+        self.assertProcess(method, 400, {"error": "No result found for country"})
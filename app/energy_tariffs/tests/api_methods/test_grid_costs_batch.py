@@ -0,0 +1,77 @@
+"""Test module for API classes"""
+from __future__ import annotations
+
+from moto import mock_dynamodb
+
+from api.methods.grid_costs_batch import GridCostsBatchApiMethod, GridCostProfiles, broadcast
+from dao.gridcost import EnergyGridCost, EnergyDirection
+from tests.creators import create_dynamodb_table
+from tests.api_methods import TestCaseApiMethod
+
+
+@mock_dynamodb
+class TestGridCostsBatchApiMethod(TestCaseApiMethod):
+    """Test class for GridCostsBatchApiMethod"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        self.cost_obj = EnergyGridCost(
+            country="BE",
+            grid_provider="Fluvius Antwerpen",
+            direction=EnergyDirection.DRAWDOWN,
+            peak_usage_avg_monthly_cost=37.7649625,
+            peak_usage_kwh=0.00908,
+            data_management_standard=12.63,
+            data_management_dynamic=13.71,
+            public_services_kwh=0.0215095,
+            surcharges_kwh=0.0011539,
+            transmission_charges_kwh=0.0035578,
+        )
+        self.cost_obj.save(self.db_table)
+        self.request = {
+            "COUNTRY": "BE",
+            "PROVIDER": "Fluvius Antwerpen",
+            "POWER": [3, 3, 5, 5],
+            "ENERGY": [5000, 5000, 2000, 2000],
+            "DYNAMIC": [True, False, True, False],
+        }
+
+    def test_broadcast(self):
+        """Test the broadcast function"""
+        self.assertEqual({"a": [1, 2], "b": [True, True]}, broadcast({"a": [1, 2], "b": True}))
+        self.assertEqual({"a": [1], "b": [True]}, broadcast({"a": 1, "b": True}))
+        self.assertIsNone(broadcast({"a": [1, 2], "b": [True]}))
+
+    def test_from_body_invalid(self):
+        """Test the from_body method with invalid input"""
+        self.assertBodyInvalid(GridCostsBatchApiMethod, {})
+        self.assertBodyInvalid(GridCostsBatchApiMethod, {"q1": {}})
+        self.assertBodyInvalid(GridCostsBatchApiMethod, {"q1": []})
+        self.assertBodyInvalid(GridCostsBatchApiMethod, {"q1": {**self.request, "DYNAMIC": [True]}})
+
+    def test_from_body_valid(self):
+        """Test the from_body method"""
+        self.assertBodyValid(GridCostsBatchApiMethod, {"q1": self.request})
+        method = GridCostsBatchApiMethod.from_body(None, {"q1": {**self.request, "DYNAMIC": True}})
+        self.assertEqual([True] * 4, method.profiles["q1"].dynamic)
+
+    def test_process(self):
+        """Test the process method"""
+        method = GridCostsBatchApiMethod.from_body(self.db_table, {"q1": self.request, "q2": {**self.request, "POWER": 3, "ENERGY": 5000, "DYNAMIC": True}})
+        expected = {
+            "q1": {"country": "BE", "provider": "Fluvius Antwerpen", "grid_cost": [303.511, 302.431, 273.137, 272.057]},
+            "q2": {"country": "BE", "provider": "Fluvius Antwerpen", "grid_cost": [303.511]},
+        }
+        self.assertProcess(method, 200, expected)
+
+    def test_process_not_existing(self):
+        """Test the process method for a not existing grid provider"""
+        method = GridCostsBatchApiMethod(
+            db_table=self.db_table,
+            profiles={
+                "q1": GridCostProfiles(country="BE", provider="Fluvius Antwerpen", power_usages=[3], energy_usages=[5000], dynamic=[True]),
+                "q2": GridCostProfiles(country="BE", provider="Fluvius Limburg", power_usages=[3], energy_usages=[5000], dynamic=[True]),
+            },
+        )
+        self.assertProcess(method, 400, {"error": "No result found for one of the grid providers"})
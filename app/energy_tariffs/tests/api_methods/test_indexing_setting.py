@@ -1,6 +1,6 @@
 """Test module for API classes"""
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from moto import mock_dynamodb
 from pytz import utc
@@ -133,6 +133,20 @@ class TestIndexingSettingApiMethod(TestCaseApiMethod):
         }
         self.assertProcess(method, 200, expected)
 
+    def test_current_until(self):
+        """Test the expiry of requests for the current value"""
+        method = IndexingSettingApiMethod.from_body(self.db_table, {"INDEX": self.index_name, "SOURCE": self.index_source, "TIMEFRAME": "MONTHLY"})
+        now = datetime.now(utc)
+        self.assertEqual(1, method.current_until.day)
+        self.assertGreater(method.current_until, now)
+        self.assertLessEqual(method.current_until - now, timedelta(days=32))
+        method = IndexingSettingApiMethod.from_body(self.db_table, {"INDEX": self.index_name, "SOURCE": self.index_source, "TIMEFRAME": "HOURLY"})
+        self.assertEqual(0, method.current_until.minute)
+        self.assertLessEqual(method.current_until - now, timedelta(hours=1))
+        method = IndexingSettingApiMethod.from_body(self.db_table, {"INDEX": self.index_name, "SOURCE": self.index_source, "DATE": "2023-06-01 10:00"})
+        self.assertIsNone(method.current_until)
+        self.assertGreater(method.process().expires - now, timedelta(days=300))
+
     def test_from_body_daily(self):
         """Test the from_body method"""
         # DAILY is not implemented yet so we expect failing parsing the body
@@ -30,3 +30,13 @@ def create_secrets():
         Name="my-secret",
         SecretString=json.dumps({"ENTSOE_KEY": "fakekey"}),
     )
+
+
+def create_feed_handler(feed: str):
+    """Create the handler that runs a single feed through the feeder lambda handler"""
+    from lambda_feeder import handler
+
+    def feed_handler(event: dict, context):
+        return handler({**event, "feed": feed}, context)
+
+    return feed_handler
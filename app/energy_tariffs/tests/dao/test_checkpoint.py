@@ -0,0 +1,29 @@
+"""Test module for BackfillCheckpoint DAO"""
+from __future__ import annotations
+from unittest import TestCase
+from datetime import datetime
+
+from moto import mock_dynamodb
+from pytz import utc, timezone
+
+from dao.checkpoint import BackfillCheckpoint
+from tests.creators import create_dynamodb_table
+
+
+@mock_dynamodb
+class TestBackfillCheckpoint(TestCase):
+    """Test class for BackfillCheckpoint"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+
+    def test_save_load(self):
+        """Test saving and loading a checkpoint"""
+        self.assertIsNone(BackfillCheckpoint.load(self.db_table, "job1"))
+        BackfillCheckpoint(job="job1", completed_until=datetime(2023, 1, 1, tzinfo=utc)).save(self.db_table)
+        BackfillCheckpoint(job="job1", completed_until=timezone("Europe/Brussels").localize(datetime(2023, 2, 1))).save(self.db_table)
+        BackfillCheckpoint(job="job2", completed_until=datetime(2023, 3, 1, tzinfo=utc)).save(self.db_table)
+        self.assertEqual(datetime(2023, 1, 31, 23, tzinfo=utc), BackfillCheckpoint.load(self.db_table, "job1").completed_until)
+        self.assertEqual(datetime(2023, 3, 1, tzinfo=utc), BackfillCheckpoint.load(self.db_table, "job2").completed_until)
+        self.assertEqual(2, len(self.db_table.scan().get("Items", [])))
@@ -4,10 +4,22 @@ from unittest import TestCase
 
 from moto import mock_dynamodb
 
-from dao.excise import EnergyExcise, divide_chunks, calculate_graduation
+from dao.excise import EnergyExcise
 from tests.creators import create_dynamodb_table
 
 
+def divide_chunks(graduated: dict[int, float]):
+    """Divide the list of keys in intervals"""
+    keys = sorted(list(graduated.keys())) + [-1]
+    for i in range(0, len(keys) - 1):
+        yield (keys[i], keys[i + 1], graduated[keys[i]])
+
+
+def calculate_graduation(graduated: dict[int, float], energy_usage: float):
+    """Calculate the value given the graduaded values, the reference for the compiled brackets"""
+    return sum([max((min(energy_usage, end) if end != -1 else energy_usage) - start, 0) * value for start, end, value in divide_chunks(graduated)])
+
+
 @mock_dynamodb
 class TestEnergyExcise(TestCase):
     """Test class for EnergyExcise"""
@@ -76,3 +88,19 @@ class TestEnergyExcise(TestCase):
         """Test the calculate method"""
         self.assertEqual(232.317, self.cost_obj.calculate(5000))
         self.assertEqual(479.348, self.cost_obj.calculate(10000))
+
+    def test_graduation(self):
+        """Test the graduation method matches calculate_graduation"""
+        for usage in [-1, 0, 1500, 3000, 5000, 20000, 49999.5, 1000000, 30000000]:
+            self.assertEqual(calculate_graduation(self.cost_obj.graduated_excise, usage), self.cost_obj.graduation(usage))
+        self.assertEqual(0, EnergyExcise(country="BE", graduated_excise={}, energy_contribution=0.0).graduation(5000))
+        self.assertEqual(0, EnergyExcise(country="BE", graduated_excise={1000: 0.1}, energy_contribution=0.0).graduation(500))
+
+    def test_graduated_excise_assigned(self):
+        """Test the brackets are compiled again when another graduated excise is assigned"""
+        excise = EnergyExcise(country="BE", graduated_excise={0: 0.1}, energy_contribution=0.0)
+        self.assertEqual(500.0, excise.graduation(5000))
+        excise.graduated_excise = {0: 0.1, 1000: 0.2}
+        self.assertEqual(100.0 + 800.0, excise.graduation(5000))
+        self.assertEqual({0: 0.1, 1000: 0.2}, excise.graduated_excise)
+        self.assertEqual(EnergyExcise(country="BE", graduated_excise={0: 0.1, 1000: 0.2}, energy_contribution=0.0), excise)
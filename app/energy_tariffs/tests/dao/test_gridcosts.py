@@ -1,5 +1,6 @@
 """Test module for IndexingSetting DAO"""
 from __future__ import annotations
+from dataclasses import replace
 from unittest import TestCase
 
 from moto import mock_dynamodb
@@ -43,6 +44,16 @@ class TestEnergyGridCost(TestCase):
         self.assertIn("secondary", response["Item"])
         self.assertEqual("DRAWDOWN", response["Item"]["direction"])
 
+    def test_ddb_json(self):
+        """Test the conversion to and from the dynamodb JSON"""
+        data = self.cost_obj._to_ddb_json()
+        self.assertEqual("DRAWDOWN", data["direction"])
+        self.assertEqual("0.00908", data["peak_usage_kwh"])
+        self.assertEqual(self.cost_obj, EnergyGridCost._from_ddb_json(data))
+        country_data = self.cost_obj._to_ddb_json_country(data)
+        self.assertEqual(("energygridcosts#BE", data["secondary"]), (country_data["primary"], country_data["secondary"]))
+        self.assertEqual(self.cost_obj._to_ddb_json_country(), country_data)
+
     def test_save_list(self):
         """Test the save_list method"""
         obj2 = EnergyGridCost(
@@ -58,7 +69,26 @@ class TestEnergyGridCost(TestCase):
             transmission_charges_kwh=0.0035578,
         )
         EnergyGridCost.save_list(self.db_table, [self.cost_obj, obj2])
-        self.assertEqual(2, len(self.db_table.scan().get("Items", [])))
+        # Every grid cost is also stored in the partition of the country
+        self.assertEqual(4, len(self.db_table.scan().get("Items", [])))
+        self.assertEqual(2, len(EnergyGridCost.query_country(self.db_table, "BE")))
+
+    def test_query_country(self):
+        """Test the query_country method"""
+        self.cost_obj.save(self.db_table)
+        self.assertEqual([self.cost_obj], EnergyGridCost.query_country(self.db_table, "BE"))
+        self.cost_obj.save(self.db_table)
+        self.assertEqual([self.cost_obj], EnergyGridCost.query_country(self.db_table, "BE"))
+        self.assertEqual([], EnergyGridCost.query_country(self.db_table, "FR"))
+
+    def test_replace_country(self):
+        """Test the partition of the country is rewritten to the given providers"""
+        obj2 = replace(self.cost_obj, grid_provider="Fluvius Limburg")
+        EnergyGridCost.save_list(self.db_table, [self.cost_obj, obj2])
+        self.assertEqual([], EnergyGridCost.replace_country(self.db_table, "BE", {"Fluvius Antwerpen"}))
+        self.assertEqual([self.cost_obj], EnergyGridCost.query_country(self.db_table, "BE"))
+        # Only the copy in the partition of the country is deleted, the missing providers are returned to be saved again
+        self.assertEqual([obj2], EnergyGridCost.replace_country(self.db_table, "BE", {"Fluvius Antwerpen", "Fluvius Limburg", "Unknown"}))
 
     def test_load(self):
         """Test the load method"""
@@ -82,3 +112,10 @@ class TestEnergyGridCost(TestCase):
         self.assertEqual(303.511, self.cost_obj.calculate(3, 5000, True))
         self.cost_obj.direction = EnergyDirection.INJECTION
         self.assertRaises(NotImplementedError, self.cost_obj.calculate, 3, 5000, True)
+
+    def test_calculate_many(self):
+        """Test the calculate_many method"""
+        self.assertEqual([303.511, 302.431, 273.137, 272.057], self.cost_obj.calculate_many([3, 3, 5, 5], [5000, 5000, 2000, 2000], [True, False, True, False]))
+        self.assertEqual([], self.cost_obj.calculate_many([], [], []))
+        self.cost_obj.direction = EnergyDirection.INJECTION
+        self.assertRaises(NotImplementedError, self.cost_obj.calculate_many, [3], [5000], [True])
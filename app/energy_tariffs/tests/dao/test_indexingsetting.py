@@ -2,6 +2,7 @@
 from __future__ import annotations
 from unittest import TestCase
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 from moto import mock_dynamodb
 from pytz import utc
@@ -62,6 +63,27 @@ class TestIndexingSetting(TestCase):
         # Test not existing
         self.assertIsNone(IndexingSetting.load(self.db_table, "unknown", self.index_name, self.index_timeframe, self.index_datetime))
 
+    def test_ddb_json(self):
+        """Test the conversion to and from the dynamodb JSON"""
+        data = self.index_obj._to_ddb_json()
+        self.assertEqual(
+            {
+                "name": self.index_name,
+                "value": "1.1",
+                "timeframe": "HOURLY",
+                "date": self.index_datetime_str,
+                "source": self.index_source,
+                "origin": "ORIGINAL",
+                "primary": f"{self.index_source}#ORIGINAL#HOURLY#{self.index_name}",
+                "secondary": 1683867600,
+            },
+            {key: value for key, value in data.items() if key != "last_updated"},
+        )
+        self.assertEqual(self.index_obj, IndexingSetting._from_ddb_json(data))
+        # The date is decoded from the epoch of the secondary key, also when stored as a decimal
+        self.assertEqual(self.index_datetime, IndexingSetting._from_ddb_json({**data, "secondary": Decimal(1683867600), "date": None}).date)
+        self.assertFalse(hasattr(self.index_obj, "__dict__"))
+
     def test_save_list(self):
         """Test the save_list method"""
         obj2 = IndexingSetting(
@@ -72,10 +94,32 @@ class TestIndexingSetting(TestCase):
             "source2",
             self.index_origin,
         )
-        IndexingSetting.save_list(self.db_table, [self.index_obj, obj2])
+        self.assertEqual(2, IndexingSetting.save_list(self.db_table, [self.index_obj, obj2]))
         self.assertIsNotNone(IndexingSetting.load(self.db_table, self.index_source, self.index_name, self.index_timeframe, self.index_datetime))
         self.assertIsNotNone(IndexingSetting.load(self.db_table, "source2", self.index_name, self.index_timeframe, self.index_datetime))
 
+    def test_save_list_generator(self):
+        """Test the save_list method with values that are produced while saving"""
+        produced = []
+
+        def values():
+            for hour in range(30):
+                produced.append(hour)
+                yield IndexingSetting(
+                    self.index_name,
+                    float(hour),
+                    IndexingSettingTimeframe.HOURLY,
+                    self.index_datetime + timedelta(hours=hour),
+                    self.index_source,
+                    self.index_origin,
+                )
+
+        self.assertEqual(30, IndexingSetting.save_list(self.db_table, values()))
+        self.assertEqual(30, len(produced))
+        # The values and a single documentation item
+        self.assertEqual(31, len(self.db_table.scan().get("Items", [])))
+        self.assertEqual(30, len(IndexingSetting.query(self.db_table, self.index_source, self.index_name, timeframe=IndexingSettingTimeframe.HOURLY)))
+
     def test_query(self):
         """Test the query method"""
         self.index_obj.save(self.db_table)
@@ -0,0 +1,83 @@
+"""Test module for the IndexingSettingSeries"""
+from __future__ import annotations
+from unittest import TestCase
+from datetime import datetime, timedelta
+
+from moto import mock_dynamodb
+from pytz import utc, timezone
+
+from dao.indexingsetting import IndexingSetting, IndexingSettingTimeframe, IndexingSettingOrigin
+from dao.series import IndexingSettingSeries
+from tests.creators import create_dynamodb_table
+
+
+@mock_dynamodb
+class TestIndexingSettingSeries(TestCase):
+    """Test class for IndexingSettingSeries"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        self.start = datetime(2023, 3, 31, 22, tzinfo=utc)  # Midnight of April 1st in Brussels
+        self.indexes = [
+            IndexingSetting(
+                "SDAC BE", float(hour), IndexingSettingTimeframe.HOURLY, self.start + timedelta(hours=hour), "ENTSO-E", IndexingSettingOrigin.ORIGINAL
+            )
+            for hour in range(72)
+        ]
+        self.series = IndexingSettingSeries.from_indexing_settings(self.indexes)
+
+    def test_query(self):
+        """Test the query has the same results as the query of the indexing settings"""
+        IndexingSetting.save_list(self.db_table, self.indexes)
+        for start, end in [
+            (None, None),
+            (self.start + timedelta(hours=10), None),
+            (None, self.start + timedelta(hours=10)),
+            (self.indexes[5].date, self.indexes[20].date),
+        ]:
+            query = {"source": "ENTSO-E", "name": "SDAC BE", "timeframe": IndexingSettingTimeframe.HOURLY, "start": start, "end": end}
+            self.assertEqual(IndexingSetting.query(self.db_table, **query), list(IndexingSettingSeries.query(self.db_table, **query)))
+        self.assertEqual(0, len(IndexingSettingSeries.query(self.db_table, "ENTSO-E", "SDAC NL", timeframe=IndexingSettingTimeframe.HOURLY)))
+
+    def test_iterate(self):
+        """Test the indexing settings are created on demand"""
+        self.assertEqual(72, len(self.series))
+        self.assertEqual(self.indexes, list(self.series))
+        self.assertEqual(self.indexes[3], self.series[3])
+        self.assertEqual(self.indexes[-1], self.series[-1])
+        self.assertEqual(self.indexes[10:20], list(self.series[10:20]))
+        self.assertEqual([(index.date, index.value) for index in self.indexes], list(self.series.items()))
+        self.assertRaises(ValueError, IndexingSettingSeries.from_indexing_settings, [])
+
+    def test_between(self):
+        """Test the values between two dates (inclusive)"""
+        self.assertEqual(self.indexes[24:48], list(self.series.between(self.indexes[24].date, self.indexes[47].date)))
+        self.assertEqual(
+            self.indexes[24:48], list(self.series.between(self.indexes[23].date + timedelta(minutes=1), self.indexes[48].date - timedelta(minutes=1)))
+        )
+        self.assertEqual(0, len(self.series.between(self.start - timedelta(days=2), self.start - timedelta(days=1))))
+
+    def test_statistics(self):
+        """Test the mean, min and max"""
+        self.assertEqual(35.5, self.series.mean())
+        self.assertEqual(0.0, self.series.min())
+        self.assertEqual(71.0, self.series.max())
+        empty = self.series[0:0]
+        self.assertRaises(ValueError, empty.mean)
+        self.assertRaises(ValueError, empty.min)
+        self.assertRaises(ValueError, empty.max)
+
+    def test_resample(self):
+        """Test the means per day in the timezone"""
+        tz_be = timezone("Europe/Brussels")
+        daily = self.series.resample(IndexingSettingTimeframe.DAILY, tz_be)
+        self.assertEqual(IndexingSettingTimeframe.DAILY, daily.timeframe)
+        self.assertEqual(IndexingSettingOrigin.DERIVED, daily.origin)
+        self.assertEqual([tz_be.localize(datetime(2023, 4, day)) for day in (1, 2, 3)], daily.dates)
+        self.assertEqual([11.5, 35.5, 59.5], list(daily.values))
+
+        monthly = self.series.resample(IndexingSettingTimeframe.MONTHLY, utc)
+        self.assertEqual([datetime(2023, 3, 1, tzinfo=utc), datetime(2023, 4, 1, tzinfo=utc)], monthly.dates)
+        self.assertEqual([0.5, 36.5], list(monthly.values))
+        self.assertEqual(list(self.series.values), list(self.series.resample(IndexingSettingTimeframe.HOURLY).values))
@@ -0,0 +1,170 @@
+"""Test module for the snapshot backend"""
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import json
+import os
+
+from moto import mock_dynamodb
+from pytz import utc
+
+from dao.checkpoint import BackfillCheckpoint
+from dao.snapshot import Snapshot, SnapshotBackend, is_current, open_snapshot
+from dao.storage import KeyCondition, SQLiteBackend
+from dao.indexingsetting import IndexingSetting, IndexingSettingTimeframe, IndexingSettingOrigin, IndexingSettingDocumentation
+from dao.excise import EnergyExcise
+from lambda_api import handler
+from tests.creators import create_dynamodb_table
+
+
+class TestSnapshot(TestCase):
+    """Test class for Snapshot"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.directory = TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "snapshot.bin")
+        self.items = [{"primary": primary, "secondary": secondary, "value": f"{primary}{secondary}"} for primary in ["b", "a", "ç"] for secondary in [5, 1, 3]]
+        self.items.append({"primary": "hash", "secondary": 2**64 - 1, "value": "hash"})
+
+    def tearDown(self):
+        """Clean up the test"""
+        self.directory.cleanup()
+
+    def test_write(self):
+        """Test writing a snapshot"""
+        self.assertEqual(9, Snapshot.write(self.path, self.items, cutoff=10))
+        self.assertEqual(9, len(Snapshot.open(self.path)))
+        self.assertEqual(6, Snapshot.write(self.path, self.items, cutoff=4))
+        self.assertEqual(0, Snapshot.write(self.path, [], cutoff=4))
+        self.assertEqual(0, len(Snapshot.open(self.path)))
+        self.assertIsNone(Snapshot.open(self.path).get_item("a", 1))
+
+    def test_invalid(self):
+        """Test opening an invalid file"""
+        Path(self.path).write_bytes(b"\0" * 64)
+        self.assertRaises(ValueError, Snapshot.open, self.path)
+
+    def test_get_item(self):
+        """Test getting items from a snapshot"""
+        Snapshot.write(self.path, self.items, cutoff=2**64 - 1)
+        snapshot = Snapshot.open(self.path)
+        for item in self.items[:-1]:
+            self.assertEqual(item, snapshot.get_item(item["primary"], item["secondary"]))
+        self.assertIsNone(snapshot.get_item("a", 2))
+        self.assertIsNone(snapshot.get_item("a", 6))
+        self.assertIsNone(snapshot.get_item("0", 1))
+        self.assertIsNone(snapshot.get_item("z", 1))
+
+    def test_query(self):
+        """Test querying a snapshot"""
+        Snapshot.write(self.path, self.items, cutoff=10)
+        snapshot = Snapshot.open(self.path)
+        self.assertEqual([1, 3, 5], [item["secondary"] for item in snapshot.query(KeyCondition("b"))])
+        self.assertEqual([3, 5], [item["secondary"] for item in snapshot.query(KeyCondition("ç", lower=2))])
+        self.assertEqual([1, 3], [item["secondary"] for item in snapshot.query(KeyCondition("a", upper=3))])
+        self.assertEqual([1], [item["secondary"] for item in snapshot.query(KeyCondition("a", upper=3, upper_inclusive=False))])
+        self.assertEqual([], snapshot.query(KeyCondition("unknown")))
+
+
+class TestSnapshotBackend(TestCase):
+    """Test class for SnapshotBackend"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.directory = TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "snapshot.bin")
+        self.source = SQLiteBackend()
+        self.indexes = [
+            IndexingSetting(
+                "index1", float(month), IndexingSettingTimeframe.MONTHLY, datetime(2023, month, 1, tzinfo=utc), "src", IndexingSettingOrigin.ORIGINAL
+            )
+            for month in range(1, 7)
+        ]
+        IndexingSetting.save_list(self.source, self.indexes[:5])
+        EnergyExcise(country="BE", graduated_excise={0: 0.0425755}, energy_contribution=0.0019261).save(self.source)
+        self.cutoff = int(datetime(2023, 4, 1, tzinfo=utc).timestamp())
+        self.exported = int(datetime(2023, 5, 1, tzinfo=utc).timestamp())
+        Snapshot.write(self.path, self.source.scan(), cutoff=self.cutoff, exported=self.exported)
+        self.fallback = Mock(spec=SQLiteBackend, wraps=self.source)
+        self.backend = SnapshotBackend(Snapshot.open(self.path), self.fallback)
+
+    def tearDown(self):
+        """Clean up the test"""
+        self.directory.cleanup()
+
+    def test_load(self):
+        """Test loading historic and newer items"""
+        self.assertEqual(self.indexes[0], IndexingSetting.load(self.backend, "src", "index1", IndexingSettingTimeframe.MONTHLY, self.indexes[0].date))
+        self.assertIsNone(IndexingSetting.load(self.backend, "src", "unknown", IndexingSettingTimeframe.MONTHLY, self.indexes[0].date))
+        self.assertEqual(0, self.fallback.get_item.call_count)
+        self.assertEqual(0, self.fallback.query.call_count)
+        self.assertEqual(self.indexes[4], IndexingSetting.load(self.backend, "src", "index1", IndexingSettingTimeframe.MONTHLY, self.indexes[4].date))
+        self.assertIsNotNone(EnergyExcise.load(self.backend, "BE"))
+        self.assertEqual(2, self.fallback.get_item.call_count)
+
+    def test_query(self):
+        """Test querying over the snapshot cutoff"""
+        self.indexes[5].save(self.backend)
+        self.assertEqual(self.indexes, IndexingSetting.query(self.backend, "src", "index1"))
+        # Only the newer keys
+        self.assertEqual(1, self.fallback.query.call_count)
+        self.assertEqual(self.indexes[:2], IndexingSetting.query(self.backend, "src", "index1", end=self.indexes[2].date))
+        self.assertEqual(self.indexes[1:3], IndexingSetting.query(self.backend, "src", "index1", start=self.indexes[1].date, end=self.indexes[2].date))
+        self.assertEqual(1, self.fallback.query.call_count)
+        self.assertEqual(self.indexes[4:], IndexingSetting.query(self.backend, "src", "index1", start=self.indexes[4].date))
+        self.assertEqual(1, len(IndexingSettingDocumentation.query(self.backend)))
+
+    def test_generation(self):
+        """Test the snapshot is current until a job rewrites historic values after the export"""
+        self.assertEqual(0, Snapshot.generation_of(self.source))
+        self.assertTrue(is_current(self.path, 0))
+
+        with patch("dao.checkpoint.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime(2023, 4, 30, tzinfo=utc)
+            mock_datetime.strptime = datetime.strptime
+            BackfillCheckpoint(job="old", completed_until=datetime(2023, 1, 1, tzinfo=utc)).save(self.source)
+        generation = Snapshot.generation_of(self.source)
+        self.assertEqual(int(datetime(2023, 4, 30, tzinfo=utc).timestamp()), generation)
+        self.assertFalse(is_current(self.path, generation))
+        Snapshot.write(self.path, self.source.scan(), cutoff=self.cutoff, generation=generation)
+        self.assertEqual(generation, Snapshot.open(self.path).generation)
+        self.assertTrue(is_current(self.path, generation))
+
+        # The reads never check the fallback, a newer checkpoint only makes the export stale
+        BackfillCheckpoint(job="new", completed_until=datetime(2023, 2, 1, tzinfo=utc)).save(self.source)
+        self.assertFalse(is_current(self.path, Snapshot.generation_of(self.source)))
+        Path(self.path).write_bytes(b"\0" * 64)
+        self.assertFalse(is_current(self.path, 0))
+
+
+@mock_dynamodb
+class TestLambdaSnapshot(TestCase):
+    """Test class for the lambda handler serving from a snapshot"""
+
+    def test_handler(self):
+        """Test the lambda handler"""
+        db_table = create_dynamodb_table()
+        index = IndexingSetting("index1", 1.1, IndexingSettingTimeframe.MONTHLY, datetime(2023, 4, 1, tzinfo=utc), "src", IndexingSettingOrigin.ORIGINAL)
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory) / "snapshot.bin")
+            Snapshot.write(path, [index._to_ddb_json()], cutoff=int(datetime(2023, 5, 1, tzinfo=utc).timestamp()))
+            os.environ["TABLE_NAME"] = db_table.name
+            os.environ["API_BASE_PATH"] = "/v1"
+            os.environ["SNAPSHOT_PATH"] = path
+            try:
+                event = {
+                    "path": "/v1/indexingsetting",
+                    "httpMethod": "POST",
+                    "body": json.dumps({"INDEX": "index1", "SOURCE": "src", "DATE": "2023-05-01 00:00"}),
+                }
+                result = handler(event, {})
+                self.assertEqual(200, result["statusCode"])
+                self.assertEqual(1.1, json.loads(result["body"])["value"])
+                self.assertIs(open_snapshot(path), open_snapshot(path))
+            finally:
+                del os.environ["SNAPSHOT_PATH"]
+                open_snapshot.cache_clear()
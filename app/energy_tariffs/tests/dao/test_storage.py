@@ -0,0 +1,170 @@
+"""Test module for the storage backends"""
+from __future__ import annotations
+from unittest import TestCase
+from datetime import datetime
+from threading import Thread
+from decimal import Decimal
+from unittest.mock import patch
+import time
+
+from moto import mock_dynamodb
+from pytz import utc
+
+from dao.storage import KeyCondition, StorageBackend, DynamoDBBackend, SQLiteBackend, PacedBackend, CoalescingBackend, as_backend
+from dao.indexingsetting import IndexingSetting, IndexingSettingTimeframe, IndexingSettingOrigin, IndexingSettingDocumentation
+from dao.excise import EnergyExcise
+from tests.creators import create_dynamodb_table
+
+
+class TestKeyCondition(TestCase):
+    """Test class for KeyCondition"""
+
+    def test_matches(self):
+        """Test the matches method"""
+        self.assertTrue(KeyCondition("pk").matches(5))
+        self.assertTrue(KeyCondition("pk", lower=5).matches(5))
+        self.assertFalse(KeyCondition("pk", lower=5).matches(4))
+        self.assertTrue(KeyCondition("pk", upper=5).matches(5))
+        self.assertFalse(KeyCondition("pk", upper=5, upper_inclusive=False).matches(5))
+        self.assertTrue(KeyCondition("pk", lower=1, upper=5).matches(3))
+        self.assertFalse(KeyCondition("pk", lower=1, upper=5).matches(6))
+
+    def test_not_implemented(self):
+        """Test the methods to be implemented"""
+        backend = StorageBackend()
+        self.assertRaises(NotImplementedError, backend.put_item, {})
+        self.assertRaises(NotImplementedError, backend.put_items, [{}])
+        self.assertRaises(NotImplementedError, backend.delete_item, "pk", 1)
+        self.assertRaises(NotImplementedError, backend.get_item, "pk", 1)
+        self.assertRaises(NotImplementedError, backend.query, KeyCondition("pk"))
+        self.assertRaises(NotImplementedError, backend.scan)
+
+
+@mock_dynamodb
+class TestStorageBackends(TestCase):
+    """Test class for the key semantics of the storage backends"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.backends = [DynamoDBBackend(create_dynamodb_table()), SQLiteBackend(), PacedBackend(SQLiteBackend(), items_per_second=1000)]
+        self.items = [{"primary": "pk", "secondary": secondary, "value": str(secondary)} for secondary in range(1, 6)]
+        self.items.append({"primary": "other", "secondary": 3, "value": "other", "nested": {"1": "2"}})
+
+    def test_as_backend(self):
+        """Test wrapping a table in a backend"""
+        backend = SQLiteBackend()
+        self.assertIs(backend, as_backend(backend))
+        self.assertIsInstance(as_backend(self.backends[0].db_table), DynamoDBBackend)
+
+    def test_get_item(self):
+        """Test the get_item method"""
+        for backend in self.backends:
+            backend.put_items(self.items)
+            backend.put_item({"primary": "pk", "secondary": 1, "value": "replaced"})
+            self.assertEqual("replaced", backend.get_item("pk", 1)["value"])
+            self.assertEqual({"1": "2"}, backend.get_item("other", 3)["nested"])
+            self.assertEqual(3, backend.get_item("other", 3)["secondary"])
+            self.assertIsNone(backend.get_item("pk", 6))
+
+    def test_delete_item(self):
+        """Test the delete_item method"""
+        for backend in self.backends + [CoalescingBackend(SQLiteBackend())]:
+            backend.put_items(self.items)
+            backend.delete_item("pk", 2)
+            backend.delete_item("pk", 6)
+            self.assertIsNone(backend.get_item("pk", 2))
+            self.assertEqual(len(self.items) - 1, len(list(backend.scan())), type(backend).__name__)
+
+    def test_query(self):
+        """Test the query method"""
+        conditions = [
+            (KeyCondition("pk"), [1, 2, 3, 4, 5]),
+            (KeyCondition("pk", lower=2), [2, 3, 4, 5]),
+            (KeyCondition("pk", upper=4, upper_inclusive=False), [1, 2, 3]),
+            (KeyCondition("pk", upper=4), [1, 2, 3, 4]),
+            (KeyCondition("pk", lower=2, upper=4), [2, 3, 4]),
+            (KeyCondition("pk", lower=2, upper=4, upper_inclusive=False), [2, 3]),
+            (KeyCondition("unknown"), []),
+        ]
+        for backend in self.backends:
+            backend.put_items(reversed(self.items))
+            for condition, expected in conditions:
+                self.assertEqual(expected, [int(item["secondary"]) for item in backend.query(condition)], f"{type(backend).__name__} {condition}")
+
+    def test_scan(self):
+        """Test the scan method"""
+        for backend in self.backends:
+            backend.put_items(self.items)
+            self.assertEqual(len(self.items), len(list(backend.scan())))
+
+    def test_coalescing(self):
+        """Test reading the same keys only once"""
+        backend = SQLiteBackend()
+        backend.put_items(self.items)
+        coalescing = CoalescingBackend(backend)
+        with patch.object(backend, "get_item", wraps=backend.get_item) as mock_get, patch.object(backend, "query", wraps=backend.query) as mock_query:
+            self.assertEqual("1", coalescing.get_item("pk", 1)["value"])
+            self.assertEqual("1", coalescing.get_item("pk", Decimal(1))["value"])
+            self.assertIsNone(coalescing.get_item("pk", 6))
+            self.assertIsNone(coalescing.get_item("pk", 6))
+            self.assertEqual(2, mock_get.call_count)
+            self.assertEqual(3, len(coalescing.query(KeyCondition("pk", lower=2, upper=4))))
+            self.assertEqual(3, len(coalescing.query(KeyCondition("pk", lower=2, upper=4))))
+            self.assertEqual(5, len(coalescing.query(KeyCondition("pk"))))
+            self.assertEqual(2, mock_query.call_count)
+
+    def test_paced(self):
+        """Test limiting the write rate"""
+        backend = PacedBackend(SQLiteBackend(), items_per_second=100)
+        start = time.monotonic()
+        backend.put_items({"primary": "pk", "secondary": secondary} for secondary in range(11))
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertEqual(11, len(backend.query(KeyCondition("pk"))))
+
+        # The rate is shared by the threads writing through the backend
+        start = time.monotonic()
+        threads = [
+            Thread(target=backend.put_items, args=([{"primary": f"pk{thread}", "secondary": secondary} for secondary in range(5)],)) for thread in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_decimals(self):
+        """Test storing items as returned by DynamoDB in SQLite"""
+        backend = SQLiteBackend()
+        backend.put_item({"primary": "pk", "secondary": Decimal(1), "value": Decimal("1.5")})
+        self.assertEqual({"primary": "pk", "secondary": 1, "value": "1.5"}, backend.get_item("pk", 1))
+
+
+class TestSQLiteDao(TestCase):
+    """Test class for the data access objects on top of SQLite"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.backend = SQLiteBackend()
+
+    def test_indexing_setting(self):
+        """Test saving, loading and querying indexing settings"""
+        indexes = [
+            IndexingSetting(
+                "index1", 1.0 + month, IndexingSettingTimeframe.MONTHLY, datetime(2023, month, 1, tzinfo=utc), "src", IndexingSettingOrigin.ORIGINAL
+            )
+            for month in range(1, 6)
+        ]
+        IndexingSetting.save_list(self.backend, indexes)
+        loaded = IndexingSetting.load(self.backend, "src", "index1", IndexingSettingTimeframe.MONTHLY, datetime(2023, 2, 1, tzinfo=utc))
+        self.assertEqual(indexes[1], loaded)
+        self.assertEqual(indexes, IndexingSetting.query(self.backend, "src", "index1"))
+        self.assertEqual(indexes[2:], IndexingSetting.query(self.backend, "src", "index1", start=datetime(2023, 3, 1, tzinfo=utc)))
+        self.assertEqual(indexes[:2], IndexingSetting.query(self.backend, "src", "index1", end=datetime(2023, 3, 1, tzinfo=utc)))
+        self.assertEqual(1, len(IndexingSettingDocumentation.query(self.backend)))
+
+    def test_excise(self):
+        """Test saving and loading excises"""
+        excise = EnergyExcise(country="BE", graduated_excise={0: 0.0425755, 3000: 0.04748}, energy_contribution=0.0019261)
+        excise.save(self.backend)
+        self.assertEqual(excise, EnergyExcise.load(self.backend, "BE"))
+        self.assertIsNone(EnergyExcise.load(self.backend, "FR"))
@@ -1,19 +1,21 @@
 """Test module for lambda"""
 from __future__ import annotations
 from unittest import TestCase
-from unittest.mock import patch, call
+from unittest.mock import patch, call, ANY
 from pathlib import Path
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 import os
 
 import requests_mock
 from moto import mock_dynamodb
 from pytz import utc
 
-from feeders.eex import EEXIndexingSetting, EEX_URL
+from feeders.eex import EEXIndexingSetting, EEXFeeder, EEX_URL
 from dao.indexingsetting import IndexingSettingOrigin, IndexingSettingTimeframe, IndexingSettingDocumentation
-from lambda_feeder import eex_handler as handler
-from tests.creators import create_dynamodb_table
+from tests.creators import create_dynamodb_table, create_feed_handler
+
+
+handler = create_feed_handler("eex")
 
 
 def mock_url(mock, index: str, start: date, end: date, file_name: str):
@@ -70,15 +72,18 @@ class TestLambdaHandlerEngie(TestCase):
         """Test the lambda handler"""
         # Path these methods so they return a fixed result, as the lambda handler is "moving"
         # and otherwise we would have no consistent results the coming months
-        with patch("feeders.eex.EEXIndexingSetting.get_ztp_values", return_value=self.gas_indexes), patch(
-            "feeders.eex.EEXIndexingSetting.get_zee_values", return_value=[]
-        ):
+        with patch("feeders.eex.EEXFeeder.units", return_value=["#E.ZTP_GTND"]), patch(
+            "feeders.eex.EEXFeeder.fetch", return_value=("#E.ZTP_GTND", ["item"])
+        ), patch("feeders.eex.EEXIndexingSetting.parse_items", return_value=self.gas_indexes):
             os.environ["TABLE_NAME"] = self.db_table.name
             self.assertEqual(0, len(self.db_table.scan().get("Items", [])))
             handler({}, {})
             self.assertEqual(2, len(self.db_table.scan().get("Items", [])))
             self.assertEqual(1, len(IndexingSettingDocumentation.query(self.db_table)))
 
-        with patch("feeders.eex.EEXIndexingSetting.get_ztp_values", return_value=self.gas_indexes) as mock:
+        with patch("feeders.eex.EEXIndexingSetting.session") as mock_session, patch("feeders.eex.EEXIndexingSetting.fetch_items", return_value=[]) as mock:
             handler({"start": "2023/04/01", "end": "2023/04/30"}, {})
-            self.assertEqual([call(date_filter=date(2023, 4, 1), end=date(2023, 4, 30))], mock.mock_calls)
+            self.assertEqual(4, mock.call_count)
+            self.assertEqual(1, mock_session.call_count)
+            self.assertEqual(call(ANY, "#E.ZTP_GTND", date(2023, 4, 1), date(2023, 4, 30)), mock.mock_calls[0])
+        self.assertEqual((date.today() - timedelta(days=7), date.today()), EEXFeeder.date_range({}))
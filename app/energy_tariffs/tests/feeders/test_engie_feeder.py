@@ -1,7 +1,7 @@
 """Test module for lambda"""
 from __future__ import annotations
 from unittest import TestCase
-from unittest.mock import patch, call
+from unittest.mock import ANY, patch, call
 from pathlib import Path
 from datetime import datetime, timedelta
 import os
@@ -11,11 +11,18 @@ import requests_mock
 from moto import mock_dynamodb
 from pytz import utc, timezone
 
-from feeders.engie import EngieIndexingSetting, GAS_URL, ENERGY_URL, convert_month
+from feeders.engie import EngieIndexingSetting, EngieFeeder, GAS_URL, ENERGY_URL, convert_month, month_starts, next_month_start
 from feeders.entsoe import EntsoeIndexingSetting, ENTSOE_URL
+from feeders.httpcache import CachedResponse
 from dao.indexingsetting import IndexingSettingOrigin, IndexingSettingTimeframe, IndexingSetting, IndexingSettingDocumentation
-from lambda_feeder import engie_handler as handler
-from tests.creators import create_dynamodb_table
+from dao.checkpoint import BackfillCheckpoint
+from dao.httpcache import HttpCacheEntry
+from dao.series import IndexingSettingSeries
+from tests.creators import create_dynamodb_table, create_feed_handler
+
+
+handler = create_feed_handler("engie")
+backfill_handler = create_feed_handler("engie_backfill")
 
 
 def mock_url(mock, url: str, file_name: str):
@@ -108,10 +115,40 @@ class TestEngieIndexingSetting(TestCase):
         self.assertEqual("ZTP DAM", indexes[1].name)
         self.assertEqual(41.39, indexes[1].value)
 
-        with patch("feeders.engie.IndexingSetting.query", return_value=[]):
+        empty_series = IndexingSettingSeries("SDAC BE", "ENTSO-E", IndexingSettingTimeframe.HOURLY, IndexingSettingOrigin.ORIGINAL)
+        with patch("feeders.engie.IndexingSettingSeries.query", return_value=empty_series):
             indexes = EngieIndexingSetting.calculate_derived_values(self.db_table)
             self.assertEqual(0, len(indexes))
 
+    @mock_dynamodb
+    def test_backfill_derived_values(self, mock):
+        """Test the backfill_derived_values method, which should match the calculation per month"""
+        self.db_table = create_dynamodb_table()
+        mock_url(mock, ENTSOE_URL, "entsoe_be.xml")
+        tz_be = timezone("Europe/Brussels")
+        indexes = EntsoeIndexingSetting.get_be_values(api_key="key", start=tz_be.localize(datetime(2023, 4, 1)), end=tz_be.localize(datetime(2023, 5, 1)))
+        IndexingSetting.save_list(self.db_table, indexes)
+        IndexingSetting.save_list(self.db_table, read_eex_csv("eex_202304.csv"))
+
+        expected = EngieIndexingSetting.calculate_derived_values(self.db_table, calculation_date=tz_be.localize(datetime(2023, 4, 30)))
+        with patch("feeders.engie.IndexingSettingSeries.query", wraps=IndexingSettingSeries.query) as mock_query:
+            indexes = EngieIndexingSetting.backfill_derived_values(self.db_table, tz_be.localize(datetime(2023, 2, 1)), tz_be.localize(datetime(2023, 6, 1)))
+            # A single query per series for the whole range
+            self.assertEqual(3, mock_query.call_count)
+        self.assertEqual(expected, indexes)
+        self.assertEqual(
+            [], EngieIndexingSetting.backfill_derived_values(self.db_table, tz_be.localize(datetime(2023, 6, 1)), tz_be.localize(datetime(2023, 5, 1)))
+        )
+
+    def test_month_starts(self, mock):
+        """Test the month_starts function"""
+        tz_be = timezone("Europe/Brussels")
+        self.assertEqual(
+            [tz_be.localize(datetime(2022, 11, 1)), tz_be.localize(datetime(2022, 12, 1)), tz_be.localize(datetime(2023, 1, 1))],
+            month_starts(tz_be.localize(datetime(2022, 11, 15)), tz_be.localize(datetime(2023, 1, 1)), tz_be),
+        )
+        self.assertEqual(tz_be.localize(datetime(2023, 1, 1)), next_month_start(tz_be.localize(datetime(2022, 12, 1)), tz_be))
+
 
 @mock_dynamodb
 class TestLambdaHandlerEngie(TestCase):
@@ -157,27 +194,46 @@ class TestLambdaHandlerEngie(TestCase):
         # Path these methods so they return a fixed result, as the lambda handler is "moving"
         # and otherwise we would have no consistent results the coming months
         tz_be = timezone("Europe/Brussels")
-        with patch("feeders.engie.EngieIndexingSetting.get_gas_values", return_value=self.gas_indexes), patch(
-            "feeders.engie.EngieIndexingSetting.get_energy_values", return_value=self.energy_indexes
+        pages = {"gas": self.gas_indexes, "energy": self.energy_indexes}
+        fetch = patch("feeders.engie.EngieFeeder.fetch", side_effect=lambda event, unit: CachedResponse(unit, unit.encode(), "hash"))
+        with patch("feeders.engie.EngieFeeder.units", return_value=["gas", "energy"]), fetch, patch(
+            "feeders.engie.EngieIndexingSetting.iter_html", side_effect=pages.get
         ), patch("feeders.engie.EngieIndexingSetting.calculate_derived_values", return_value=self.derived_indexes):
             os.environ["TABLE_NAME"] = self.db_table.name
             self.assertEqual(0, len(self.db_table.scan().get("Items", [])))
-            handler({}, {})
-            self.assertEqual(6, len(self.db_table.scan().get("Items", [])))
+            self.assertEqual({"feed": "engie", "saved": 2, "derived": 1, "completed": ["gas", "energy"], "unchanged": [], "failed": []}, handler({}, {}))
+            # The values and the cache entries of both pages
+            self.assertEqual(8, len(self.db_table.scan().get("Items", [])))
+            self.assertIsNotNone(HttpCacheEntry.load(self.db_table, "gas"))
             self.assertEqual(3, len(IndexingSettingDocumentation.query(self.db_table)))
 
-        with patch("feeders.engie.EngieIndexingSetting.get_gas_values", return_value=[]) as mock_gas, patch(
-            "feeders.engie.EngieIndexingSetting.get_energy_values", return_value=[]
-        ) as mock_energy, patch("feeders.engie.EngieIndexingSetting.calculate_derived_values", return_value=[]) as mock_derived:
-            handler({"start": "2023/04/01"}, {})
-            self.assertEqual([call(tz_be.localize(datetime(2023, 4, 1)))], mock_gas.mock_calls)
-            self.assertEqual([call(tz_be.localize(datetime(2023, 4, 1)))], mock_energy.mock_calls)
-            self.assertEqual([call(self.db_table, None)], mock_derived.mock_calls)
-
-        with patch("feeders.engie.EngieIndexingSetting.get_gas_values", return_value=[]) as mock_gas, patch(
-            "feeders.engie.EngieIndexingSetting.get_energy_values", return_value=[]
-        ) as mock_energy, patch("feeders.engie.EngieIndexingSetting.calculate_derived_values", return_value=[]) as mock_derived:
+        with patch("feeders.engie.EngieFeeder.units", return_value=["gas"]), fetch, patch(
+            "feeders.engie.EngieIndexingSetting.iter_html", side_effect=pages.get
+        ), patch("feeders.engie.EngieIndexingSetting.calculate_derived_values", return_value=[]) as mock_derived:
+            # Only the values since the start are stored
+            self.assertEqual(0, handler({"start": f"{datetime.now().year + 1}/01/01"}, {})["saved"])
+            self.assertEqual([call(ANY, None)], mock_derived.mock_calls)
+            # The feed writes to the table within its write budget
+            self.assertEqual(self.db_table, mock_derived.call_args.args[0].backend.db_table)
+
+        with patch("feeders.engie.EngieFeeder.units", return_value=[]), patch(
+            "feeders.engie.EngieIndexingSetting.calculate_derived_values", return_value=[]
+        ) as mock_derived:
             handler({"calculate": "2023/04/30"}, {})
-            self.assertEqual([call(datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90))], mock_gas.mock_calls)
-            self.assertEqual([call(datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90))], mock_energy.mock_calls)
-            self.assertEqual([call(self.db_table, tz_be.localize(datetime(2023, 4, 30)))], mock_derived.mock_calls)
+            self.assertEqual([call(ANY, tz_be.localize(datetime(2023, 4, 30)))], mock_derived.mock_calls)
+            self.assertEqual(self.db_table, mock_derived.call_args.args[0].backend.db_table)
+
+        self.assertEqual(tz_be.localize(datetime(2023, 4, 1)), EngieFeeder.not_before({"start": "2023/04/01"}))
+        self.assertEqual(datetime.now(tz_be).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90), EngieFeeder.not_before({}))
+
+    def test_backfill_handler(self):
+        """Test the lambda handler for the backfill"""
+        tz_be = timezone("Europe/Brussels")
+        with patch("feeders.engie.EngieIndexingSetting.backfill_derived_values", return_value=self.derived_indexes) as mock_backfill:
+            os.environ["TABLE_NAME"] = self.db_table.name
+            backfill_handler({"start": "2023/01", "end": "2023/04"}, {})
+            self.assertEqual([call(ANY, tz_be.localize(datetime(2023, 1, 1)), tz_be.localize(datetime(2023, 4, 1)))], mock_backfill.mock_calls)
+            self.assertEqual(self.db_table, mock_backfill.call_args.args[0].backend.db_table)
+            # The value, its documentation and the checkpoint of the backfill
+            self.assertEqual(3, len(self.db_table.scan().get("Items", [])))
+            self.assertIsNotNone(BackfillCheckpoint.last_updated(self.db_table))
@@ -1,20 +1,28 @@
 """Test module for lambda"""
 from __future__ import annotations
 from unittest import TestCase
-from unittest.mock import patch, call
+from unittest.mock import patch, call, ANY
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from statistics import mean
+from threading import Thread
 import os
+import time
 
 from moto import mock_dynamodb, mock_secretsmanager
 import requests_mock
 from pytz import utc, timezone
 
-from feeders.entsoe import EntsoeIndexingSetting, ENTSOE_URL
-from dao.indexingsetting import IndexingSettingOrigin, IndexingSettingTimeframe, IndexingSettingDocumentation
-from lambda_feeder import entsoe_handler as handler
-from tests.creators import create_dynamodb_table, create_secrets
+from feeders.entsoe import EntsoeFeeder, EntsoeIndexingSetting, ENTSOE_URL
+from feeders.ratelimit import RateLimiter
+from dao.checkpoint import BackfillCheckpoint
+from dao.storage import PacedBackend
+from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe, IndexingSettingDocumentation
+from tests.creators import create_dynamodb_table, create_secrets, create_feed_handler
+
+
+handler = create_feed_handler("entsoe")
+backfill_handler = create_feed_handler("entsoe_backfill")
 
 
 def mock_url(mock, url: str, file_name: str):
@@ -61,7 +69,29 @@ class TestEEXIndexingSetting(TestCase):
         tz_be = timezone("Europe/Brussels")
         start = tz_be.localize(datetime(2023, 4, 1))
         end = tz_be.localize(datetime(2023, 5, 1))
-        self.assertRaises(NotImplementedError, EntsoeIndexingSetting.query, api_key="key", country_code="FR", start=start, end=end)
+        self.assertRaises(NotImplementedError, EntsoeIndexingSetting.query, api_key="key", country_code="XX", start=start, end=end)
+
+    def test_fetch_zones(self, mock):
+        """Test fetching the documents of multiple bidding zones"""
+        mock_url(mock, ENTSOE_URL, "entsoe_be.xml")
+        start = datetime(2023, 4, 1, tzinfo=utc)
+        end = datetime(2023, 4, 3, tzinfo=utc)
+        feeder = EntsoeFeeder()
+        feeder.api_key, feeder.rate_limiter = "key", RateLimiter(1000)
+        event = {"start": "2023/04/01", "end": "2023/04/03", "zones": ["BE", "NL", "DE-LU", "NO1"]}
+        documents = [feeder.fetch(event, zone) for zone in feeder.units(event)]
+        self.assertEqual(["BE", "NL", "DE-LU", "NO1"], [zone for zone, _ in documents])
+        self.assertEqual(
+            {"10YBE----------2", "10YNL----------L", "10Y1001A1001A82H", "10YNO-1--------2"},
+            {request.qs["in_domain"][0].upper() for request in mock.request_history},
+        )
+        indexes = list(EntsoeIndexingSetting.parse_xml("NL", documents[1][1], start, end))
+        self.assertEqual(48, len(indexes))
+        self.assertEqual("SDAC NL", indexes[0].name)
+
+        # An unknown zone fails before anything is requested
+        self.assertRaises(NotImplementedError, feeder.units, {"zones": ["BE", "XX"]})
+        self.assertEqual(4, mock.call_count)
 
     def test_no_matching_data_found(self, mock):
         """Test the query method with no matching data"""
@@ -71,6 +101,92 @@ class TestEEXIndexingSetting(TestCase):
         end = tz_be.localize(datetime(2023, 5, 1))
         self.assertRaises(ValueError, EntsoeIndexingSetting.query, api_key="key", country_code="BE", start=start, end=end)
 
+        # The backfill moves past a window without data
+        stored = []
+        completed_until = EntsoeIndexingSetting.backfill(
+            "key", "BE", start, end, lambda window_end, values: stored.append((window_end, values)), rate_limiter=RateLimiter(1000)
+        )
+        self.assertEqual(end, completed_until)
+        self.assertEqual([(end, [])], stored)
+
+    def test_windows(self, mock):
+        """Test splitting a range in windows"""
+        start = datetime(2023, 1, 1, tzinfo=utc)
+        self.assertEqual([], EntsoeIndexingSetting.windows(start, start))
+        self.assertEqual([(start, start + timedelta(days=10))], EntsoeIndexingSetting.windows(start, start + timedelta(days=10)))
+        self.assertEqual(
+            [(start, start + timedelta(days=30)), (start + timedelta(days=30), start + timedelta(days=45))],
+            EntsoeIndexingSetting.windows(start, start + timedelta(days=45)),
+        )
+
+    def test_backfill(self, mock):
+        """Test fetching a range concurrently, the windows should still be passed in order"""
+
+        def query(api_key, country_code, start, end):
+            # Later windows return earlier
+            time.sleep(0.01 * (5 - start.month))
+            return [EntsoeIndexingSetting.from_entsoe_data("SDAC BE", start, float(start.month))]
+
+        stored = []
+        with patch("feeders.entsoe.EntsoeIndexingSetting.query", side_effect=query) as mock_query:
+            completed_until = EntsoeIndexingSetting.backfill(
+                "key",
+                "BE",
+                datetime(2023, 1, 1, tzinfo=utc),
+                datetime(2023, 5, 1, tzinfo=utc),
+                lambda window_end, values: stored.append((window_end, values[0].value)),
+                rate_limiter=RateLimiter(1000),
+            )
+        self.assertEqual(datetime(2023, 5, 1, tzinfo=utc), completed_until)
+        self.assertEqual(4, mock_query.call_count)
+        self.assertEqual([1.0, 1.0, 3.0, 4.0], [value for _, value in stored])
+        self.assertEqual(sorted(window_end for window_end, _ in stored), [window_end for window_end, _ in stored])
+
+        # Nothing is requested after the deadline
+        with patch("feeders.entsoe.EntsoeIndexingSetting.query", side_effect=query) as mock_query:
+            completed_until = EntsoeIndexingSetting.backfill(
+                "key", "BE", datetime(2023, 1, 1, tzinfo=utc), datetime(2023, 5, 1, tzinfo=utc), lambda window_end, values: None, deadline=time.monotonic()
+            )
+        self.assertEqual(datetime(2023, 1, 1, tzinfo=utc), completed_until)
+        self.assertEqual(0, mock_query.call_count)
+
+        # Only the windows of which the values can be written before the deadline are requested (720 s per 30 days)
+        clock = [0.0]
+
+        def write_window(window_end, values):
+            clock[0] += 720
+
+        with patch("feeders.entsoe.EntsoeIndexingSetting.query", side_effect=query) as mock_query, patch(
+            "feeders.entsoe.time.monotonic", side_effect=lambda: clock[0]
+        ):
+            completed_until = EntsoeIndexingSetting.backfill(
+                "key",
+                "BE",
+                datetime(2023, 1, 1, tzinfo=utc),
+                datetime(2023, 5, 1, tzinfo=utc),
+                write_window,
+                deadline=1500,
+                rate_limiter=RateLimiter(1000),
+                writes_per_second=1,
+            )
+        self.assertEqual(datetime(2023, 3, 2, tzinfo=utc), completed_until)
+        self.assertEqual(2, mock_query.call_count)
+
+
+class TestRateLimiter(TestCase):
+    """Test class for RateLimiter"""
+
+    def test_wait(self):
+        """Test spacing the calls over multiple threads"""
+        limiter = RateLimiter(100)
+        start = time.monotonic()
+        threads = [Thread(target=limiter.wait) for _ in range(11)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
 
 @mock_dynamodb
 @mock_secretsmanager
@@ -97,7 +213,9 @@ class TestLambdaHandlerEntsoe(TestCase):
         """Test the lambda handler"""
         # Path these methods so they return a fixed result, as the lambda handler is "moving"
         # and otherwise we would have no consistent results the coming months
-        with patch("feeders.entsoe.EntsoeIndexingSetting.query", return_value=self.indexes):
+        with patch("feeders.entsoe.EntsoeIndexingSetting.fetch_xml", return_value="<xml/>"), patch(
+            "feeders.entsoe.EntsoeIndexingSetting.parse_xml", return_value=self.indexes
+        ):
             os.environ["TABLE_NAME"] = self.db_table.name
             os.environ["SECRET_ARN"] = self.secret["ARN"]
             self.assertEqual(0, len(self.db_table.scan().get("Items", [])))
@@ -105,8 +223,71 @@ class TestLambdaHandlerEntsoe(TestCase):
             self.assertEqual(2, len(self.db_table.scan().get("Items", [])))
             self.assertEqual(1, len(IndexingSettingDocumentation.query(self.db_table)))
 
-        with patch("feeders.entsoe.EntsoeIndexingSetting.query", return_value=self.indexes) as mock:
+        with patch("feeders.entsoe.EntsoeIndexingSetting.fetch_xml", return_value="<xml/>") as mock, patch(
+            "feeders.entsoe.EntsoeIndexingSetting.parse_xml", return_value=self.indexes
+        ):
             handler({"start": "2023/04/01", "end": "2023/04/15"}, {})
+            self.assertEqual([call("fakekey", "BE", datetime(2023, 4, 1, tzinfo=utc), datetime(2023, 4, 15, tzinfo=utc), session=ANY)], mock.mock_calls)
+
+    def test_handler_zones(self):
+        """Test the lambda handler for multiple bidding zones"""
+
+        def parse_xml(country_code, xml, start, end):
+            return [EntsoeIndexingSetting.from_entsoe_data(f"SDAC {country_code}", start, 1.1)]
+
+        os.environ["TABLE_NAME"] = self.db_table.name
+        os.environ["SECRET_ARN"] = self.secret["ARN"]
+        with patch("feeders.entsoe.EntsoeIndexingSetting.fetch_xml", return_value="<xml/>") as mock, patch(
+            "feeders.entsoe.EntsoeIndexingSetting.parse_xml", side_effect=parse_xml
+        ), patch("feeders.entsoe.TABLE_WRITES_PER_SECOND", 1000), patch.object(
+            PacedBackend, "__init__", autospec=True, side_effect=PacedBackend.__init__
+        ) as mock_paced:
             self.assertEqual(
-                [call(api_key="fakekey", country_code="BE", start=datetime(2023, 4, 1, tzinfo=utc), end=datetime(2023, 4, 15, tzinfo=utc))], mock.mock_calls
+                {"feed": "entsoe", "saved": 3, "derived": 0, "completed": ["BE", "NL", "FR"], "unchanged": [], "failed": []},
+                handler({"start": "2023/04/01", "end": "2023/04/15", "zones": ["BE", "NL", "FR"]}, {}),
             )
+            self.assertEqual({"BE", "NL", "FR"}, {mock_call.args[1] for mock_call in mock.mock_calls})
+            self.assertEqual(1, mock_paced.call_count)
+        start = datetime(2023, 4, 1, tzinfo=utc)
+        for zone in ["BE", "NL", "FR"]:
+            self.assertEqual(1, len(IndexingSetting.query(self.db_table, "ENTSO-E", f"SDAC {zone}", timeframe=IndexingSettingTimeframe.HOURLY, start=start)))
+
+    def test_backfill_handler(self):
+        """Test the lambda handler for the backfill, which resumes from the checkpoint"""
+
+        def query(api_key, country_code, start, end):
+            return [EntsoeIndexingSetting.from_entsoe_data("SDAC BE", start, 1.0)]
+
+        class Context:
+            """Lambda context that is out of time after the first call"""
+
+            def __init__(self, remaining: int):
+                self.remaining = remaining
+
+            def get_remaining_time_in_millis(self) -> int:
+                return self.remaining
+
+        os.environ["TABLE_NAME"] = self.db_table.name
+        os.environ["SECRET_ARN"] = self.secret["ARN"]
+        event = {"start": "2023/01/01", "end": "2023/03/01"}
+        with patch("feeders.entsoe.EntsoeIndexingSetting.query", side_effect=query) as mock:
+            # No time left: nothing is fetched
+            self.assertEqual({"completed_until": "2023/01/01 00:00", "done": False}, backfill_handler(event, Context(0)))
+            self.assertEqual(0, mock.call_count)
+            self.assertEqual({"completed_until": "2023/03/01 00:00", "done": True}, backfill_handler(event, Context(600000)))
+            self.assertEqual(2, mock.call_count)
+            # Resuming a completed job does not fetch anything
+            self.assertEqual({"completed_until": "2023/03/01 00:00", "done": True}, backfill_handler(event, {}))
+            self.assertEqual(2, mock.call_count)
+
+        job = "ENTSO-E#BE#20230101#20230301"
+        self.assertEqual(datetime(2023, 3, 1, tzinfo=utc), BackfillCheckpoint.load(self.db_table, job).completed_until)
+        self.assertEqual(2, len(IndexingSetting.query(self.db_table, "ENTSO-E", "SDAC BE", timeframe=IndexingSettingTimeframe.HOURLY)))
+
+        # Other zones have their own checkpoint, so the completed BE job is not fetched again
+        event = {"start": "2023/01/01", "end": "2023/03/01", "zones": ["BE", "NL"]}
+        with patch("feeders.entsoe.EntsoeIndexingSetting.query", side_effect=query) as mock:
+            self.assertEqual({"completed_until": "2023/03/01 00:00", "done": True}, backfill_handler(event, {}))
+            self.assertEqual(["NL", "NL"], [mock_call.kwargs["country_code"] for mock_call in mock.mock_calls])
+        job = "ENTSO-E#NL#20230101#20230301"
+        self.assertEqual(datetime(2023, 3, 1, tzinfo=utc), BackfillCheckpoint.load(self.db_table, job).completed_until)
@@ -5,8 +5,10 @@ import os
 
 from moto import mock_dynamodb
 
-from lambda_feeder import excises_handler as handler
-from tests.creators import create_dynamodb_table
+from tests.creators import create_dynamodb_table, create_feed_handler
+
+
+handler = create_feed_handler("excises")
 
 
 @mock_dynamodb
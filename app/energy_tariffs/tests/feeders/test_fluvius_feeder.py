@@ -1,17 +1,23 @@
 """Test module for lambda"""
 from __future__ import annotations
+from dataclasses import replace
 from unittest import TestCase
 from unittest.mock import patch, call
 from pathlib import Path
 import os
+import re
 
 import requests_mock
 from moto import mock_dynamodb
 
 from feeders.fluvius import FluviusParser, extract_excel_url, EnergyGridCost
+from feeders.httpcache import CachedResponse
+from feeders.runner import FeedFailed
 from dao.gridcost import EnergyDirection
-from lambda_feeder import fluvius_handler as handler
-from tests.creators import create_dynamodb_table
+from tests.creators import create_dynamodb_table, create_feed_handler
+
+
+handler = create_feed_handler("fluvius")
 
 
 def mock_url(mock, url: str, file_name: str):
@@ -191,10 +197,65 @@ class TestLambdaHandlerFluvius(TestCase):
 
     def test_handler(self):
         """Test the lambda handler"""
-        with patch("feeders.fluvius.FluviusParser.from_url", return_value=self.grid_costs):
+        units = [("Fluvius Antwerpen", "https://www.fluvius.be/antwerpen.xlsx"), ("Fluvius Limburg", "https://www.fluvius.be/limburg.xlsx")]
+        with patch("feeders.fluvius.FluviusFeeder.units", return_value=units), patch(
+            "feeders.fluvius.FluviusFeeder.fetch", side_effect=lambda event, unit: (unit[0], CachedResponse(unit[1], b"", "hash"))
+        ), patch("feeders.fluvius.FluviusParser.from_workbook", side_effect=self.grid_costs), patch("feeders.fluvius.FluviusFeeder.commit"):
             os.environ["TABLE_NAME"] = self.db_table.name
             self.assertEqual(0, len(self.db_table.scan().get("Items", [])))
             handler({}, {})
-            self.assertEqual(2, len(self.db_table.scan().get("Items", [])))
+            # Every grid cost is also stored in the partition of the country
+            self.assertEqual(4, len(self.db_table.scan().get("Items", [])))
+            self.assertEqual(2, len(EnergyGridCost.query_country(self.db_table, "BE")))
             self.assertIsNotNone(EnergyGridCost.load(self.db_table, "BE", "Fluvius Antwerpen"))
             self.assertIsNotNone(EnergyGridCost.load(self.db_table, "BE", "Fluvius Limburg"))
+
+    @requests_mock.Mocker()
+    def test_handler_unchanged(self, mock):
+        """Test the pages and workbooks are only processed again when they changed"""
+        os.environ["TABLE_NAME"] = self.db_table.name
+        mock_url(mock, FluviusParser.url, "fluvius_grid_costs.html")
+        mock_url(mock, re.compile("https://www.fluvius.be/nl/publicatie/"), "fluvius_excel_redirect.html")
+        mock_url(mock, TestFluviusGridCosts.excel_url, "fluvius_elec_drawdown_2023.xlsx")
+        report = handler({}, {})
+        # The ten electricity drawdown tariffs (all redirecting to the same workbook in the test)
+        self.assertEqual(10, len(report["completed"]))
+        self.assertEqual(1 + 10 + 10, mock.call_count)
+        self.assertEqual(10, len(EnergyGridCost.query_country(self.db_table, "BE")))
+
+        mock.reset_mock()
+        report = handler({}, {})
+        self.assertEqual(0, report["saved"])
+        self.assertEqual(10, len(report["unchanged"]))
+        self.assertEqual(0, report["derived"])
+        # The server sends no validators, so the documents are requested in full but only their hashes are compared
+        self.assertEqual(1 + 10 + 10, mock.call_count)
+        self.assertFalse(any("If-None-Match" in request.headers for request in mock.request_history))
+
+        # A changed workbook is processed again, the invocation fails as it cannot be parsed
+        mock.reset_mock()
+        mock.get(TestFluviusGridCosts.excel_url, content=b"changed")
+        with self.assertRaises(FeedFailed) as context:
+            handler({}, {})
+        report = context.exception.reports[0]
+        self.assertEqual(10, len(report["failed"]))
+        self.assertTrue(report["failed"][0]["error"].startswith("BadZipFile"))
+
+    @requests_mock.Mocker()
+    def test_handler_country(self, mock):
+        """Test the partition of the country is rewritten to the published providers when grid costs are saved"""
+        os.environ["TABLE_NAME"] = self.db_table.name
+        mock_url(mock, FluviusParser.url, "fluvius_grid_costs.html")
+        mock_url(mock, re.compile("https://www.fluvius.be/nl/publicatie/"), "fluvius_excel_redirect.html")
+        mock_url(mock, TestFluviusGridCosts.excel_url, "fluvius_elec_drawdown_2023.xlsx")
+        handler({}, {})
+        grid_costs = sorted(EnergyGridCost.query_country(self.db_table, "BE"), key=lambda grid_cost: grid_cost.grid_provider)
+        self.db_table.delete_item(Key=dict(zip(["primary", "secondary"], EnergyGridCost._ddb_country_hash("BE", grid_costs[0].grid_provider))))
+        replace(grid_costs[1], grid_provider="Retired").save(self.db_table)
+
+        # The retired provider is deleted and the provider missing from the partition is restored from its own item
+        report = handler({"refresh": True, "units": [grid_costs[1].grid_provider]}, {})
+        self.assertEqual(2, report["saved"])
+        self.assertEqual(0, report["derived"])
+        self.assertEqual(grid_costs, sorted(EnergyGridCost.query_country(self.db_table, "BE"), key=lambda grid_cost: grid_cost.grid_provider))
+        self.assertIsNotNone(EnergyGridCost.load(self.db_table, "BE", "Retired"))
@@ -0,0 +1,72 @@
+"""Test module for the HTTP cache of the feeders"""
+from __future__ import annotations
+from unittest import TestCase
+
+import requests
+import requests_mock
+from moto import mock_dynamodb
+
+from dao.httpcache import HttpCacheEntry
+from feeders.httpcache import HttpCache, is_conditional
+from tests.creators import create_dynamodb_table
+
+
+URL = "https://www.engie.be/page"
+
+
+@mock_dynamodb
+@requests_mock.Mocker()
+class TestHttpCache(TestCase):
+    """Test class for the HTTP cache"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        self.cache = HttpCache(self.db_table)
+
+    def test_not_modified(self, mock):
+        """Test the conditional request of a processed document"""
+        mock.get(URL, text="page", headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 May 2023 00:00:00 GMT"})
+        response = self.cache.get(URL)
+        self.assertFalse(response.unchanged)
+        self.assertEqual("page", response.text)
+        self.assertNotIn("If-None-Match", mock.last_request.headers)
+
+        # Not stored yet, e.g. as the values could not be saved
+        self.assertFalse(self.cache.get(URL).unchanged)
+        self.cache.store(response, data="link")
+        self.assertEqual(HttpCacheEntry(URL, response.content_hash, '"v1"', "Mon, 01 May 2023 00:00:00 GMT", "link"), HttpCacheEntry.load(self.db_table, URL))
+
+        mock.get(URL, status_code=304)
+        response = self.cache.get(URL)
+        self.assertTrue(response.unchanged)
+        self.assertIsNone(response.content)
+        self.assertEqual("link", response.data)
+        self.assertEqual('"v1"', mock.last_request.headers["If-None-Match"])
+        self.assertEqual("Mon, 01 May 2023 00:00:00 GMT", mock.last_request.headers["If-Modified-Since"])
+
+        # An unconditional request always gets the content
+        mock.get(URL, text="page")
+        response = self.cache.get(URL, conditional=False)
+        self.assertFalse(response.unchanged)
+        self.assertNotIn("If-None-Match", mock.last_request.headers)
+
+    def test_content_hash(self, mock):
+        """Test the content is compared when the server does not support conditional requests"""
+        mock.get(URL, text="page")
+        self.cache.store(self.cache.get(URL))
+        self.assertTrue(self.cache.get(URL).unchanged)
+
+        mock.get(URL, text="changed page")
+        response = self.cache.get(URL)
+        self.assertFalse(response.unchanged)
+        self.assertEqual("changed page", response.text)
+
+        mock.get(URL, status_code=500)
+        self.assertRaises(requests.HTTPError, self.cache.get, URL)
+
+    def test_is_conditional(self, mock):
+        """Test only the scheduled runs are conditional"""
+        self.assertTrue(is_conditional({}))
+        self.assertFalse(is_conditional({"refresh": True}))
+        self.assertFalse(is_conditional({"start": "2023/04/01"}))
@@ -0,0 +1,149 @@
+"""Test module for the feeder runner"""
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+
+from dao.checkpoint import BackfillCheckpoint
+from dao.storage import SQLiteBackend
+from feeders import runner
+from feeders.registry import FeederPlugin
+
+
+class FlakyFeeder(FeederPlugin):
+    """Feeder of which the units fail a number of times, the units are named `<host>/<name>`"""
+
+    name = "flaky"
+
+    def __init__(self, failures: dict[str, int]):
+        self.failures = dict(failures)
+        self.requests = []
+        self.saved = []
+
+    def units(self, event: dict) -> list[str]:
+        return ["a/1", "a/2", "a/3", "b/1", "b/2"]
+
+    def host(self, unit: str) -> str:
+        return unit.split("/")[0]
+
+    def fetch(self, event: dict, unit: str) -> str:
+        self.requests.append(unit)
+        if self.failures.get(unit, 0) > 0:
+            self.failures[unit] -= 1
+            raise ConnectionError(f"Connection to {unit} failed")
+        return unit
+
+    def parse(self, event: dict, document: str) -> list[str]:
+        if document == "b/2":
+            raise ValueError("Unexpected document")
+        return [document]
+
+    def save(self, db_table, values) -> int:
+        values = list(values)
+        self.saved.extend(values)
+        return len(values)
+
+
+@patch("feeders.runner.RETRY_BACKOFF_SECONDS", 0)
+class TestRunner(TestCase):
+    """Test class for the runner"""
+
+    def test_retry(self):
+        """Test the transient errors are retried"""
+        feeder = FlakyFeeder({"a/1": 2, "b/1": 1})
+        report = feeder.run({}, {}, None)
+        self.assertEqual(["a/1", "a/2", "a/3", "b/1"], report["completed"])
+        self.assertEqual([{"unit": "b/2", "error": "ValueError: Unexpected document", "attempts": 1}], report["failed"])
+        self.assertEqual(["a/1", "a/2", "a/3", "b/1"], feeder.saved)
+        self.assertEqual(4, report["saved"])
+        self.assertEqual(3, feeder.requests.count("a/1"))
+
+    def test_circuit_breaker(self):
+        """Test the remaining units of a host are not requested after consecutive failures, while the other hosts continue"""
+        feeder = FlakyFeeder({"a/1": 3, "a/2": 3})
+        report = feeder.run({}, {}, None)
+        self.assertEqual(["b/1"], report["completed"])
+        self.assertEqual(["a/1", "a/2", "a/3", "b/2"], [failure["unit"] for failure in report["failed"]])
+        self.assertEqual({"unit": "a/3", "error": "CircuitOpen: Circuit open after failures of the host", "attempts": 0}, report["failed"][2])
+        self.assertNotIn("a/3", feeder.requests)
+
+        # A unit of which the circuit opened between its attempts keeps its own error, the circuit does not count it again
+        feeder = FlakyFeeder({"c/1": 3})
+        opened = iter([False, True])
+        outcome = runner.retry(lambda: feeder.fetch({}, "c/1"), is_open=lambda: next(opened))
+        self.assertEqual(1, outcome.attempts)
+        self.assertTrue(outcome.interrupted)
+        self.assertEqual("Connection to c/1 failed", str(outcome.error))
+
+    def test_rerun(self):
+        """Test a rerun only runs the listed units"""
+        feeder = FlakyFeeder({})
+        report = feeder.run({"units": ["a/2", "b/1"]}, {}, None)
+        self.assertEqual(["a/2", "b/1"], feeder.requests)
+        self.assertEqual({"feed": "flaky", "saved": 2, "derived": 0, "completed": ["a/2", "b/1"], "unchanged": [], "failed": []}, report)
+
+        # The units of the feeds that run together are listed per feed
+        feeder = FlakyFeeder({})
+        self.assertEqual(["a/3"], feeder.run({"units": {"flaky": ["a/3"], "other": ["a/1"]}}, {}, None)["completed"])
+        feeder = FlakyFeeder({})
+        self.assertEqual(["a/1", "a/2", "a/3", "b/1"], feeder.run({"units": {"other": ["a/1"]}}, {}, None)["completed"])
+
+    def test_rewrite_checkpoint(self):
+        """Test a run over an explicit start records a checkpoint, as it may rewrite historic values"""
+        db_table = SQLiteBackend()
+        FlakyFeeder({}).run({}, {}, db_table)
+        self.assertIsNone(BackfillCheckpoint.last_updated(db_table))
+        FlakyFeeder({}).run({"start": "2023/01/01"}, {}, db_table)
+        self.assertIsNotNone(BackfillCheckpoint.load(db_table, "flaky#2023/01/01"))
+        self.assertIsNotNone(BackfillCheckpoint.last_updated(db_table))
+
+    def test_unchanged(self):
+        """Test the units of which the document did not change are neither parsed nor saved"""
+        feeder = FlakyFeeder({})
+        with patch.object(feeder, "fetch", side_effect=lambda event, unit: None if unit.startswith("a/") else unit), patch.object(feeder, "commit") as mock:
+            report = feeder.run({}, {}, None)
+        self.assertEqual(["a/1", "a/2", "a/3"], report["unchanged"])
+        self.assertEqual(["b/1"], report["completed"])
+        self.assertEqual(["b/1"], feeder.saved)
+        self.assertEqual(1, mock.call_count)
+
+    def test_is_transient(self):
+        """Test only the connection errors, timeouts, 429 and 5xx responses are retried"""
+
+        def http_error(status: int) -> requests.HTTPError:
+            response = requests.Response()
+            response.status_code = status
+            return requests.HTTPError(f"{status} error", response=response)
+
+        self.assertTrue(runner.is_transient(requests.ConnectionError("Connection refused")))
+        self.assertTrue(runner.is_transient(requests.Timeout("Read timed out")))
+        self.assertTrue(runner.is_transient(http_error(429)))
+        self.assertTrue(runner.is_transient(http_error(503)))
+        self.assertFalse(runner.is_transient(http_error(404)))
+        self.assertFalse(runner.is_transient(ValueError("Unexpected document")))
+
+        feeder = FlakyFeeder({})
+        with patch.object(feeder, "fetch", side_effect=http_error(404)) as mock:
+            report = feeder.run({"units": ["a/1"]}, {}, None)
+        self.assertEqual(1, mock.call_count)
+        self.assertEqual(1, report["failed"][0]["attempts"])
+
+    def test_failed_units(self):
+        """Test the report of a run of which the units could not be listed"""
+        feeder = FlakyFeeder({})
+        with patch.object(feeder, "units", side_effect=TimeoutError("Timed out")), patch("feeders.runner.RETRY_ATTEMPTS", 2):
+            report = feeder.run({}, {}, None)
+        self.assertEqual([{"unit": "units", "error": "TimeoutError: Timed out", "attempts": 2}], report["failed"])
+        self.assertEqual([], feeder.requests)
+
+    def test_circuit_breaker_reset(self):
+        """Test a successful unit resets the failures of the host"""
+        breaker = runner.CircuitBreaker(threshold=2)
+        breaker.record("host", False)
+        breaker.record("host", True)
+        breaker.record("host", False)
+        self.assertFalse(breaker.is_open("host"))
+        breaker.record("host", False)
+        self.assertTrue(breaker.is_open("host"))
+        self.assertFalse(breaker.is_open("other"))
@@ -1,7 +1,7 @@
 """Test module for API classes"""
 from __future__ import annotations
 from unittest import TestCase
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import os
 
@@ -9,10 +9,11 @@ from moto import mock_dynamodb
 from pytz import utc
 
 from api import Api
-from api.method import ApiMethod
-from api.result import ApiResult, Success, BadRequest
+from api.method import ApiMethod, process_unique
+from api.result import ApiResult, Success, BadRequest, IMMUTABLE, earliest_expiry, expires_in
 from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
 from lambda_api import handler
+from serializer import LazyJson, dumps, to_dict
 from tests.creators import create_dynamodb_table
 
 
@@ -50,9 +51,53 @@ class TestApi(TestCase):
         os.environ["API_BASE_PATH"] = self.base_path
         result = handler(self.valid_request, {})
         self.assertEqual(200, result["statusCode"])
+        etag = result["headers"]["ETag"]
+        result = handler({**self.valid_request, "headers": {"if-none-match": etag}}, {})
+        self.assertEqual(304, result["statusCode"])
+        self.assertEqual("", result["body"])
         result = handler({**self.valid_request, "path": f"{self.base_path}/notexisting"}, {})
         self.assertEqual(400, result["statusCode"])
 
+    def test_invalid_body(self):
+        """Test the bad request listing every problem of the body"""
+        api = Api(self.base_path, self.db_table)
+        body = {"q1": {"SOURCE": 5, "TIMEFRAME": "WEEKLY"}, "q2": self.valid_body, "q3": {**self.valid_body, "DATE": "yesterday"}}
+        result = api.handle({**self.valid_request, "path": f"{self.base_path}/indexingsettings", "body": json.dumps(body)})
+        self.assertEqual(400, result["statusCode"])
+        self.assertEqual(
+            {
+                "error": "Invalid request",
+                "errors": [
+                    {"field": "q1.INDEX", "message": "is required"},
+                    {"field": "q1.SOURCE", "message": "must be a string"},
+                    {"field": "q1.TIMEFRAME", "message": "must be one of DAILY, HOURLY, MONTHLY"},
+                    {"field": "q3.DATE", "message": "must be a date formatted as %Y-%m-%d %H:%M"},
+                ],
+            },
+            json.loads(result["body"]),
+        )
+        self.assertIsNone(api.parse({**self.valid_request, "body": json.dumps({**self.valid_body, "TZ": "Mars/Olympus"})}))
+
+    def test_process_unique(self):
+        """Test processing the distinct methods only once"""
+        processed = []
+
+        class Method(ApiMethod):
+            def __init__(self, value):
+                self.value = value
+
+            def __eq__(self, other):
+                return self.value == other.value
+
+            def process(self):
+                processed.append(self.value)
+                return Success(self.value)
+
+        results = process_unique({"q1": Method(1), "q2": Method(2), "q3": Method(1)})
+        self.assertEqual([1, 2], processed)
+        self.assertEqual({"q1": 1, "q2": 2, "q3": 1}, {key: result.body for key, result in results.items()})
+        self.assertIs(results["q1"], results["q3"])
+
     def test_not_implemented_method(self):
         """Test an existing API method"""
         method = ApiMethod()
@@ -75,8 +120,14 @@ class TestApi(TestCase):
         self.assertIsNotNone(api.parse({**self.valid_request, "path": f"{self.base_path}/endprice", "body": json.dumps(body)}))
         # /endprices
         self.assertIsNotNone(api.parse({**self.valid_request, "path": f"{self.base_path}/endprices", "body": json.dumps({"q1": body})}))
+        # /endprice/backtest
+        backtest_body = {**body, "START": "2023-01-01 00:00", "END": "2023-06-01 00:00"}
+        self.assertIsNotNone(api.parse({**self.valid_request, "path": f"{self.base_path}/endprice/backtest", "body": json.dumps(backtest_body)}))
         # /list
         self.assertIsNotNone(api.parse({"httpMethod": "GET", "path": f"{self.base_path}/list", "body": json.dumps({})}))
+        # /gridcosts/batch
+        body = {"q1": {"COUNTRY": "BE", "PROVIDER": "Fluvius Antwerpen", "POWER": [3, 4], "ENERGY": [5000, 4000], "DYNAMIC": True}}
+        self.assertIsNotNone(api.parse({**self.valid_request, "path": f"{self.base_path}/gridcosts/batch", "body": json.dumps(body)}))
 
     def test_non_existing_method(self):
         """Test an non-existing API method"""
@@ -91,8 +142,67 @@ class TestApi(TestCase):
         success = Success({"result": "good"})
         bad_request = BadRequest("some error")
 
-        self.assertEqual({"statusCode": 200, "body": '{"result": "good"}'}, good.to_api())
-        self.assertEqual({"statusCode": 400, "body": '{"result": "bad"}'}, bad.to_api())
-        self.assertEqual({"statusCode": 200, "body": '{"result": "good"}'}, success.to_api())
+        # The exact bodies of orjson, which is deployed with the lambdas
+        no_store = {"Cache-Control": "no-store"}
+        self.assertEqual({"statusCode": 200, "headers": no_store, "body": '{"result":"good"}'}, good.to_api())
+        self.assertEqual({"statusCode": 400, "headers": no_store, "body": '{"result":"bad"}'}, bad.to_api())
+        self.assertEqual({"statusCode": 200, "headers": no_store, "body": '{"result":"good"}'}, success.to_api())
         self.assertEqual(good.to_api(), success.to_api())
-        self.assertEqual({"statusCode": 400, "body": '{"error": "some error"}'}, bad_request.to_api())
+        self.assertEqual({"statusCode": 400, "headers": no_store, "body": '{"error":"some error"}'}, bad_request.to_api())
+        self.assertEqual({"statusCode": 400, "headers": no_store, "body": '{"error":"some error","errors":[]}'}, BadRequest("some error", errors=[]).to_api())
+
+    def test_serializer(self):
+        """Test the serialisation of API payloads"""
+        index = IndexingSetting("index1", 1.1, IndexingSettingTimeframe.MONTHLY, datetime(2023, 4, 1, tzinfo=utc), "src", IndexingSettingOrigin.ORIGINAL)
+        expected = {
+            "name": "index1",
+            "value": 1.1,
+            "timeframe": "MONTHLY",
+            "date": "2023-04-01 00:00:00+00:00",
+            "source": "src",
+            "origin": "ORIGINAL",
+        }
+        self.assertEqual({**expected, "date": index.date}, to_dict(index))
+        self.assertEqual(
+            '{"name":"index1","value":1.1,"timeframe":"MONTHLY","date":"2023-04-01 00:00:00+00:00","source":"src","origin":"ORIGINAL"}', dumps(to_dict(index))
+        )
+        self.assertEqual({"q1": expected}, json.loads(dumps({"q1": index})))
+        self.assertEqual({"1": 2}, json.loads(dumps({1: 2})))
+        self.assertEqual(expected, json.loads(str(LazyJson(index))))
+
+    def test_cache_headers(self):
+        """Test the HTTP caching headers of ApiResult results"""
+        self.assertEqual({"Cache-Control": "no-store"}, Success({"result": "good"}).to_api()["headers"])
+        self.assertEqual({"Cache-Control": "no-store"}, BadRequest("some error").to_api()["headers"])
+        self.assertEqual({"Cache-Control": "no-store"}, Success({"result": "good"}, expires=expires_in(-timedelta(hours=1))).to_api()["headers"])
+
+        result = Success({"result": "good"}, expires=expires_in(timedelta(hours=1))).to_api()
+        self.assertIn(result["headers"]["Cache-Control"], ["public, max-age=3599", "public, max-age=3600"])
+        self.assertIn("ETag", result["headers"])
+        self.assertIn("Expires", result["headers"])
+        self.assertEqual(result["headers"]["ETag"], Success({"result": "good"}, expires=expires_in(IMMUTABLE)).to_api()["headers"]["ETag"])
+        self.assertNotEqual(result["headers"]["ETag"], Success({"result": "bad"}, expires=expires_in(IMMUTABLE)).to_api()["headers"]["ETag"])
+        self.assertTrue(Success({}, expires=expires_in(IMMUTABLE)).to_api()["headers"]["Cache-Control"].endswith("immutable"))
+
+        # Conditional requests
+        etag = result["headers"]["ETag"]
+        success = Success({"result": "good"}, expires=expires_in(timedelta(hours=1)))
+        self.assertEqual(304, success.to_api(if_none_match=etag)["statusCode"])
+        self.assertEqual(304, success.to_api(if_none_match=f'"other", W/{etag}')["statusCode"])
+        self.assertEqual(304, success.to_api(if_none_match="*")["statusCode"])
+        self.assertEqual(200, success.to_api(if_none_match='"other"')["statusCode"])
+        self.assertEqual(400, BadRequest("some error").to_api(if_none_match="*")["statusCode"])
+
+    def test_earliest_expiry(self):
+        """Test combining the expiry of results"""
+        first = expires_in(timedelta(hours=1))
+        second = expires_in(IMMUTABLE)
+        self.assertEqual(first, earliest_expiry([Success({}, expires=first), Success({}, expires=second)]))
+        self.assertIsNone(earliest_expiry([Success({}, expires=first), Success({})]))
+        self.assertIsNone(earliest_expiry([]))
+
+    def test_header(self):
+        """Test getting request headers from the event"""
+        self.assertEqual("value", Api.header({"headers": {"If-None-Match": "value"}}, "if-none-match"))
+        self.assertIsNone(Api.header({"headers": None}, "If-None-Match"))
+        self.assertIsNone(Api.header({}, "If-None-Match"))
@@ -0,0 +1,51 @@
+"""Test module for the benchmarks"""
+from __future__ import annotations
+from datetime import datetime
+from unittest import TestCase
+
+from pytz import utc
+
+from benchmarks import bench_codecs, bench_parsers
+from feeders.entsoe import EntsoeIndexingSetting
+from feeders.fluvius import FluviusParser
+
+
+class TestParserBenchmarks(TestCase):
+    """Test class for the parser benchmarks"""
+
+    def test_scale_entsoe_xml(self):
+        """Test the time series are repeated after the period of the document"""
+        timeseries = list(EntsoeIndexingSetting.iterate_timeseries(bench_parsers.scale_entsoe_xml(bench_parsers.read_text("entsoe_be.xml"), 2)))
+        self.assertEqual(60, len(timeseries))
+        self.assertEqual(utc.localize(datetime(2023, 3, 31, 22)), timeseries[0].start_time)
+        self.assertEqual(utc.localize(datetime(2023, 4, 30, 22)), timeseries[30].start_time)
+        self.assertEqual(timeseries[0].period, timeseries[30].period)
+
+    def test_scale_workbook(self):
+        """Test the parsed cells are kept when the rows of the workbook are repeated"""
+        content = bench_parsers.read_bytes("fluvius_elec_drawdown_2023.xlsx")
+        self.assertEqual(FluviusParser.from_workbook("Fluvius", content), FluviusParser.from_workbook("Fluvius", bench_parsers.scale_workbook(content, 2)))
+
+    def test_eex_measurements(self):
+        """Test the benchmark reports the scaled items"""
+        measurements = bench_parsers.eex_measurements(scale=2, repeat=1)
+        self.assertEqual(4, len(measurements))
+        self.assertEqual(2 * measurements[0].items, measurements[1].items)
+        self.assertTrue(all(measurement.items_per_second > 0 and measurement.peak_bytes > 0 for measurement in measurements))
+
+
+class TestCodecBenchmarks(TestCase):
+    """Test class for the codec benchmarks"""
+
+    def test_reference_codecs(self):
+        """Test the reference codecs produce the same objects and JSON as the codecs of the models"""
+        index = bench_codecs.hourly_index_values(1)[0]
+        data = index._to_ddb_json()
+        self.assertEqual({**data, "last_updated": None}, {**bench_codecs.asdict_encode_indexing_setting(index), "last_updated": None})
+        self.assertEqual(index, bench_codecs.strptime_decode_indexing_setting(data))
+
+    def test_run(self):
+        """Test the benchmark runs"""
+        measurements = bench_codecs.run(items=10)
+        self.assertEqual(12, len(measurements))
+        self.assertTrue(all(measurement.items_per_second > 0 for measurement in measurements))
@@ -1,8 +1,11 @@
 """Test module for feeder lambda"""
 from unittest import TestCase
 from unittest.mock import patch
+import time
 
-
+from dao.storage import PacedBackend
+from feeders import registry
+from feeders.runner import FeedFailed
 from lambda_feeder import handler
 
 
@@ -12,11 +15,78 @@ class TestFeeder(TestCase):
     def test_handler_none(self):
         """Test the lambda handler"""
         handler({}, {})
+        self.assertIsNone(handler({"feed": "unknown"}, {}))
 
     def test_handlers(self):
         """Test the lambda handler"""
-        handlers = ["engie", "eex", "entsoe", "fluvius", "excises"]
+        handlers = ["engie", "engie_backfill", "eex", "entsoe", "entsoe_backfill", "fluvius", "excises"]
+        self.assertEqual(handlers, list(registry.FEEDERS))
         for feeder in handlers:
-            with patch(f"lambda_feeder.{feeder}_handler") as mock:
+            with patch.dict("os.environ", {"TABLE_NAME": "table"}), patch.object(registry.plugin_class(feeder), "run", return_value={}) as mock:
                 handler({"feed": feeder}, {})
                 self.assertEqual(1, mock.call_count, f"Handler for {feeder} not invoked")
+                # A single feed writes within the same budget as the feeds that run together
+                self.assertIsInstance(mock.call_args.args[2], PacedBackend)
+
+    def test_handler_feeds(self):
+        """Test the feeds run together, sharing the table and after the feeds they depend on"""
+        events = []
+        failing = {"excises"}
+
+        def run(feeder: str):
+            def run_feed(event, context, db_table):
+                events.append((feeder, "start", db_table))
+                time.sleep(0.05)
+                events.append((feeder, "end", db_table))
+                if feeder in failing:
+                    raise ConnectionError("Failed")
+                return {"feed": feeder}
+
+            return run_feed
+
+        patches = [patch.object(registry.plugin_class(feeder), "run", side_effect=run(feeder)) for feeder in registry.ALL_FEEDS]
+        with patch.dict("os.environ", {"TABLE_NAME": "table"}), patches[0], patches[1], patches[2], patches[3], patches[4]:
+            # The other feeds complete, but the invocation fails
+            with self.assertRaises(FeedFailed) as context:
+                handler({"feed": "all"}, {})
+        reports = context.exception.reports
+        self.assertEqual([{"feed": feeder} for feeder in ["entsoe", "eex", "engie", "fluvius"]], reports[:4])
+        self.assertEqual({"feed": "excises", "failed": [{"unit": "run", "error": "ConnectionError: Failed", "attempts": 1}]}, reports[4])
+        self.assertEqual(1, len({id(db_table) for _feeder, _step, db_table in events}))
+        self.assertIsInstance(events[0][2], PacedBackend)
+        # Engie starts after ENTSO-E and EEX ended, the other feeds run concurrently
+        steps = [(feeder, step) for feeder, step, _db_table in events]
+        self.assertGreater(steps.index(("engie", "start")), max(steps.index(("entsoe", "end")), steps.index(("eex", "end"))))
+        self.assertLess(steps.index(("fluvius", "start")), steps.index(("entsoe", "end")))
+
+        # A feed is skipped when a feed it depends on failed
+        failing.add("entsoe")
+        events.clear()
+        with patch.dict("os.environ", {"TABLE_NAME": "table"}), patches[0], patches[1], patches[2], patches[3], patches[4]:
+            with self.assertRaises(FeedFailed) as context:
+                handler({"feed": "all"}, {})
+        reports = context.exception.reports
+        self.assertEqual({"feed": "entsoe", "failed": [{"unit": "run", "error": "ConnectionError: Failed", "attempts": 1}]}, reports[0])
+        self.assertEqual([{"feed": "eex"}, {"feed": "engie", "skipped": ["entsoe"]}, {"feed": "fluvius"}], reports[1:4])
+        self.assertNotIn("engie", {feeder for feeder, _step, _db_table in events})
+
+        with patch.dict("os.environ", {"TABLE_NAME": "table"}), patch.object(registry.plugin_class("engie"), "run", return_value={"feed": "engie"}) as mock:
+            self.assertEqual([{"feed": "engie"}], handler({"feeds": ["engie"]}, {}))
+            self.assertEqual(1, mock.call_count)
+            self.assertIsNone(handler({"feeds": ["engie", "unknown"]}, {}))
+            self.assertEqual(1, mock.call_count)
+            # The units of the feeds that run together are listed per feed
+            self.assertRaises(ValueError, handler, {"feeds": ["engie", "eex"], "units": ["gas"]}, {})
+            self.assertEqual(1, mock.call_count)
+
+    def test_register(self):
+        """Test registering a new feeder"""
+        try:
+            registry.register("test", "feeders.excise:ExciseFeeder")
+            plugin = registry.load("test")
+            self.assertEqual("test", plugin.name)
+            self.assertIsInstance(plugin, registry.FeederPlugin)
+        finally:
+            registry.FEEDERS.pop("test")
+            registry.plugin_class.cache_clear()
+        self.assertRaises(KeyError, registry.load, "test")
@@ -0,0 +1,61 @@
+"""Test module for the cold start imports of the lambda handlers"""
+from __future__ import annotations
+from unittest import TestCase
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_imports import APP_DIR, import_times, report
+
+
+FEEDER_PACKAGES = ["bs4", "lxml", "openpyxl", "holidays", "requests"]
+
+
+def imported_modules(code: str) -> list[str]:
+    """Run the code in a fresh interpreter and get the imported modules"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": APP_DIR},
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestImports(TestCase):
+    """Test class for the cold start imports"""
+
+    def test_api_graph(self):
+        """Test the API does not pull in the packages of the feeders"""
+        modules = imported_modules("import lambda_api")
+        for package in FEEDER_PACKAGES + ["feeders", "cProfile", "sqlite3", "dao.snapshot"]:
+            self.assertNotIn(package, modules)
+        self.assertFalse(any(module.startswith("api.methods.") for module in modules))
+
+    def test_lazy_routes(self):
+        """Test only the modules of the requested route are imported"""
+        modules = imported_modules("from api import Api\nApi('', None).parse({'path': '/list', 'httpMethod': 'GET'})")
+        self.assertIn("api.methods.list", modules)
+        self.assertNotIn("api.methods.end_price_backtest", modules)
+        self.assertNotIn("api.methods.grid_costs_batch", modules)
+        for package in FEEDER_PACKAGES:
+            self.assertNotIn(package, modules)
+
+    def test_feeder_graph(self):
+        """Test the feeder only imports the packages of the requested feed"""
+        modules = imported_modules("import lambda_feeder\nfrom feeders import registry\nregistry.plugin_class('excises')")
+        self.assertIn("feeders.excise", modules)
+        for package in FEEDER_PACKAGES + ["feeders.engie", "feeders.fluvius", "api"]:
+            self.assertNotIn(package, modules)
+        modules = imported_modules("from feeders import registry\nregistry.plugin_class('fluvius')")
+        self.assertIn("openpyxl", modules)
+        self.assertNotIn("holidays", modules)
+
+    def test_report(self):
+        """Test the import time report"""
+        times = import_times("logs")
+        self.assertEqual("logs", times[-1].module)
+        self.assertTrue(report("logs", top=3).startswith("logs: "))
@@ -0,0 +1,84 @@
+"""Test module for the structured logging"""
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import patch
+import json
+import logging
+
+import logs
+from serializer import dumps
+from benchmarks import bench_logs
+
+
+class Unserialisable:
+    """Payload that fails the test when it is serialised"""
+
+    def __str__(self):
+        raise AssertionError("The payload should not be serialised")
+
+
+class TestLogs(TestCase):
+    """Test class for the structured logging"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.logger = logging.getLogger("tests.logs")
+        self.logger.setLevel(logging.INFO)
+        logs.SETTINGS = logs.LogSettings(sample_rate=1.0, max_chars=20)
+        # The test suite disables logging
+        self.disabled = logging.root.manager.disable
+        logging.disable(logging.NOTSET)
+
+    def tearDown(self):
+        """Restore the settings"""
+        logs.SETTINGS = logs.LogSettings.from_env()
+        logging.disable(self.disabled)
+
+    def records(self, level: int, message: str, **fields) -> list[dict]:
+        """Log a record and get the emitted JSON objects"""
+        with self.assertLogs(self.logger, logging.DEBUG) as context:
+            logs.log(self.logger, level, message, **fields)
+            self.logger.debug("end")
+        return [json.loads(record.getMessage()) for record in context.records[:-1]]
+
+    def test_record(self):
+        """Test the structured records"""
+        self.assertEqual([{"message": "hello", "status": 200, "body": {"a": 1}}], self.records(logging.INFO, "hello", status=200, body=logs.Payload({"a": 1})))
+        self.assertEqual([{"message": "raw", "body": {"a": 1}}], self.records(logging.INFO, "raw", body=logs.Payload('{"a":1}', raw=True)))
+        self.assertEqual([{"message": "empty", "body": None}], self.records(logging.INFO, "empty", body=logs.Payload("", raw=True)))
+
+    def test_lazy(self):
+        """Test payloads are not serialised when the level is disabled"""
+        self.logger.setLevel(logging.WARNING)
+        logs.info(self.logger, "hidden", body=logs.Payload(Unserialisable()))
+
+    def test_truncate(self):
+        """Test large payloads are truncated, except for warnings and errors"""
+        payload = logs.Payload(list(range(100)))
+        (record,) = self.records(logging.INFO, "large", body=payload)
+        text = dumps(list(range(100)))
+        self.assertEqual(f"{text[:20]}... ({len(text)} chars)", record["body"])
+        (record,) = self.records(logging.ERROR, "large", body=payload)
+        self.assertEqual(list(range(100)), record["body"])
+
+    def test_sampling(self):
+        """Test payloads are only included in the sampled records, but always for warnings"""
+        logs.SETTINGS.sample_rate = 0.5
+        with patch("logs.random.random", return_value=0.7):
+            self.assertEqual(
+                [{"message": "skip", "status": 200, "sampled": False}], self.records(logging.INFO, "skip", status=200, body=logs.Payload({"a": 1}))
+            )
+            self.assertEqual([{"message": "warn", "body": {"a": 1}}], self.records(logging.WARNING, "warn", body=logs.Payload({"a": 1})))
+        with patch("logs.random.random", return_value=0.3):
+            self.assertEqual([{"message": "keep", "body": {"a": 1}}], self.records(logging.INFO, "keep", body=logs.Payload({"a": 1})))
+
+    def test_settings(self):
+        """Test reading the settings from the environment"""
+        with patch.dict("os.environ", {"LOG_PAYLOAD_SAMPLE_RATE": "0.5", "LOG_PAYLOAD_MAX_CHARS": "100"}):
+            self.assertEqual(logs.LogSettings(0.5, 100), logs.LogSettings.from_env())
+
+    def test_benchmark(self):
+        """Test the benchmark runs"""
+        measurements = bench_logs.run(records=10)
+        self.assertEqual(5, len(measurements))
+        self.assertTrue(all(measurement.items_per_second > 0 for measurement in measurements))
@@ -0,0 +1,65 @@
+"""Test module for the profiling of the handlers"""
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import patch
+import json
+import logging
+import os
+import pstats
+import tempfile
+
+from profiling import is_enabled, profiled
+
+
+@profiled("test")
+def handler(event, _context):
+    """Handler for testing"""
+    return sum(len(str(value)) for value in range(event.get("count", 10)))
+
+
+class TestProfiling(TestCase):
+    """Test class for the profiling"""
+
+    def setUp(self):
+        """Set up the test"""
+        # The test suite disables logging
+        self.disabled = logging.root.manager.disable
+        logging.disable(logging.NOTSET)
+
+    def tearDown(self):
+        """Restore the logging"""
+        logging.disable(self.disabled)
+
+    def test_is_enabled(self):
+        """Test enabling the profiling"""
+        with patch.dict("os.environ", {"PROFILE": ""}):
+            self.assertFalse(is_enabled({"feed": "engie"}))
+            self.assertFalse(is_enabled(None))
+            self.assertTrue(is_enabled({"feed": "engie", "profile": True}))
+            # A caller of the API cannot enable it
+            self.assertFalse(is_enabled({"path": "/v1/list", "headers": {"X-Profile": "true"}}))
+        with patch.dict("os.environ", {"PROFILE": "1"}):
+            self.assertTrue(is_enabled({"feed": "engie"}))
+
+    def test_profiled(self):
+        """Test the summary of a profiled invocation"""
+        with patch.dict("os.environ", {"PROFILE": ""}), self.assertLogs("profiling", logging.INFO) as context:
+            self.assertEqual(5, handler({"count": 5}, None))
+            self.assertEqual(10, handler({"profile": True}, None))
+        self.assertEqual(1, len(context.records))
+        record = json.loads(context.records[0].getMessage())
+        self.assertEqual("test", record["handler"])
+        self.assertIsNone(record["profile_path"])
+        self.assertTrue(any("(handler)" in hotspot["function"] for hotspot in record["hotspots"]))
+        self.assertGreaterEqual(record["peak_kib"], 0)
+
+    def test_dump(self):
+        """Test saving the raw profile"""
+        with tempfile.TemporaryDirectory() as directory:
+            with patch.dict("os.environ", {"PROFILE": "1", "PROFILE_DUMP": "1", "PROFILE_DIR": directory, "PROFILE_TOP": "3"}):
+                with self.assertLogs("profiling", logging.INFO) as context:
+                    handler({}, None)
+            record = json.loads(context.records[0].getMessage())
+            self.assertEqual(3, len(record["hotspots"]))
+            self.assertEqual(directory, os.path.dirname(record["profile_path"]))
+            self.assertGreater(pstats.Stats(record["profile_path"]).total_calls, 0)
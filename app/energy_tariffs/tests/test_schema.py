@@ -0,0 +1,117 @@
+"""Test module for the request schemas"""
+from __future__ import annotations
+from unittest import TestCase
+from datetime import datetime
+from enum import Enum, auto
+
+from api.schema import (
+    Schema,
+    Batch,
+    Field,
+    RequestError,
+    string,
+    number,
+    boolean,
+    timezone_name,
+    one_of,
+    date,
+    scalar_or_list,
+    build_each,
+    compile_date_format,
+    get_timezone,
+)
+
+
+class Color(Enum):
+    """Enum for testing"""
+
+    RED = auto()
+    GREEN = auto()
+
+
+class TestSchema(TestCase):
+    """Test class for the request schemas"""
+
+    def test_converters(self):
+        """Test the converters of single values"""
+        self.assertEqual("a", string("a"))
+        self.assertRaises(ValueError, string, 1)
+        self.assertEqual(1.5, number(1.5))
+        self.assertEqual(2, number(2))
+        self.assertRaises(ValueError, number, "1")
+        self.assertRaises(ValueError, number, True)
+        self.assertTrue(boolean(True))
+        self.assertIs(True, boolean(1))
+        self.assertIs(False, boolean(0))
+        self.assertRaises(ValueError, boolean, 2)
+        self.assertRaises(ValueError, boolean, 1.0)
+        self.assertRaises(ValueError, boolean, "true")
+        self.assertEqual("Europe/Brussels", timezone_name("Europe/Brussels"))
+        self.assertRaises(ValueError, timezone_name, "Mars/Olympus")
+        self.assertEqual(Color.GREEN, one_of(Color)("GREEN"))
+        self.assertRaises(ValueError, one_of(Color), "BLUE")
+        self.assertEqual([1, 2], scalar_or_list(number)([1, 2]))
+        self.assertEqual(1, scalar_or_list(number)(1))
+        self.assertRaises(ValueError, scalar_or_list(number), [])
+        self.assertRaises(ValueError, scalar_or_list(number), [1, "2"])
+
+    def test_date(self):
+        """Test the compiled date formats"""
+        parse = compile_date_format("%Y-%m-%d %H:%M")
+        self.assertEqual(datetime(2023, 5, 1, 13, 5), parse("2023-05-01 13:05"))
+        self.assertEqual(datetime(2023, 5, 1), compile_date_format("%Y/%m/%d")("2023/5/1"))
+        self.assertIs(parse, compile_date_format("%Y-%m-%d %H:%M"))
+        for invalid in ["2023-05-01", "2023-05-01 13:05:00", "2023-13-01 00:00", 20230501]:
+            with self.assertRaises(ValueError):
+                parse(invalid)
+        with self.assertRaises(ValueError) as context:
+            date("%Y-%m-%d")("01/05/2023")
+        self.assertEqual("must be a date formatted as %Y-%m-%d", context.exception.args[0])
+
+    def test_parse(self):
+        """Test parsing a body with nested objects"""
+        schema = Schema(
+            {
+                "NAME": Field(string),
+                "COLOR": Field(one_of(Color), required=False, default=Color.RED),
+                "NESTED": Field(Schema({"VALUE": Field(number)}), required=False),
+            }
+        )
+        self.assertEqual({"NAME": "a", "COLOR": Color.RED, "NESTED": None}, schema.parse({"NAME": "a", "OTHER": 1}))
+        self.assertEqual({"NAME": "a", "COLOR": Color.GREEN, "NESTED": {"VALUE": 1}}, schema.parse({"NAME": "a", "COLOR": "GREEN", "NESTED": {"VALUE": 1}}))
+        with self.assertRaises(RequestError) as context:
+            schema.parse({"COLOR": "BLUE", "NESTED": {}})
+        self.assertEqual(
+            [
+                {"field": "NAME", "message": "is required"},
+                {"field": "COLOR", "message": "must be one of RED, GREEN"},
+                {"field": "NESTED.VALUE", "message": "is required"},
+            ],
+            context.exception.errors,
+        )
+        self.assertRaises(RequestError, schema.parse, [])
+        extended = schema.extend({"SIZE": Field(number)})
+        self.assertEqual({"NAME": "a", "COLOR": Color.RED, "NESTED": None, "SIZE": 3}, extended.parse({"NAME": "a", "SIZE": 3}))
+
+    def test_batch(self):
+        """Test parsing and building a batch body"""
+        batch = Batch(Schema({"VALUE": Field(number)}))
+        self.assertEqual({"q1": {"VALUE": 1}}, batch.parse({"q1": {"VALUE": 1}}))
+        self.assertRaises(RequestError, batch.parse, {})
+        with self.assertRaises(RequestError) as context:
+            batch.parse({"q1": {"VALUE": 1}, "q2": {"VALUE": "1"}, "q3": 5})
+        self.assertEqual([{"field": "q2.VALUE", "message": "must be a number"}, {"field": "q3", "message": "must be an object"}], context.exception.errors)
+
+        def build(values: dict) -> float:
+            if values["VALUE"] < 0:
+                raise RequestError.of("VALUE", "must be positive")
+            return values["VALUE"]
+
+        self.assertEqual({"q1": 1}, build_each({"q1": {"VALUE": 1}}, build))
+        with self.assertRaises(RequestError) as context:
+            build_each({"q1": {"VALUE": -1}, "q2": {"VALUE": 1}}, build)
+        self.assertEqual([{"field": "q1.VALUE", "message": "must be positive"}], context.exception.errors)
+
+    def test_get_timezone(self):
+        """Test the timezones are only created once"""
+        self.assertIs(get_timezone("Europe/Brussels"), get_timezone("Europe/Brussels"))
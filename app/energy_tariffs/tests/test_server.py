@@ -0,0 +1,104 @@
+"""Test module for the standalone API server"""
+from __future__ import annotations
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.client import HTTPConnection
+from threading import Thread
+import json
+
+from moto import mock_dynamodb
+from pytz import utc
+
+from dao.indexingsetting import IndexingSetting, IndexingSettingOrigin, IndexingSettingTimeframe
+from dao.storage import SQLiteBackend
+from server import ApiServer, TablePool, SharedTable
+from tests.creators import create_dynamodb_table
+
+
+@mock_dynamodb
+class TestApiServer(TestCase):
+    """Test class for ApiServer"""
+
+    def setUp(self):
+        """Set up the test"""
+        self.db_table = create_dynamodb_table()
+        IndexingSetting(
+            "index1",
+            1.1,
+            IndexingSettingTimeframe.MONTHLY,
+            datetime(2023, 4, 1, tzinfo=utc),
+            "src",
+            IndexingSettingOrigin.ORIGINAL,
+        ).save(self.db_table)
+        self.tables = TablePool(self.db_table.name)
+        self.server = ApiServer(("127.0.0.1", 0), "/v1", self.tables)
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.body = json.dumps({"INDEX": "index1", "SOURCE": "src", "DATE": "2023-05-01 00:00"})
+
+    def tearDown(self):
+        """Stop the server"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method: str, path: str, body: str = None, headers: dict = None):
+        """Do a request to the server"""
+        connection = HTTPConnection(*self.server.server_address)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read().decode("utf-8")
+        finally:
+            connection.close()
+
+    def test_post(self):
+        """Test a POST request"""
+        status, headers, body = self.request("POST", "/v1/indexingsetting", self.body)
+        self.assertEqual(200, status)
+        self.assertEqual(1.1, json.loads(body)["value"])
+        status, _headers, body = self.request("POST", "/v1/indexingsetting", self.body, {"If-None-Match": headers["ETag"]})
+        self.assertEqual(304, status)
+        self.assertEqual("", body)
+
+    def test_get(self):
+        """Test a GET request"""
+        status, _headers, body = self.request("GET", "/v1/list")
+        self.assertEqual(200, status)
+        self.assertEqual(1, len(json.loads(body)))
+
+    def test_bad_request(self):
+        """Test requests that can not be answered"""
+        status, _headers, _body = self.request("GET", "/v1/notexisting")
+        self.assertEqual(400, status)
+        status, _headers, body = self.request("POST", "/v1/indexingsetting", "{not json")
+        self.assertEqual(400, status)
+        self.assertEqual([{"field": "", "message": "the body must be valid JSON"}], json.loads(body)["errors"])
+
+    def test_concurrent(self):
+        """Test concurrent requests sharing the table handles"""
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(lambda _: self.request("POST", "/v1/indexingsetting", self.body)[0], range(20)))
+        self.assertEqual([200] * 20, statuses)
+        self.assertLessEqual(self.tables._tables.qsize(), 4)
+
+
+class TestApiServerSQLite(TestCase):
+    """Test class for ApiServer on top of SQLite"""
+
+    def test_post(self):
+        """Test a POST request"""
+        backend = SQLiteBackend()
+        IndexingSetting("index1", 1.1, IndexingSettingTimeframe.MONTHLY, datetime(2023, 4, 1, tzinfo=utc), "src", IndexingSettingOrigin.ORIGINAL).save(backend)
+        server = ApiServer(("127.0.0.1", 0), "/v1", SharedTable(backend))
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            connection = HTTPConnection(*server.server_address)
+            connection.request("POST", "/v1/indexingsetting", body=json.dumps({"INDEX": "index1", "SOURCE": "src", "DATE": "2023-05-01 00:00"}))
+            response = connection.getresponse()
+            self.assertEqual(200, response.status)
+            self.assertEqual(1.1, json.loads(response.read())["value"])
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -8,19 +8,34 @@ import tests.dao.test_dao
 import tests.dao.test_indexingsetting
 import tests.dao.test_gridcosts
 import tests.dao.test_excise
+import tests.dao.test_storage
+import tests.dao.test_snapshot
+import tests.dao.test_checkpoint
+import tests.dao.test_series
 import tests.feeders.test_engie_feeder
 import tests.feeders.test_eex_feeder
 import tests.feeders.test_entsoe_feeder
 import tests.feeders.test_fluvius_feeder
 import tests.feeders.test_excise_feeder
+import tests.feeders.test_runner
+import tests.feeders.test_httpcache
 import tests.test_api
 import tests.test_feeder
+import tests.test_server
+import tests.test_schema
+import tests.test_logs
+import tests.test_profiling
+import tests.test_imports
+import tests.test_benchmarks
 import tests.api_methods.test_indexing_setting
 import tests.api_methods.test_indexing_settings
 import tests.api_methods.test_end_price
+import tests.api_methods.test_end_price_backtest
 import tests.api_methods.test_end_prices
 import tests.api_methods.test_list
 import tests.api_methods.test_grid_cost
+import tests.api_methods.test_grid_cost_all
+import tests.api_methods.test_grid_costs_batch
 import tests.api_methods.test_excise
 
 os.environ["AWS_DEFAULT_REGION"] = "eu-west-1"
@@ -31,19 +46,34 @@ suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_dao))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_indexingsetting))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_gridcosts))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_excise))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_storage))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_snapshot))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_checkpoint))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.dao.test_series))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_api))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_feeder))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_server))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_schema))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_logs))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_profiling))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_imports))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.test_benchmarks))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_engie_feeder))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_eex_feeder))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_entsoe_feeder))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_fluvius_feeder))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_excise_feeder))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_runner))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.feeders.test_httpcache))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_indexing_setting))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_indexing_settings))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_end_price))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_end_price_backtest))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_end_prices))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_list))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_grid_cost))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_grid_cost_all))
+suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_grid_costs_batch))
 suite.addTests(unittest.TestLoader().loadTestsFromModule(tests.api_methods.test_excise))
 # Run the test suite
 results = unittest.TextTestRunner().run(suite)